@@ -2,31 +2,52 @@
 """
 CompPy - Compressor Design Application
 Entry point for running the application
+
+Usage:
+  python comppy.py                               # start the GUI
+  python comppy.py build design.json --out dir/  # headless STL export
 """
 import sys
 import os
 
-# Suppress Qt warnings on Wayland
-os.environ.setdefault('QT_LOGGING_RULES', '*.debug=false;qt.qpa.*=false')
-
 # Add src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-try:
-    from PyQt5.QtWidgets import QApplication, QMainWindow
-    from MainWindow import Ui_MainWindow
-except ImportError as e:
-    print("Error: Required dependencies not installed.")
-    print(f"Details: {e}")
-    print("\nPlease install dependencies:")
-    print("  pip install -r requirements.txt")
-    sys.exit(1)
 
+def run_gui():
+    # Suppress Qt warnings on Wayland
+    os.environ.setdefault('QT_LOGGING_RULES', '*.debug=false;qt.qpa.*=false')
+
+    try:
+        from PyQt5.QtWidgets import QApplication, QMainWindow
+        from MainWindow import Ui_MainWindow
+    except ImportError as e:
+        print("Error: Required dependencies not installed.")
+        print(f"Details: {e}")
+        print("\nPlease install dependencies:")
+        print("  pip install -r requirements.txt")
+        sys.exit(1)
+
+    # OpenGL view: contexts shared so the view survives being re-parented,
+    # COMPPY_SOFTWARE_GL=1 renders it on the CPU (Mesa llvmpipe / opengl32sw)
+    from PyQt5.QtCore import Qt
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+    if os.environ.get('COMPPY_SOFTWARE_GL'):
+        os.environ['LIBGL_ALWAYS_SOFTWARE'] = '1'
+        QApplication.setAttribute(Qt.AA_UseSoftwareOpenGL)
 
-if __name__ == "__main__":
     app = QApplication(sys.argv)
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
     MainWindow.show()
     sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    # Headless batch build, never imports PyQt or matplotlib
+    if len(sys.argv) > 1 and sys.argv[1] == 'build':
+        from BatchBuild import main
+        sys.exit(main(sys.argv[2:]))
+
+    run_gui()
@@ -0,0 +1,174 @@
+import argparse
+import os
+import sys
+
+from FileOps import StageOpen
+from BladeBuild import RotorParts, StatorParts, AssembleParts
+from StlUtils import writeStl, decimateMesh, repairMesh, edgeReport
+from MeshUnion import UnionParts
+from CompressorBuild import BuildCompressor, BuildStageObjects
+import MeshCache
+
+
+################################
+##Function: BuildFile
+#Builds and exports the rotor and stator of every
+#stage in a saved compressor file, without the GUI.
+#Meshes already in the disk cache are not rebuilt,
+#without a cache the parts are streamed to the file
+#a blade at a time. Meshes can be welded and cleaned
+#(repaired) or have their blades joined to the hub
+#and walls (union) first, and a reduced
+#<file>_preview.stl can be written next to every file
+##Inputs:
+#file: path to compressor .json file (str)
+#outDir: directory the .stl files are written to (str)
+#endWall: build the rotor end walls (bool)
+#objects: objects to build, 'R' and/or 'S' (str)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+#normals: write face normals, zero otherwise (bool)
+#compressor: also export all stages stacked as one compressor (bool)
+#jobs: worker processes, objects are built one after the other
+#      when 1 or None (int)
+#previewFaces: triangle budget of the previews (int)
+#previewError: largest vertex move of the previews (float)
+#repair: weld every part and delete duplicate faces (bool)
+#union: join the blades to the hub and walls, one closed
+#       shell per rotor and stator (bool)
+#report: called with the path and the repairMesh (or
+#        union) edge report of every repaired file (function)
+##Returns:
+#written: paths of the exported .stl files (list)
+################################
+def BuildFile(file, outDir, endWall = False, objects = 'RS', nspan = 1, npts = 24, tolerance = None, normals = True, compressor = False, jobs = None, previewFaces = None, previewError = None, repair = False, union = False, report = None):
+    os.makedirs(outDir, exist_ok = True)
+    name = os.path.splitext(os.path.basename(file))[0]
+    written = []
+    preview = previewFaces is not None or previewError is not None
+    
+    def write(path, parts):
+        if union:
+            obj = UnionParts(parts[0])
+            parts = [obj]
+            if report:
+                report(path, {'': edgeReport(obj.faces)})
+                
+        elif repair:
+            obj, edges = repairMesh(parts[0])
+            parts = [obj]
+            if report:
+                report(path, edges)
+                
+        writeStl(path, parts, name = os.path.basename(path), normals = normals)
+        written.append(path)
+        
+        if preview:
+            previewPath = os.path.splitext(path)[0] + '_preview.stl'
+            writeStl(previewPath, [decimateMesh(parts[0], previewFaces, previewError)], name = os.path.basename(previewPath), normals = normals)
+            written.append(previewPath)
+    
+    def export(i, stage, parts):
+        #The Preview, Repair and Union Need the Whole Object, Not a Stream of Parts
+        if (preview or repair or union) and not isinstance(parts, list):
+            parts = [AssembleParts(parts)]
+        write(os.path.join(outDir, '{}_stage{}_{}.stl'.format(name, i, 'rotor' if stage == 'R' else 'stator')), parts)
+    
+    #Every Object on Its Own Worker Process
+    if jobs and jobs > 1:
+        for i, stage, obj in BuildStageObjects(StageOpen(file), endWall, objects, nspan, npts, tolerance, jobs, processes = True):
+            export(i, stage, [obj])
+            
+    else:
+        for i, (common, rotor, stator) in enumerate(StageOpen(file), 1):
+            if 'R' in objects:
+                if MeshCache.diskCache:
+                    parts = [MeshCache.CachedBuildRotor(common, rotor, endWall, nspan = nspan, npts = npts, tolerance = tolerance)]
+                else:
+                    parts = RotorParts(common, rotor, endWall, nspan = nspan, npts = npts, tolerance = tolerance, rowSize = 1)
+                export(i, 'R', parts)
+                
+            if 'S' in objects:
+                if MeshCache.diskCache:
+                    parts = [MeshCache.CachedBuildStator(common, stator, nspan = nspan, npts = npts, tolerance = tolerance)]
+                else:
+                    parts = StatorParts(common, stator, nspan = nspan, npts = npts, tolerance = tolerance, rowSize = 1)
+                export(i, 'S', parts)
+            
+    #Whole Machine in One File, Stages Built Above Come From the Cache
+    if compressor:
+        obj = BuildCompressor(StageOpen(file), endWall, objects, nspan = nspan, npts = npts, tolerance = tolerance,
+                                   jobs = jobs, processes = bool(jobs and jobs > 1))
+        write(os.path.join(outDir, '{}_compressor.stl'.format(name)), [obj])
+            
+    return written
+    
+    
+################################
+##Function: main
+#Command line entry point, comppy.py build ...
+##Inputs:
+#argv: command line arguments after 'build' (list)
+##Returns:
+#exit status (int)
+################################
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'comppy.py build',
+                                          description = 'Build and export every stage of saved compressor files as STL, without the GUI.')
+    parser.add_argument('designs', nargs = '+', help = 'compressor .json files saved by CompPy')
+    parser.add_argument('--out', default = '.', help = 'output directory (default: current directory)')
+    parser.add_argument('--end-wall', action = 'store_true', help = 'add the support wall around every rotor')
+    parser.add_argument('--only', choices = ['rotor', 'stator'], help = 'only build rotors or only stators')
+    parser.add_argument('--nspan', type = int, default = 1, help = 'blade span divisions (default: 1)')
+    parser.add_argument('--npts', type = int, default = 24, help = 'blade chordwise points per surface (default: 24)')
+    parser.add_argument('--tolerance', type = float, default = None, help = 'adaptive blade span refinement tolerance')
+    parser.add_argument('-j', '--jobs', type = int, default = None, help = 'build on this many worker processes (default: one after the other)')
+    parser.add_argument('--compressor', action = 'store_true', help = 'also write all stages stacked along the axis as <design>_compressor.stl')
+    parser.add_argument('--preview-faces', type = int, default = None, help = 'also write a <file>_preview.stl reduced to at most this many triangles')
+    parser.add_argument('--preview-error', type = float, default = None, help = 'also write a <file>_preview.stl, no vertex moved more than this (mm)')
+    parser.add_argument('--repair', action = 'store_true', help = 'weld every part into one shell, delete duplicate faces and report open or non-manifold edges')
+    parser.add_argument('--union', action = 'store_true', help = 'join the blades to the hub and end wall (or mount can and duct) into one closed shell')
+    parser.add_argument('--no-normals', action = 'store_true', help = 'write zero normals, for tools that recompute them anyway')
+    parser.add_argument('--cache-dir', default = None, help = 'mesh cache directory (default: $COMPPY_CACHE_DIR or ~/.cache/CompPy)')
+    parser.add_argument('--no-cache', action = 'store_true', help = 'always rebuild, do not read or write the mesh cache')
+    parser.add_argument('-q', '--quiet', action = 'store_true', help = 'do not list the written files')
+    args = parser.parse_args(argv)
+    
+    objects = {'rotor': 'R', 'stator': 'S', None: 'RS'}[args.only]
+    
+    if args.no_cache:
+        MeshCache.SetCacheDir(None)
+    elif args.cache_dir:
+        MeshCache.SetCacheDir(args.cache_dir)
+    status = 0
+    
+    #Edges Left Open or Shared by More Than Two Faces, per Part
+    def report(path, edges):
+        for part, found in edges.items():
+            if len(found['boundary']) or len(found['nonManifold']):
+                print('{}: {} has {} open and {} non-manifold edges'.format(path, part or 'mesh', len(found['boundary']), len(found['nonManifold'])),
+                      file = sys.stderr)
+    
+    for design in args.designs:
+        try:
+            written = BuildFile(design, args.out, args.end_wall, objects,
+                                    nspan = args.nspan, npts = args.npts, tolerance = args.tolerance,
+                                    normals = not args.no_normals, compressor = args.compressor,
+                                    jobs = args.jobs, previewFaces = args.preview_faces, previewError = args.preview_error,
+                                    repair = args.repair, union = args.union, report = None if args.quiet else report)
+            
+        except Exception as e:
+            print('{}: {}'.format(design, e), file = sys.stderr)
+            status = 1
+            continue
+            
+        if not args.quiet:
+            for path in written:
+                print(path)
+                
+    return status
+    
+    
+if __name__ == '__main__':
+    sys.exit(main())
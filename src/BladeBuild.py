@@ -0,0 +1,328 @@
+from BladeCalc import *
+from StlUtils import *
+import numpy as np
+
+
+################################
+##Function: BuildCancelled
+#Raised from a progress callback to abandon a build
+################################
+class BuildCancelled(Exception):
+    pass
+    
+    
+################################
+##Function: NoProgress
+#Default progress callback, does nothing
+##Inputs:
+#fraction: fraction of the build done (float)
+##Returns:
+#none
+################################
+def NoProgress(fraction):
+    pass
+
+
+################################
+##Function: RowChunks
+#Splits the blade angles of a row into chunks
+##Inputs:
+#angles: rotation of each blade (array)
+#rowSize: blades per chunk, None for one chunk (int)
+##Returns:
+#chunk: angles of the next blades (array)
+################################
+def RowChunks(angles, rowSize = None):
+    if not rowSize:
+        yield angles
+        return
+    for start in range(0, angles.size, rowSize):
+        yield angles[start:start + rowSize]
+        
+        
+#Blades BuildRotor and BuildStator Replicate per Pass, Cancel Is Checked Between Passes
+rowPass = 4
+
+
+################################
+##Function: AssembleParts
+#Joins generated (label, part) pairs into one mesh
+##Inputs:
+#parts: (label, part) pairs (iterable)
+##Returns:
+#obj: combined object (indexed mesh)
+################################
+def AssembleParts(parts):
+    assembler = MeshAssembler()
+    for label, part in parts:
+        assembler.add(part, label)
+        
+    return assembler.build()
+
+
+################################
+##Function: RotorParts
+#Generates the rotor parts (hub, blades and optional
+#end wall) one after the other from the stage and
+#rotor parameters, no GUI involved
+##Inputs:
+#common: common properties (dict)
+#rotor: rotor properties (dict)
+#endWall: if endwall was checked (bool)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+#progress: called with the fraction done between build steps, blade
+#          span passes and blade rows, may raise BuildCancelled to stop (function)
+#rowSize: blades per generated part, None for the whole row (int)
+#res: sides of the hub and end wall cylinders (int)
+#bladeCount: only build the first blades, None for all (int)
+##Returns:
+#(label, part): each part of the rotor (str, indexed mesh)
+################################
+def RotorParts(common, rotor, endWall = False, nspan = 1, npts = 24, tolerance = None, progress = NoProgress, rowSize = None, res = 25, bladeCount = None):
+    #Change Strings to Floats in Dicts
+    commonVars = {k : float(v) for k, v in common.items()}
+    rotorVars = {k : float(v) for k, v in rotor.items()}
+    
+    #Create Rotor Object
+    stageProps = StageCalc(r = commonVars['Reaction (R)'], 
+                                phi = commonVars['Flow (Phi)'], 
+                                psi = commonVars['Loading (Psi)'], 
+                                rpm = commonVars['RPM'], 
+                                rootRadius = rotorVars['Hub Diameter'] / 2, 
+                                tipRadius = rotorVars['Rotor Diameter'] / 2)
+    #Rotor Root and Tip Properties
+    avgBetaRoot, rootCamber = BladeCamber(stageProps.rootProps, rotorVars['Root Chord (Rotor)'])
+    avgBetaTip, tipCamber = BladeCamber(stageProps.tipProps, rotorVars['Tip Chord (Rotor)'])
+    progress(0.1)
+    
+    #Draw Hub Cylinder
+    rotorHub = buildCylinder(dia = rotorVars['Hub Diameter'],
+                                    height = rotorVars['Hub Length'],
+                                    res = res)
+    #Hub Bounds
+    hminx, hmaxx, hminy, hmaxy, hminz, hmaxz = FindBounds(rotorHub)
+    #Rotate the Hub About the Y Axis 90 Deg
+    rotorHub.rotate([0, 1, 0], np.deg2rad(90))
+    #Move it Back to Center
+    rotorHub.translate([(hmaxz - hminz) / 2, 0, 0])
+    
+    rootAngle = np.rad2deg(avgBetaRoot)
+    
+    #Two different blade heights
+    #Relative is for posistioning, to make sure some of the blade is within the rotor hub
+    #It's the blade height that's exposed
+    relativeBladeHeight = (rotorVars['Rotor Diameter'] / 2 - rotorVars['Hub Diameter'] / 2)
+    #Actual height is the actual length of the blade that is created, not all is exposed
+    actualBladeHeight = (rotorVars['Rotor Diameter'] / 1.7 - rotorVars['Hub Diameter'] / 2) / np.cos(np.deg2rad(rootAngle))
+    
+    #Generate Blade, Every Blade is Identical Until Its Final Rotation
+    blade = buildBlade(camberRoot = rootCamber, 
+                            camberTip = tipCamber, 
+                            camberPos = 0.35, #Can Be Changed
+                            thickness = rotorVars['Blade Thickness (Rotor)'] / 100, 
+                            bladeHeight = actualBladeHeight, 
+                            twistAngle = np.rad2deg(avgBetaRoot - avgBetaTip), 
+                            rootChord = rotorVars['Root Chord (Rotor)'], 
+                            tipChord = rotorVars['Tip Chord (Rotor)'], 
+                            cot = [rotorVars['X Twist (Rotor)'], rotorVars['Y Twist (Rotor)']],
+                            nspan = nspan,
+                            npts = npts,
+                            tolerance = tolerance,
+                            progress = lambda fraction: progress(0.1 + 0.3 * fraction))
+    progress(0.4)
+
+    #Rotate and Move the Blade
+    blade.rotate([0, 0, 1], np.deg2rad(-rootAngle))
+    blade.translate([0, (((hmaxx - hminx)) / 2) - (relativeBladeHeight / 2), (((hmaxy - hminy)) / 2) - (relativeBladeHeight / 2)])
+    
+    yield 'hub', rotorHub
+    
+    #Rotate Copies Into Place, rowSize Blades per Pass, Progress (and Cancel) After Each
+    angles = np.deg2rad(rootAngle + (360 / 10) * np.arange(int(rotorVars['Num of Blade (Rotor)'])))[:bladeCount]
+    done = 0
+    for angleRow in RowChunks(angles, rowSize):
+        yield 'blades', buildBladeRow(blade, angleRow, [1, 0, 0])
+        done += angleRow.size
+        progress(0.4 + 0.4 * done / angles.size)
+    progress(0.8)
+    
+    #If End Wall Was Checked
+    if endWall:
+        #Create EndWall Mesh
+        wall = buildDuct(innerDia = rotorVars['Rotor Diameter'], thickness = 2, height = rotorVars['Hub Length'], res = res)
+        wall.rotate([0, 1, 0], np.deg2rad(90))
+        wall.translate([(hmaxz - hminz) / 2, 0, 0])
+        yield 'endWall', wall
+        
+        
+################################
+##Function: BuildRotor
+#Builds the whole rotor mesh (hub, blades and
+#optional end wall), no GUI involved
+##Inputs:
+#same as RotorParts
+##Returns:
+#rotorHub: completed rotor (indexed mesh)
+################################
+def BuildRotor(common, rotor, endWall = False, nspan = 1, npts = 24, tolerance = None, progress = NoProgress, res = 25, bladeCount = None):
+    #Create a Combined (Indexed) Mesh of All Objects
+    rotorHub = AssembleParts(RotorParts(common, rotor, endWall, nspan, npts, tolerance, progress, rowPass, res, bladeCount))
+    progress(1.0)
+    return rotorHub
+    
+    
+################################
+##Function: StatorParts
+#Generates the stator parts (mount can, blades and
+#duct) one after the other from the stage and stator
+#parameters, no GUI involved
+##Inputs:
+#common: common properties (dict)
+#stator: stator properties (dict)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+#progress: called with the fraction done between build steps, blade
+#          span passes and blade rows, may raise BuildCancelled to stop (function)
+#rowSize: blades per generated part, None for the whole row (int)
+#res: sides of the mount can and duct cylinders (int)
+#bladeCount: only build the first blades, None for all (int)
+##Returns:
+#(label, part): each part of the stator (str, indexed mesh)
+################################
+def StatorParts(common, stator, nspan = 1, npts = 24, tolerance = None, progress = NoProgress, rowSize = None, res = 25, bladeCount = None):
+    #Change Strings to Floats in Dicts
+    commonVars = {k : float(v) for k, v in common.items()}
+    statorVars = {k : float(v) for k, v in stator.items()}
+    
+    #Create Stator Object
+    stageProps = StageCalc(r = commonVars['Reaction (R)'], 
+                                phi = commonVars['Flow (Phi)'], 
+                                psi = commonVars['Loading (Psi)'], 
+                                rpm = commonVars['RPM'], 
+                                rootRadius = statorVars['Mount Can Dia'] / 2, 
+                                tipRadius = statorVars['Duct ID'] / 2)
+    #Stator Root and Tip Properties
+    avgBetaRoot, rootCamber = BladeCamber(stageProps.rootProps, statorVars['Root Chord (Stator)'])
+    avgBetaTip, tipCamber = BladeCamber(stageProps.tipProps, statorVars['Tip Chord (Stator)'])
+    progress(0.1)
+        
+    #Draw Hub Cylinder
+    mountCan = buildCylinder(dia = statorVars['Mount Can Dia'],
+                                    height = statorVars['Mount Can Length'],
+                                    res = res)
+    
+    #Hub Bounds
+    hminx, hmaxx, hminy, hmaxy, hminz, hmaxz = FindBounds(mountCan)
+    #Rotate the Hub About the Y Axis 90 Deg
+    mountCan.rotate([0, 1, 0], np.deg2rad(90))
+    #Move Can to Specified Location
+    mountCan.translate([(hmaxz - hminz) / 2  + statorVars['Mount Can Loc'], 0, 0])
+    
+    #Draw and Transform the Duct
+    duct = buildDuct(innerDia = statorVars['Duct ID'],
+                            thickness = statorVars['Duct Thickness'],
+                            height = statorVars['Duct Length'],
+                            res = res)
+                                    
+    duct.rotate([0, 1, 0], np.deg2rad(90))
+    #Move to Center
+    duct.translate([((hmaxz - hminz) / 2), 0, 0])
+    
+    rootAngle = np.rad2deg(avgBetaRoot)
+    
+    #Two different blade heights
+    #Relative is for posistioning, to make sure some of the blade is within the rotor hub
+    #It's the blade height that's exposed
+    relativeBladeHeight = (statorVars['Duct ID'] / 2 - statorVars['Mount Can Dia'] / 2)
+    #Actual height is the actual length of the blade that is created, not all is exposed
+    actualBladeHeight = (statorVars['Duct ID'] / 1.7 - statorVars['Mount Can Dia'] / 2) / np.cos(np.deg2rad(rootAngle))
+    
+    #Generate Blade, Every Blade is Identical Until Its Final Rotation
+    blade = buildBlade(camberRoot = rootCamber, 
+                            camberTip = tipCamber, 
+                            camberPos = .35, #Can Be Changed
+                            thickness = statorVars['Blade Thickness (Stator)'] / 100, 
+                            bladeHeight = actualBladeHeight, 
+                            twistAngle = np.rad2deg(avgBetaRoot - avgBetaTip), 
+                            rootChord = statorVars['Root Chord (Stator)'], 
+                            tipChord = statorVars['Tip Chord (Stator)'], 
+                            cot = [statorVars['X Twist (Stator)'], statorVars['Y Twist (Stator)']],
+                            nspan = nspan,
+                            npts = npts,
+                            tolerance = tolerance,
+                            progress = lambda fraction: progress(0.1 + 0.3 * fraction))
+    progress(0.4)
+    
+    #Rotate and Move the Blade
+    blade.rotate([0, 0, 1], np.deg2rad(-rootAngle))
+    blade.translate([0, (((hmaxx - hminx)) / 2) - (relativeBladeHeight / 2), (((hmaxy - hminy)) / 2) - (relativeBladeHeight / 2)])
+    
+    #Move to Specified Location (Along the Row Axis, So Before Replicating)
+    blade.translate([statorVars['Mount Can Loc'], 0, 0])
+    
+    yield 'mountCan', mountCan
+    
+    #Rotate Copies Into Place, rowSize Blades per Pass, Progress (and Cancel) After Each
+    angles = np.deg2rad(rootAngle + (360 / 10) * np.arange(int(statorVars['Num of Blade (Stator)'])))[:bladeCount]
+    done = 0
+    for angleRow in RowChunks(angles, rowSize):
+        yield 'blades', buildBladeRow(blade, angleRow, [1, 0, 0])
+        done += angleRow.size
+        progress(0.4 + 0.4 * done / angles.size)
+    progress(0.8)
+
+    yield 'duct', duct
+    
+    
+################################
+##Function: BuildStator
+#Builds the whole stator mesh (mount can, blades
+#and duct), no GUI involved
+##Inputs:
+#same as StatorParts
+##Returns:
+#mountCan: completed stator (indexed mesh)
+################################
+def BuildStator(common, stator, nspan = 1, npts = 24, tolerance = None, progress = NoProgress, res = 25, bladeCount = None):
+    #Join Mount Can, Blades and Duct
+    mountCan = AssembleParts(StatorParts(common, stator, nspan, npts, tolerance, progress, rowPass, res, bladeCount))
+    progress(1.0)
+    return mountCan
+    
+    
+#Level of Detail of the On Screen Preview, Whatever the Export Resolution
+previewDetail = {'nspan' : 1, 'npts' : 10, 'res' : 16}
+
+
+################################
+##Function: PreviewRotor
+#Coarse rotor for the 3D view, export keeps using
+#the full resolution BuildRotor mesh
+##Inputs:
+#common: common properties (dict)
+#rotor: rotor properties (dict)
+#endWall: if endwall was checked (bool)
+#representative: only one blade instead of all (bool)
+##Returns:
+#rotorHub: preview rotor (indexed mesh)
+################################
+def PreviewRotor(common, rotor, endWall = False, representative = False):
+    return BuildRotor(common, rotor, endWall, bladeCount = 1 if representative else None, **previewDetail)
+    
+    
+################################
+##Function: PreviewStator
+#Coarse stator for the 3D view, export keeps using
+#the full resolution BuildStator mesh
+##Inputs:
+#common: common properties (dict)
+#stator: stator properties (dict)
+#representative: only one blade instead of all (bool)
+##Returns:
+#mountCan: preview stator (indexed mesh)
+################################
+def PreviewStator(common, stator, representative = False):
+    return BuildStator(common, stator, bladeCount = 1 if representative else None, **previewDetail)
@@ -1,9 +1,12 @@
 from math import *
+import numpy as np
 import stl
 
 
 ################################
-##Function: NACA4Blade
+##Function: NACA4Sections
+#Vectorized NACA4 kernel, computes every span
+#station of the blade in one pass
 ##Inputs:
 #camberRoot: camber of root (float)
 #camberTip: camber of tip (float)
@@ -14,175 +17,406 @@ import stl
 #rootChord: chord at root (float)
 #tipChord: chord at tip (float)
 #cot: center of twist coordinates (list)
+#nspan: number of span divisions (int)
+#npts: number of chordwise points per surface (int)
+#span: span fractions of each station, overrides nspan (array)
 ##Returns:
-#(faces, verts): list of faces and list of verts
+#(upper, lower): twisted surface vertices, (nspan + 1, npts, 3) arrays
 ################################
-def NACA4Blade(camberRoot, camberTip, camberPos, thickness,\
-                        bladeHeight, twistAngle, rootChord, tipChord, cot):
+def NACA4Sections(camberRoot, camberTip, camberPos, thickness,\
+                        bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                        nspan = 1, npts = 24, span = None):
     
     twist = radians(twistAngle) / bladeHeight
     
-    cot = [x / 100 for x in cot]
+    cot = np.asarray(cot, dtype = float) / 100
     
-    nspan = 1
-    npts = 24
-    dspan = bladeHeight / nspan
-
-    xUpTwist= [0]*npts
-    yUpTwist= [0]*npts
-    xLowTwist= [0]*npts
-    yLowTwist= [0]*npts
-    faces = []
-    verts = []
-    origin = (0, 0, 0)
-    
-    #Generate Vertices for Unmodified Airfoil Shape
-    for j in range(0, nspan + 1):
-        x = []
-        yThickness = []
-        yCamber =[]
-        xUpper = []
-        xLower = []
-        yUpper =[]
-        yLower =[]
-        
-        m = (1 - j / nspan) * camberRoot + j / nspan * camberTip   
-
-        
-        #NACA4Profile
-        for i in range(0, npts + 1):
-            x.append(1 - cos(i * (pi / 2) / npts))
-            yThickness.append(thickness / 0.2 * (0.2969 * pow(x[i], 0.5) - 0.126 * x[i] - 0.3516 * pow(x[i], 2) + 0.2843 * pow(x[i], 3) - 0.1015 * pow(x[i], 4)))
-            
-            if (x[i] < camberPos):
-                yCamber.append(m / pow(camberPos, 2) * (2 * camberPos * x[i] - pow(x[i], 2)))
-                dycdx = 2 * m / pow(camberPos, 2) * (camberPos - x[i])
-                
-            else:
-                yCamber.append(m / pow(1 - camberPos, 2) * (1 - 2 * camberPos + 2 * camberPos * x[i] - pow(x[i], 2)))
-                dycdx = 2 * m / pow(1 - camberPos , 2) * (camberPos - x[i])
-                
-            x[i] -= cot[0]
-            yCamber[i] -= cot[1]
+    #Span Stations (Column Vectors so They Broadcast Against Chordwise Points)
+    if span is None:
+        dspan = bladeHeight / nspan
+        j = np.arange(nspan + 1)[:, None]
+        span = j / nspan
+        z = j * dspan
         
-            #Upper and Lower Vertices
-            xUpper.append(x[i] - yThickness[i] * (sin(atan(dycdx))))
-            yUpper.append(yCamber[i] + yThickness[i] * (cos(atan(dycdx))))
-            xLower.append(x[i] + yThickness[i] * (sin(atan(dycdx))))
-            yLower.append(yCamber[i] - yThickness[i] * (cos(atan(dycdx))))
+    else:
+        span = np.asarray(span, dtype = float)[:, None]
+        nspan = span.shape[0] - 1
+        z = span * bladeHeight
         
-        #Generate Vertices Following Twist
-        angle = twist * j * dspan
-        chord = rootChord - j * dspan * (rootChord - tipChord) / bladeHeight
-        
-        for i in range(0, npts):
-            xUpTwist[i] = (xUpper[i] * cos(angle) - yUpper[i] * sin(angle)) * chord
-            yUpTwist[i] = (xUpper[i] * sin(angle) + yUpper[i] * cos(angle)) * chord
-            
-            verts.append([xUpTwist[i], yUpTwist[i], j * dspan])
-
-        for i in range(0, npts):
-
-            xLowTwist[i] = (xLower[i] * cos(angle) - yLower[i] * sin(angle)) * chord
-            yLowTwist[i] = (xLower[i] * sin(angle) + yLower[i] * cos(angle)) * chord
-            
-            
-            verts.append([xLowTwist[i], yLowTwist[i], j * dspan])
+    m = (1 - span) * camberRoot + span * camberTip
+    
+    #NACA4Profile (Cosine Spaced)
+    x = 1 - np.cos(np.arange(npts) * (pi / 2) / npts)
+    yThickness = thickness / 0.2 * (0.2969 * np.sqrt(x) - 0.126 * x - 0.3516 * x ** 2 + 0.2843 * x ** 3 - 0.1015 * x ** 4)
+    
+    fore = x < camberPos
+    yCamber = np.where(fore, m / camberPos ** 2 * (2 * camberPos * x - x ** 2),
+                            m / (1 - camberPos) ** 2 * (1 - 2 * camberPos + 2 * camberPos * x - x ** 2))
+    dycdx = np.where(fore, 2 * m / camberPos ** 2 * (camberPos - x),
+                          2 * m / (1 - camberPos) ** 2 * (camberPos - x))
+    
+    x = x - cot[0]
+    yCamber = yCamber - cot[1]
+    
+    #Upper and Lower Vertices
+    slope = np.arctan(dycdx)
+    xUpper = x - yThickness * np.sin(slope)
+    yUpper = yCamber + yThickness * np.cos(slope)
+    xLower = x + yThickness * np.sin(slope)
+    yLower = yCamber - yThickness * np.cos(slope)
+    
+    #Generate Vertices Following Twist
+    angle = twist * z
+    chord = rootChord - z * (rootChord - tipChord) / bladeHeight
+    cosA = np.cos(angle)
+    sinA = np.sin(angle)
+    zs = np.broadcast_to(z, (nspan + 1, npts))
+    
+    upper = np.stack(((xUpper * cosA - yUpper * sinA) * chord, (xUpper * sinA + yUpper * cosA) * chord, zs), axis = -1)
+    lower = np.stack(((xLower * cosA - yLower * sinA) * chord, (xLower * sinA + yLower * cosA) * chord, zs), axis = -1)
+    
+    return (upper, lower)
+    
+    
+################################
+##Function: NACA4Faces
+#Face connectivity for the stacked sections of
+#NACA4Sections (upper then lower surface per station)
+##Inputs:
+#nspan: number of span divisions (int)
+#npts: number of chordwise points per surface (int)
+##Returns:
+#faces: vertex indices (int array, (F, 3))
+################################
+def NACA4Faces(nspan, npts):
+    i = np.arange(npts - 1)
+    nPerStage = npts * 2
     
     #Bottom Prof
-    faces.append([0, 1, npts + 1])
-    for i in range(0, npts - 1):
-        faces.append([i, i + 1, npts + i + 1])    
-        faces.append([i, npts + i + 1, npts + i])    
-
+    bottom = np.stack((np.stack((i, i + 1, npts + i + 1), axis = 1),
+                            np.stack((i, npts + i + 1, npts + i), axis = 1)), axis = 1).reshape(-1, 3)
+    bottom = np.vstack(([0, 1, npts + 1], bottom))
+    
     #Sides
-    nPerStage = npts * 2
-    for j in range(0, nspan):
-        for i in range(0, npts - 1):
-            faces.append([nPerStage * j + i, nPerStage * (j + 1) + i, nPerStage * (j + 1) + i + 1])
-            faces.append([nPerStage * j + i, nPerStage * (j + 1) + i + 1, nPerStage * j + i + 1])
-            
-        for i in range(0, npts - 1):
-            faces.append([nPerStage * j + i + npts, nPerStage * (j + 1) + i + 1 + npts, nPerStage * (j + 1) + i + npts])
-            faces.append([nPerStage * j + i + npts, nPerStage * j + i + 1 + npts, nPerStage * (j + 1) + i + 1 + npts])
-        faces.append([nPerStage * j + npts - 1, nPerStage * (j + 1) + npts - 1, nPerStage * (j + 1) + npts * 2 - 1])
-        faces.append([nPerStage * j + npts - 1, nPerStage * (j + 1) + npts * 2 - 1, nPerStage * j +npts * 2 - 1])
-        
+    upper = np.stack((np.stack((i, nPerStage + i, nPerStage + i + 1), axis = 1),
+                           np.stack((i, nPerStage + i + 1, i + 1), axis = 1)), axis = 1).reshape(-1, 3)
+    lower = np.stack((np.stack((i + npts, nPerStage + i + 1 + npts, nPerStage + i + npts), axis = 1),
+                           np.stack((i + npts, i + 1 + npts, nPerStage + i + 1 + npts), axis = 1)), axis = 1).reshape(-1, 3)
+    trailing = np.array([[npts - 1, nPerStage + npts - 1, nPerStage + npts * 2 - 1],
+                              [npts - 1, nPerStage + npts * 2 - 1, npts * 2 - 1]])
+    sides = np.vstack((upper, lower, trailing))
+    sides = (sides[None, :, :] + nPerStage * np.arange(nspan)[:, None, None]).reshape(-1, 3)
+    
     #Top Prof
-    faces.append([nPerStage * nspan, nPerStage * nspan + 1, nPerStage * nspan + npts + 1])
-    for i in range(0, npts - 1):
-        faces.append([nPerStage * nspan + i, nPerStage * nspan + npts + i + 1, nPerStage * nspan + i + 1])    
-        faces.append([nPerStage * nspan + i, nPerStage * nspan + npts + i, nPerStage * nspan + npts + i + 1])  
+    top = np.stack((np.stack((i, npts + i + 1, i + 1), axis = 1),
+                        np.stack((i, npts + i, npts + i + 1), axis = 1)), axis = 1).reshape(-1, 3)
+    top = np.vstack(([0, 1, npts + 1], top)) + nPerStage * nspan
     
-    return (faces, verts)
+    return np.vstack((bottom, sides, top))
+    
+    
+################################
+##Function: NACA4Span
+#Picks the span stations of a blade, either evenly
+#spaced or adaptively refined until the straight
+#panels between stations stay within tolerance. When
+#that would take more than maxSpan divisions, the
+#divisions left are spent on the worst intervals
+##Inputs:
+#camberRoot ... cot: blade shape, see NACA4Sections
+#nspan: number of (minimum) span divisions (int)
+#npts: number of chordwise points per surface (int)
+#tolerance: allowed chordal deviation, None for even spacing (float)
+#maxSpan: upper limit of span divisions when refining (int)
+##Returns:
+#span: span fractions of each station from 0 to 1 (array)
+################################
+def NACA4Span(camberRoot, camberTip, camberPos, thickness,\
+                    bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                    nspan = 1, npts = 24, tolerance = None, maxSpan = 64):
+    
+    span = np.linspace(0, 1, nspan + 1)
+    
+    if tolerance is None:
+        return span
+    
+    lo = span[:-1]
+    hi = span[1:]
+    
+    while lo.size:
+        #Evaluate Both Ends and the Middle of Every Open Interval at Once
+        mid = (lo + hi) / 2
+        upper, lower = NACA4Sections(camberRoot, camberTip, camberPos, thickness,
+                                                    bladeHeight, twistAngle, rootChord, tipChord, cot,
+                                                    npts = npts, span = np.concatenate((lo, mid, hi)))
+        sections = np.concatenate((upper, lower), axis = 1).reshape(3, lo.size, -1, 3)
+        
+        #Distance From the True Mid Section to the Straight Panel Between the Ends
+        deviation = np.linalg.norm(sections[1] - (sections[0] + sections[2]) / 2, axis = -1).max(axis = 1)
+        split = deviation > tolerance
+        room = max(maxSpan - (span.size - 1), 0)
+        
+        #Over Budget, What Is Left Goes to the Furthest Out Intervals
+        if split.sum() > room:
+            split = np.zeros_like(split)
+            split[np.argsort(-deviation)[:room]] = True
+        
+        if not split.any():
+            break
+        
+        span = np.union1d(span, mid[split])
+        lo = np.concatenate((lo[split], mid[split]))
+        hi = np.concatenate((mid[split], hi[split]))
+        
+    return span
+    
+    
+################################
+##Function: NACA4Blade
+##Inputs:
+#camberRoot: camber of root (float)
+#camberTip: camber of tip (float)
+#camberPos: posistion of maximum camber (float)
+#thickness: maximum thickness (float)
+#bladeHeight: blade height (float)
+#twistAngle: blade twist (float)
+#rootChord: chord at root (float)
+#tipChord: chord at tip (float)
+#cot: center of twist coordinates (list)
+#nspan: number of span divisions (int)
+#npts: number of chordwise points per surface (int)
+#tolerance: adaptive span refinement tolerance, see NACA4Span (float)
+##Returns:
+#(faces, verts): list of faces and list of verts
+################################
+def NACA4Blade(camberRoot, camberTip, camberPos, thickness,\
+                        bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                        nspan = 1, npts = 24, tolerance = None):
+    
+    span = None
+    if tolerance is not None:
+        span = NACA4Span(camberRoot, camberTip, camberPos, thickness,
+                                  bladeHeight, twistAngle, rootChord, tipChord, cot,
+                                  nspan = nspan, npts = npts, tolerance = tolerance)
+    
+    upper, lower = NACA4Sections(camberRoot, camberTip, camberPos, thickness,
+                                                bladeHeight, twistAngle, rootChord, tipChord, cot,
+                                                nspan = nspan, npts = npts, span = span)
+    
+    #Each Station Holds Its Upper Surface Followed by Its Lower Surface
+    verts = np.stack((upper, lower), axis = 1).reshape(-1, 3)
+    faces = NACA4Faces(upper.shape[0] - 1, npts)
+    
+    return (faces.tolist(), verts.tolist())
+    
+    
+################################
+##Function: _meshPoints
+#Every vertex of an object, shared vertices of an
+#indexed mesh are only visited once
+##Inputs:
+#obj: mesh, indexed mesh or (F, 3, 3) array
+##Returns:
+#points: (N, 3) array
+################################
+def _meshPoints(obj):
+    if hasattr(obj, 'vertices'):
+        return obj.vertices
+    
+    return np.asarray(getattr(obj, 'vectors', obj)).reshape(-1, 3)
     
     
 ################################
 ##Function: FindBounds
 #Calculates bounding box for given object
 ##Inputs:
-#obj: object to be bounded (mesh)
+#obj: object to be bounded (mesh or indexed mesh)
 ##Returns:
 #minx, maxx, miny, maxy, minz, maxz: (floats)
 ################################
 def FindBounds(obj):
-    minx = maxx = miny = maxy = minz = maxz = None
-    for p in obj.points:
-        if minx is None:
-            minx = p[stl.Dimension.X]
-            maxx = p[stl.Dimension.X]
-            miny = p[stl.Dimension.Y]
-            maxy = p[stl.Dimension.Y]
-            minz = p[stl.Dimension.Z]
-            maxz = p[stl.Dimension.Z]
-            
-        else:
-            maxx = max(p[stl.Dimension.X], maxx)
-            minx = min(p[stl.Dimension.X], minx)
-            maxy = max(p[stl.Dimension.Y], maxy)
-            miny = min(p[stl.Dimension.Y], miny)
-            maxz = max(p[stl.Dimension.Z], maxz)
-            minz = min(p[stl.Dimension.Z], minz)
-            
+    points = _meshPoints(obj)
+    minx, miny, minz = points.min(axis = 0)
+    maxx, maxy, maxz = points.max(axis = 0)
+    
     return minx, maxx, miny, maxy, minz, maxz
-
+    
+    
+################################
+##Function: FindBoundsMany
+#Calculates bounding boxes for several objects
+##Inputs:
+#objs: objects to be bounded (list of meshes, indexed meshes or (F, 3, 3) arrays)
+##Returns:
+#bounds: one minx, maxx, miny, maxy, minz, maxz row per object (array, (N, 6))
+################################
+def FindBoundsMany(objs):
+    bounds = np.empty((len(objs), 6))
+    
+    for i, obj in enumerate(objs):
+        points = _meshPoints(obj)
+        bounds[i, 0::2] = points.min(axis = 0)
+        bounds[i, 1::2] = points.max(axis = 0)
+        
+    return bounds
+    
+    
+################################
+##Function: FindRangeBounds
+#Calculates bounding boxes of labelled face ranges
+#of one combined object (see MeshAssembler.ranges)
+##Inputs:
+#obj: combined object (mesh or indexed mesh)
+#ranges: (label, start face, stop face) entries (list)
+##Returns:
+#bounds: label to (minx, maxx, miny, maxy, minz, maxz) (dict)
+################################
+def FindRangeBounds(obj, ranges):
+    ranges = [(label, start, stop) for label, start, stop in ranges if stop > start]
+    if not ranges:
+        return {}
+    
+    #Per Face Extremes (Plus a Padding Row so Stop Indices Stay Valid)
+    vectors = obj.vectors
+    faceMin = vectors.min(axis = 1)
+    faceMax = vectors.max(axis = 1)
+    faceMin = np.vstack((faceMin, faceMin[-1:]))
+    faceMax = np.vstack((faceMax, faceMax[-1:]))
+    
+    #One Reduction per (Start, Stop) Pair, Even Entries Hold the Ranges
+    edges = np.array([[start, stop] for label, start, stop in ranges]).ravel()
+    mins = np.minimum.reduceat(faceMin, edges)[0::2]
+    maxs = np.maximum.reduceat(faceMax, edges)[0::2]
+    
+    bounds = {}
+    for (label, start, stop), low, high in zip(ranges, mins, maxs):
+        bounds[label] = tuple(np.stack((low, high), axis = -1).ravel())
+        
+    return bounds
+    
     
 ################################
 ##Function: StageProps
-#Holds stage angles
+#Holds stage angles, immutable with per instance
+#(slotted) storage, use replace for a changed copy
 ##Inputs:
-#None
+#beta1 .. psi: values of the fields below (float)
 ##Returns:
 #None
 ################################
 class StageProps():
-    beta1 = 0
-    beta2 = 0
-    alpha1 = 0
-    alpha2 = 0
-    cx = 0
-    rpm = 0
-    radius = 0
-    camber = 0
-    r = 0 
-    phi = 0
-    psi = 0
+    __slots__ = ('beta1', 'beta2', 'alpha1', 'alpha2', 'cx', 'rpm', 'radius', 'camber', 'r', 'phi', 'psi')
+    
+    def __init__(self, beta1 = 0, beta2 = 0, alpha1 = 0, alpha2 = 0, cx = 0, rpm = 0, radius = 0, camber = 0, r = 0, phi = 0, psi = 0):
+        values = (beta1, beta2, alpha1, alpha2, cx, rpm, radius, camber, r, phi, psi)
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+            
+    def __setattr__(self, name, value):
+        raise AttributeError("StageProps is immutable, use replace()")
+        
+    def __delattr__(self, name):
+        raise AttributeError("StageProps is immutable")
+        
+    def __reduce__(self):
+        return (StageProps, self.values())
+        
+    def __eq__(self, other):
+        return type(other) is StageProps and self.values() == other.values()
+        
+    def __hash__(self):
+        return hash(self.values())
+        
+    def __repr__(self):
+        return "StageProps(" + ", ".join("{}={!r}".format(name, getattr(self, name)) for name in self.__slots__) + ")"
+        
+    ################################
+    ##Function: values
+    #Field values in __slots__ order
+    ##Inputs:
+    #self: StageProps
+    ##Returns:
+    #values: field values (tuple)
+    ################################
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+        
+    ################################
+    ##Function: replace
+    #Copy with some fields changed
+    ##Inputs:
+    #self: StageProps
+    #changes: new field values (kwargs)
+    ##Returns:
+    #props: changed copy (StageProps)
+    ################################
+    def replace(self, **changes):
+        fields = dict(zip(self.__slots__, self.values()))
+        fields.update(changes)
+        return StageProps(**fields)
+        
+    ################################
+    ##Function: toArray
+    #Field values as one float array, in __slots__ order
+    ##Inputs:
+    #self: StageProps
+    ##Returns:
+    #array: field values (float array)
+    ################################
+    def toArray(self):
+        return np.array(self.values(), dtype = np.float64)
     
 
 ################################
 ##Function: LinearStageProp
-#Holds stage properties
+#Holds stage properties, immutable with per instance
+#(slotted) storage
 ##Inputs:
-#None
+#rootProps: root stage properties (StageProps)
+#meanProps: mean line stage properties (StageProps)
+#tipProps: tip stage properties (StageProps)
+#rootRadius: hub radius of stage (float)
+#tipRadius: radius of stage (float)
 ##Returns:
 #None
 ################################    
 class LinearStageProp():
-    rootProps = StageProps()
-    meanProps = StageProps()
-    tipProps = StageProps()
-    rootRadius = 0
-    tipRadius = 0
+    __slots__ = ('rootProps', 'meanProps', 'tipProps', 'rootRadius', 'tipRadius')
+    
+    def __init__(self, rootProps = None, meanProps = None, tipProps = None, rootRadius = 0, tipRadius = 0):
+        #Fresh Defaults for Every Instance, Nothing Shared
+        values = (rootProps or StageProps(), meanProps or StageProps(), tipProps or StageProps(), rootRadius, tipRadius)
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+            
+    def __setattr__(self, name, value):
+        raise AttributeError("LinearStageProp is immutable")
+        
+    def __delattr__(self, name):
+        raise AttributeError("LinearStageProp is immutable")
+        
+    def __reduce__(self):
+        return (LinearStageProp, tuple(getattr(self, name) for name in self.__slots__))
+        
+    def __eq__(self, other):
+        return type(other) is LinearStageProp and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+        
+    def __repr__(self):
+        return "LinearStageProp(" + ", ".join("{}={!r}".format(name, getattr(self, name)) for name in self.__slots__) + ")"
+        
+    ################################
+    ##Function: toArray
+    #Root, mean and tip fields as one float array
+    ##Inputs:
+    #self: LinearStageProp
+    ##Returns:
+    #array: rows root, mean, tip in StageProps.__slots__ order (3 x 11 float array)
+    ################################
+    def toArray(self):
+        return np.array([self.rootProps.values(), self.meanProps.values(), self.tipProps.values()], dtype = np.float64)
     
  
 ################################
@@ -199,25 +433,50 @@ class LinearStageProp():
 ################################ 
 def CalcStageBladeAngles(r, phi, psi, rpm, radius):
     u = rpm / 60 * 2 * pi * radius / 1000
-    stageProps = StageProps()
-    stageProps.rpm = rpm
-    stageProps.radius = radius
-    stageProps.beta2 = atan((r - psi / 2)  / phi)
-    stageProps.beta1 = atan(psi / phi + (2 * r - psi) / (2 * phi))
-    stageProps.cx = phi * u
-    w1 = stageProps.cx / cos(stageProps.beta1)
-    w2 = stageProps.cx / cos(stageProps.beta2)
-    c1 = u - w1 * sin(stageProps.beta1)
-    c2 = u - w2 * sin(stageProps.beta2)
-    stageProps.alpha1 = atan(c1 / stageProps.cx)
-    stageProps.alpha2 = atan(c2 / stageProps.cx)
+    beta2 = atan((r - psi / 2)  / phi)
+    beta1 = atan(psi / phi + (2 * r - psi) / (2 * phi))
+    cx = phi * u
+    w1 = cx / cos(beta1)
+    w2 = cx / cos(beta2)
+    c1 = u - w1 * sin(beta1)
+    c2 = u - w2 * sin(beta2)
     
-    return stageProps
+    return StageProps(beta1 = beta1, 
+                      beta2 = beta2, 
+                      alpha1 = atan(c1 / cx), 
+                      alpha2 = atan(c2 / cx), 
+                      cx = cx, 
+                      rpm = rpm, 
+                      radius = radius, 
+                      r = r, 
+                      phi = phi, 
+                      psi = psi)
+    
+
+################################
+##Function: BladeCamber
+#Mean blade angle and camber of a blade section
+#from its stage angles
+##Inputs:
+#props: stage properties of the section (object)
+#chord: chord of the section (float)
+##Returns:
+#avgBeta: mean of inlet and outlet angle (float)
+#camber: camber relative to chord (float)
+################################
+def BladeCamber(props, chord):
+    avgBeta = (props.beta2 + props.beta1) / 2
+    deltaBeta = props.beta2 - props.beta1
+    camber = (chord / 2 / sin(deltaBeta) - chord / 2 / tan(deltaBeta)) / chord
+    camber *= -1
+    
+    return avgBeta, camber
     
 
 ################################
 ##Function: StageCalc
-#Calculates propeties of whole stage
+#Calculates propeties of whole stage, the root and
+#tip flow are solved for the mean line axial velocity
 ##Inputs:
 #r: reaction (float)
 #phi: flow (float)
@@ -229,56 +488,91 @@ def CalcStageBladeAngles(r, phi, psi, rpm, radius):
 #stageProps: stage properties (object)
 ################################
 def StageCalc(r, phi, psi, rpm, rootRadius, tipRadius):
-    stageProps = LinearStageProp()
-    stageProps.rootRadius = rootRadius
-    stageProps.tipRadius = tipRadius
-    
+    if rootRadius <= 0 or tipRadius <= 0:
+        raise ValueError("Stage radii must be positive")
+        
     mlr = (rootRadius + tipRadius) / 2
-    stageProps.meanProps = CalcStageBladeAngles(r = r, phi = phi, psi = psi, rpm = rpm, radius = mlr)
     
-    stageProps.meanProps.r = r
-    stageProps.meanProps.psi = psi
-    stageProps.meanProps.phi = phi
+    #Constant Axial Velocity, cx = phi * u and u Grows Linearly With Radius,
+    #so the Flow at Any Radius is phi * mlr / radius
+    rootPhi = phi * mlr / rootRadius
+    tipPhi = phi * mlr / tipRadius
+    
+    stageProps = LinearStageProp(rootProps = CalcStageBladeAngles(r = r, phi = rootPhi, psi = psi, rpm = rpm, radius = rootRadius),
+                                 meanProps = CalcStageBladeAngles(r = r, phi = phi, psi = psi, rpm = rpm, radius = mlr),
+                                 tipProps = CalcStageBladeAngles(r = r, phi = tipPhi, psi = psi, rpm = rpm, radius = tipRadius),
+                                 rootRadius = rootRadius,
+                                 tipRadius = tipRadius)
     
-    stageProps.rootProps = CalcStageBladeAngles(r = r, phi = phi, psi = psi, rpm = rpm, radius = rootRadius)
+    return stageProps
     
-    lphi = 1e-6
-    hphi = 2 - 1e-6
-    rootPhi = phi
     
-    while (abs(stageProps.meanProps.cx - stageProps.rootProps.cx) > 1e-3):
-        if (stageProps.rootProps.cx < stageProps.meanProps.cx):
-            lphi = rootPhi
-            
-        else:
-            hphi = rootPhi
-            
-        rootPhi = (hphi + lphi) / 2
-        stageProps.rootProps = CalcStageBladeAngles(r = r, phi = rootPhi, psi = psi, rpm = rpm, radius = rootRadius)
-        
-    stageProps.meanProps.r = r
-    stageProps.meanProps.psi = psi
-    stageProps.meanProps.phi = rootPhi
     
-    stageProps.tipProps = CalcStageBladeAngles(r = r, phi = phi, psi = psi, rpm = rpm, radius = tipRadius)
+################################
+##Function: CalcStageBladeAnglesBatch
+#Vectorized CalcStageBladeAngles, every design
+#point in one pass (inputs broadcast together)
+##Inputs:
+#r: reaction (float array)
+#phi: flow (float array)
+#psi: loading (float array)
+#rpm: ...rpm (float array)
+#radius: radius of stage (float array)
+##Returns:
+#angles: beta1, beta2, alpha1, alpha2 and cx columns (dict of arrays)
+################################ 
+def CalcStageBladeAnglesBatch(r, phi, psi, rpm, radius):
+    r, phi, psi, rpm, radius = np.broadcast_arrays(*[np.asarray(x, dtype = np.float64) for x in (r, phi, psi, rpm, radius)])
+    u = rpm / 60 * 2 * pi * radius / 1000
+    beta2 = np.arctan((r - psi / 2) / phi)
+    beta1 = np.arctan(psi / phi + (2 * r - psi) / (2 * phi))
+    cx = phi * u
+    w1 = cx / np.cos(beta1)
+    w2 = cx / np.cos(beta2)
+    c1 = u - w1 * np.sin(beta1)
+    c2 = u - w2 * np.sin(beta2)
     
-    lphi = 1e-6
-    hphi = 2 - 1e-6
-    tipPhi = phi
+    return {'beta1' : beta1, 
+            'beta2' : beta2, 
+            'alpha1' : np.arctan(c1 / cx), 
+            'alpha2' : np.arctan(c2 / cx), 
+            'cx' : cx}
     
-    while (abs(stageProps.meanProps.cx - stageProps.tipProps.cx) > 1e-3):
-        if (stageProps.tipProps.cx < stageProps.meanProps.cx):
-            lphi = tipPhi
-            
-        else:
-            hphi = tipPhi
-            
-        tipPhi = (hphi + lphi) / 2
-        stageProps.tipProps = CalcStageBladeAngles(r = r, phi = tipPhi, psi = psi, rpm = rpm, radius = tipRadius)
     
-    stageProps.meanProps.r = r
-    stageProps.meanProps.psi = psi
-    stageProps.meanProps.phi = tipPhi
+################################
+##Function: StageCalcBatch
+#Vectorized StageCalc over arrays of design points,
+#the inputs can also be given as one table (structured
+#array or dict of columns) with r, phi, psi, rpm,
+#rootRadius and tipRadius fields
+##Inputs:
+#r: reaction, or the whole table (float array)
+#phi: flow (float array)
+#psi: loading (float array)
+#rpm: ...rpm (float array)
+#rootRadius: hub radius of stage (float array)
+#tipRadius: radius of stage (float array)
+##Returns:
+#stage: 'root', 'mean' and 'tip' angle columns plus
+#       their 'phi' and 'radius' (dict of dicts of arrays)
+################################
+def StageCalcBatch(r, phi = None, psi = None, rpm = None, rootRadius = None, tipRadius = None):
+    #Table of Design Points
+    if phi is None:
+        table = r
+        r, phi, psi, rpm, rootRadius, tipRadius = [table[k] for k in ('r', 'phi', 'psi', 'rpm', 'rootRadius', 'tipRadius')]
+        
+    r, phi, psi, rpm, rootRadius, tipRadius = np.broadcast_arrays(*[np.asarray(x, dtype = np.float64) for x in (r, phi, psi, rpm, rootRadius, tipRadius)])
+    if np.any(rootRadius <= 0) or np.any(tipRadius <= 0):
+        raise ValueError("Stage radii must be positive")
     
-    return stageProps
-    
\ No newline at end of file
+    #Same Closed Form Flow Solution as StageCalc
+    mlr = (rootRadius + tipRadius) / 2
+    stage = {}
+    for name, radius in [('root', rootRadius), ('mean', mlr), ('tip', tipRadius)]:
+        sectionPhi = phi * mlr / radius
+        stage[name] = CalcStageBladeAnglesBatch(r, sectionPhi, psi, rpm, radius)
+        stage[name]['phi'] = sectionPhi
+        stage[name]['radius'] = radius
+    
+    return stage
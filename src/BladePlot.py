@@ -13,6 +13,7 @@ except ImportError:
     from matplotlib.figure import Figure
 
 from BladeCalc import *
+from MeshCache import CachedStageCalc
 import numpy as np
 
 
@@ -49,48 +50,28 @@ class NACA4Profile(QWidget):
         if self.stageObj == 'R':
             self.stageObj = 'Rotor'
             #Create Rotor Object
-            self.stageProps = StageCalc(r = self.commonVars['Reaction (R)'], 
+            self.stageProps = CachedStageCalc(r = self.commonVars['Reaction (R)'], 
                                                     phi = self.commonVars['Flow (Phi)'], 
                                                     psi = self.commonVars['Loading (Psi)'], 
                                                     rpm = self.commonVars['RPM'], 
                                                     rootRadius = self.stageVars['Hub Diameter'] / 2, 
                                                     tipRadius = self.stageVars['Rotor Diameter'] / 2)
-            #Rotor Root Properties
-            rotorRoot = self.stageProps.rootProps
-            avgBetaRoot = (rotorRoot.beta2 + rotorRoot.beta1) / 2
-            deltaBetaRoot = rotorRoot.beta2 - rotorRoot.beta1
-            self.rootCamber = (self.stageVars['Root Chord (Rotor)'] / 2 / np.sin(deltaBetaRoot) - self.stageVars['Root Chord (Rotor)'] / 2 / np.tan(deltaBetaRoot)) / self.stageVars['Root Chord (Rotor)']
-            self.rootCamber *= -1
-
-            #Rotor Tip Properties
-            rotorTip = self.stageProps.tipProps
-            avgBetaTip = (rotorTip.beta2 + rotorTip.beta1) / 2
-            deltaBetaTip = rotorTip.beta2 - rotorTip.beta1
-            self.tipCamber = (self.stageVars['Tip Chord (Rotor)'] /2 / np.sin(deltaBetaTip) - self.stageVars['Tip Chord (Rotor)'] / 2 / np.tan(deltaBetaTip)) / self.stageVars['Tip Chord (Rotor)']
-            self.tipCamber *= -1
+            #Rotor Root and Tip Properties
+            avgBetaRoot, self.rootCamber = BladeCamber(self.stageProps.rootProps, self.stageVars['Root Chord (Rotor)'])
+            avgBetaTip, self.tipCamber = BladeCamber(self.stageProps.tipProps, self.stageVars['Tip Chord (Rotor)'])
             
         else:
             #Create Stator Object
             self.stageObj = 'Stator'
-            self.stageProps = StageCalc(r = self.commonVars['Reaction (R)'], 
+            self.stageProps = CachedStageCalc(r = self.commonVars['Reaction (R)'], 
                                                     phi = self.commonVars['Flow (Phi)'], 
                                                     psi = self.commonVars['Loading (Psi)'], 
                                                     rpm = self.commonVars['RPM'], 
                                                     rootRadius = self.stageVars['Mount Can Dia'] / 2, 
                                                     tipRadius = self.stageVars['Duct ID'] / 2)
-            #Stator Root Properties
-            rotorRoot = self.stageProps.rootProps
-            avgBetaRoot = (rotorRoot.beta2 + rotorRoot.beta1) / 2
-            deltaBetaRoot = rotorRoot.beta2 - rotorRoot.beta1
-            self.rootCamber = (self.stageVars['Root Chord (Stator)'] / 2 / np.sin(deltaBetaRoot) - self.stageVars['Root Chord (Stator)'] / 2 / np.tan(deltaBetaRoot)) / self.stageVars['Root Chord (Stator)']
-            self.rootCamber *= -1
-
-            #Stator Tip Properties
-            rotorTip = self.stageProps.tipProps
-            avgBetaTip = (rotorTip.beta2 + rotorTip.beta1) / 2
-            deltaBetaTip = rotorTip.beta2 - rotorTip.beta1
-            self.tipCamber = (self.stageVars['Tip Chord (Stator)'] /2 / np.sin(deltaBetaTip) - self.stageVars['Tip Chord (Stator)'] / 2 / np.tan(deltaBetaTip)) / self.stageVars['Tip Chord (Stator)']
-            self.tipCamber *= -1
+            #Stator Root and Tip Properties
+            avgBetaRoot, self.rootCamber = BladeCamber(self.stageProps.rootProps, self.stageVars['Root Chord (Stator)'])
+            avgBetaTip, self.tipCamber = BladeCamber(self.stageProps.tipProps, self.stageVars['Tip Chord (Stator)'])
             
         
     def _camberLine(self, camber, chord, thickness, cpos):
@@ -0,0 +1,259 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from BladeBuild import NoProgress
+from StlUtils import IndexedMesh, MeshAssembler, translationTransform
+import MeshCache
+
+
+################################
+##Function: StatorExtent
+#Axial extent of a stator as StatorParts builds it:
+#the mount can is centered on Mount Can Loc, the duct
+#ends where a can centered on X = 0 would. Blades
+#hanging past them are not counted
+##Inputs:
+#stator: stator properties (dict)
+##Returns:
+#start, end: smallest and largest X of can and duct (float)
+################################
+def StatorExtent(stator):
+    canLength = float(stator['Mount Can Length'])
+    canLoc = float(stator['Mount Can Loc'])
+    ductLength = float(stator['Duct Length'])
+
+    return min(canLoc - canLength / 2, canLength / 2 - ductLength), max(canLoc + canLength / 2, canLength / 2)
+
+
+################################
+##Function: StageOffsets
+#Axial position of every rotor and stator, stages are
+#stacked along +X in file order, each rotor followed
+#by its stator. The rotor hub and end wall are built
+#centered on X = 0, the stator spans StatorExtent, so
+#each object is moved to start where the one before
+#it ends
+##Inputs:
+#stages: (common, rotor, stator) of every stage (list)
+##Returns:
+#offsets: (rotorX, statorX) of every stage (list)
+################################
+def StageOffsets(stages):
+    offsets = []
+    x = 0.0
+    for common, rotor, stator in stages:
+        hubLength = float(rotor['Hub Length'])
+        start, end = StatorExtent(stator)
+
+        offsets.append((x + hubLength / 2, x + hubLength - start))
+        x += hubLength + end - start
+
+    return offsets
+
+
+################################
+##Function: ShareMesh
+#Copies a mesh into one shared memory block, only the
+#small description of the block has to be pickled
+##Inputs:
+#obj: mesh (indexed mesh)
+##Returns:
+#shared: (block name, vertex count, face count, names)
+################################
+def ShareMesh(obj):
+    vertices = obj.vertices
+    nverts = vertices.shape[0]
+    nfaces = obj.faces.shape[0]
+    labelled = obj.labels is not None
+
+    #float32 Vertices, int32 Faces and (Optional) int32 Labels, Back to Back
+    block = shared_memory.SharedMemory(create = True, size = max(1, 12 * nverts + 12 * nfaces + (4 * nfaces if labelled else 0)))
+    try:
+        np.ndarray((nverts, 3), np.float32, block.buf)[:] = vertices
+        np.ndarray((nfaces, 3), np.int32, block.buf, 12 * nverts)[:] = obj.faces
+        if labelled:
+            np.ndarray(nfaces, np.int32, block.buf, 12 * nverts + 12 * nfaces)[:] = obj.labels
+    #Never Handed On, So Nobody Else Could Free It
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+
+    return block.name, nverts, nfaces, obj.names if labelled else None
+
+
+################################
+##Function: UnshareMesh
+#Copies a mesh out of its shared memory block and
+#frees the block
+##Inputs:
+#shared: as returned by ShareMesh
+##Returns:
+#obj: mesh (indexed mesh)
+################################
+def UnshareMesh(shared):
+    name, nverts, nfaces, names = shared
+    block = shared_memory.SharedMemory(name = name)
+    try:
+        vertices = np.array(np.ndarray((nverts, 3), np.float32, block.buf))
+        faces = np.array(np.ndarray((nfaces, 3), np.int32, block.buf, 12 * nverts))
+        labels = None if names is None else np.array(np.ndarray(nfaces, np.int32, block.buf, 12 * nverts + 12 * nfaces))
+    finally:
+        block.close()
+        block.unlink()
+
+    return IndexedMesh(vertices, faces, labels, names)
+
+
+################################
+##Function: FreeShared
+#Frees the shared memory block of a mesh that is not
+#going to be copied out
+##Inputs:
+#shared: as returned by ShareMesh
+##Returns:
+#None
+################################
+def FreeShared(shared):
+    block = shared_memory.SharedMemory(name = shared[0])
+    block.close()
+    block.unlink()
+
+
+################################
+##Function: BuildShared
+#Worker process side of BuildStageObjects, builds one
+#object through the (disk) cache and shares it
+##Inputs:
+#stage: 'R' or 'S' (str)
+#args: builder arguments (tuple)
+#cacheDir: disk cache of the parent, None for none (str)
+##Returns:
+#shared: as returned by ShareMesh
+################################
+def BuildShared(stage, args, cacheDir):
+    MeshCache.SetCacheDir(cacheDir)
+    build = MeshCache.CachedBuildRotor if stage == 'R' else MeshCache.CachedBuildStator
+
+    shared = ShareMesh(build(*args))
+    
+    #The Parent Frees the Block, Not This Process's Resource Tracker
+    try:
+        resource_tracker.unregister('/' + shared[0].lstrip('/'), 'shared_memory')
+    except BaseException:
+        FreeShared(shared)
+        raise
+
+    return shared
+
+
+################################
+##Function: BuildStageObjects
+#Builds the rotor and / or stator of every stage at
+#once, on threads or on worker processes (one core
+#each). Objects already in the cache are not built.
+#If a build fails or progress raises, objects not yet
+#started are cancelled and the shared memory of those
+#built but not collected is freed
+##Inputs:
+#stages: (common, rotor, stator) of every stage (iterable)
+#endWall: build the rotor end walls (bool)
+#objects: objects to build, 'R' and/or 'S' (str)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+#jobs: objects built at once, None for the default (int)
+#processes: build on worker processes instead of threads (bool)
+#progress: called with the fraction of objects built (function)
+##Returns:
+#built: (stage number, 'R' or 'S', mesh) in stage order (list)
+################################
+def BuildStageObjects(stages, endWall = False, objects = 'RS', nspan = 1, npts = 24, tolerance = None, jobs = None, processes = False, progress = NoProgress):
+    tasks = []
+    for i, (common, rotor, stator) in enumerate(stages, 1):
+        if 'R' in objects:
+            tasks.append((i, 'R', MeshCache.RotorKey(common, rotor, endWall, nspan, npts, tolerance),
+                          (common, rotor, endWall, nspan, npts, tolerance)))
+        if 'S' in objects:
+            tasks.append((i, 'S', MeshCache.StatorKey(common, stator, nspan, npts, tolerance),
+                          (common, stator, nspan, npts, tolerance)))
+
+    #Unchanged Objects Come Straight From Memory
+    results = [MeshCache.meshCache.get(key) for i, stage, key, args in tasks]
+    missing = [n for n, obj in enumerate(results) if obj is None]
+
+    done = len(tasks) - len(missing)
+    if missing:
+        disk = MeshCache.diskCache
+        cacheDir = disk.directory if disk else None
+
+        if processes:
+            pool = ProcessPoolExecutor(max_workers = jobs)
+            submit = lambda n: pool.submit(BuildShared, tasks[n][1], tasks[n][3], cacheDir)
+        else:
+            pool = ThreadPoolExecutor(max_workers = jobs)
+            build = {'R': MeshCache.CachedBuildRotor, 'S': MeshCache.CachedBuildStator}
+            submit = lambda n: pool.submit(build[tasks[n][1]], *tasks[n][3])
+
+        with pool:
+            futures = {}
+            collected = set()
+            try:
+                for n in missing:
+                    futures[submit(n)] = n
+                for future in as_completed(futures):
+                    n = futures[future]
+                    obj = future.result()
+                    if processes:
+                        #Keep It for the Next Build in This Process Too
+                        collected.add(future)
+                        obj = MeshCache.meshCache.put(tasks[n][2], MeshCache.Freeze(UnshareMesh(obj)))
+                    results[n] = obj
+                    done += 1
+                    progress(done / len(tasks))
+            finally:
+                #Nothing Left Running Once Done, Blocks Nobody Collected Are Freed
+                pool.shutdown(cancel_futures = True)
+                if processes:
+                    for future in futures:
+                        if future not in collected and not future.cancelled() and future.exception() is None:
+                            FreeShared(future.result())
+
+    return [(i, stage, obj) for (i, stage, key, args), obj in zip(tasks, results)]
+
+
+################################
+##Function: BuildCompressor
+#Builds every stage and stacks them into one mesh,
+#stages are built in parallel and through MeshCache,
+#so only stages that changed are rebuilt
+##Inputs:
+#stages: (common, rotor, stator) of every stage, as
+#        given by FileOps.StageOpen (iterable)
+#endWall: build the rotor end walls (bool)
+#objects: objects to build, 'R' and/or 'S' (str)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+#jobs: objects built at once, None for the default (int)
+#processes: build on worker processes instead of threads (bool)
+#progress: called with the fraction of objects built (function)
+##Returns:
+#compressor: whole compressor, parts labelled
+#            'stage<N>/rotor/hub' etc. (indexed mesh)
+################################
+def BuildCompressor(stages, endWall = False, objects = 'RS', nspan = 1, npts = 24, tolerance = None, jobs = None, processes = False, progress = NoProgress):
+    stages = list(stages)
+    offsets = StageOffsets(stages)
+    built = BuildStageObjects(stages, endWall, objects, nspan, npts, tolerance, jobs, processes, progress)
+
+    assembler = MeshAssembler()
+    for i, stage, obj in built:
+        label = 'stage{}/{}'.format(i, 'rotor' if stage == 'R' else 'stator')
+        x = offsets[i - 1][0 if stage == 'R' else 1]
+        assembler.add(obj, label, translationTransform([x, 0, 0]))
+
+    return assembler.build()
@@ -0,0 +1,324 @@
+try:
+    from PyQt5.QtCore import *
+    from PyQt5.QtGui import *
+    from PyQt5.QtWidgets import *
+    available = True
+
+#PyQt4 Has No QOpenGLWidget, RenderWindow Falls Back to MeshView
+except ImportError:
+    available = False
+
+import numpy as np
+
+from StlUtils import vertexNormals
+
+
+#OpenGL Enums Used Below (the Function Objects Don't Export Them)
+GL_COLOR_BUFFER_BIT = 0x4000
+GL_DEPTH_BUFFER_BIT = 0x0100
+GL_DEPTH_TEST = 0x0B71
+GL_TRIANGLES = 0x0004
+GL_UNSIGNED_INT = 0x1405
+GL_FLOAT = 0x1406
+
+#GLSL 1.20 Runs on Any OpenGL 2.1 Driver, Mesa's llvmpipe Included
+vertexShader = """
+#version 120
+attribute vec3 position;
+attribute vec3 normal;
+uniform mat4 mvp;
+uniform mat3 normalMatrix;
+varying vec3 eyeNormal;
+void main()
+{
+    eyeNormal = normalMatrix * normal;
+    gl_Position = mvp * vec4(position, 1.0);
+}
+"""
+
+#Head Light, Lit on Both Sides so Face Winding Doesn't Matter
+fragmentShader = """
+#version 120
+uniform vec3 color;
+varying vec3 eyeNormal;
+void main()
+{
+    float light = abs(normalize(eyeNormal).z);
+    gl_FragColor = vec4(color * (0.3 + 0.7 * light), 1.0);
+}
+"""
+
+
+################################
+##Function: GLArrays
+#Vertex and index data of a mesh, laid out the way
+#GLMeshView uploads it
+##Inputs:
+#obj: object to draw (indexed mesh)
+##Returns:
+#interleaved: (V, 6) position, normal per vertex (float32)
+#indices: (F * 3) vertex indices (uint32)
+#center: bounding box center (3) (float32)
+#radius: bounding sphere radius about center (float)
+################################
+def GLArrays(obj):
+    vertices = np.asarray(obj.vertices, dtype = np.float32)
+    faces = np.asarray(obj.faces)
+
+    interleaved = np.empty((vertices.shape[0], 6), dtype = np.float32)
+    interleaved[:, :3] = vertices
+    interleaved[:, 3:] = vertexNormals(vertices, faces)
+    indices = np.ascontiguousarray(faces, dtype = np.uint32).ravel()
+
+    if vertices.shape[0]:
+        center = (vertices.min(axis = 0) + vertices.max(axis = 0)) / 2
+        radius = float(np.linalg.norm(vertices - center, axis = 1).max())
+    else:
+        center = np.zeros(3, dtype = np.float32)
+        radius = 0.0
+
+    return interleaved, indices, center, max(radius, 1e-6)
+
+
+################################
+##Function: ContextAvailable
+#Whether an OpenGL 2.1 context can be made at all,
+#tried once (QApplication has to exist)
+##Inputs:
+#None
+##Returns:
+#available: (bool)
+################################
+def ContextAvailable():
+    global contextAvailable
+    if contextAvailable is None:
+        contextAvailable = False
+        if available:
+            surface = QOffscreenSurface()
+            surface.create()
+            context = QOpenGLContext()
+            if context.create() and context.makeCurrent(surface):
+                contextAvailable = context.format().version() >= (2, 1)
+                context.doneCurrent()
+
+    return contextAvailable
+
+
+contextAvailable = None
+
+
+if available:
+    ################################
+    ##Function: GLMeshView
+    #Displays an already built object with OpenGL. The
+    #vertex and index buffers are uploaded once and
+    #rotating / zooming only changes the matrices, so
+    #the full resolution object is shown (the preview
+    #is not needed). Emits unavailable when no usable
+    #OpenGL context could be made, RenderWindow then
+    #swaps in a MeshView
+    ##Inputs:
+    #parent: parent (obj)
+    #obj: object to export and display (indexed mesh)
+    #preview: unused, kept to match MeshView (indexed mesh)
+    ##Returns:
+    #self.obj: export object, getObj converts it for export
+    ################################
+    class GLMeshView(QOpenGLWidget):
+        unavailable = pyqtSignal()
+
+        def __init__(self, parent, obj = None, preview = None):
+            super(GLMeshView, self).__init__(parent)
+
+            self.obj = None
+            self.gl = None
+            self.program = None
+            self.vertexBuffer = None
+            self.indexBuffer = None
+            self.arrays = None
+            self.pending = None
+            self.count = 0
+            self.center = np.zeros(3, dtype = np.float32)
+            self.radius = 1.0
+
+            #Camera, Degrees About Z (Up) and Above the XY Plane
+            self.yaw = -60.0
+            self.pitch = 30.0
+            self.zoom = 1.0
+            self.lastPos = None
+
+            if obj is not None:
+                self.setObj(obj, preview)
+
+
+        def setObj(self, obj, preview = None):
+            self.obj = obj
+
+            #Uploaded on the Next Paint, When the Context Is Current
+            interleaved, indices, self.center, self.radius = GLArrays(obj)
+            self.arrays = self.pending = (interleaved, indices)
+            self.update()
+
+
+        #Only Converted to a numpy-stl Mesh for Export
+        def getObj(self):
+            return self.obj.toMesh()
+
+
+        def initializeGL(self):
+            profile = QOpenGLVersionProfile()
+            profile.setVersion(2, 1)
+            self.gl = self.context().versionFunctions(profile)
+
+            program = QOpenGLShaderProgram(self)
+            if (self.gl is None or not self.gl.initializeOpenGLFunctions()
+                    or not program.addShaderFromSourceCode(QOpenGLShader.Vertex, vertexShader)
+                    or not program.addShaderFromSourceCode(QOpenGLShader.Fragment, fragmentShader)
+                    or not program.link()):
+                self.gl = None
+                self.unavailable.emit()
+                return
+
+            self.program = program
+            self.gl.glEnable(GL_DEPTH_TEST)
+
+            #Buffers Have to Be Freed While Their Context Still Exists
+            self.context().aboutToBeDestroyed.connect(self.cleanup)
+
+
+        ################################
+        ##Function: upload
+        #Moves pending vertex and index data into GPU
+        #buffers, replacing the previous object's
+        ##Inputs:
+        #self: GLMeshView
+        ##Returns:
+        #none
+        ################################
+        def upload(self):
+            interleaved, indices = self.pending
+            self.pending = None
+
+            for buffer in (self.vertexBuffer, self.indexBuffer):
+                if buffer is not None:
+                    buffer.destroy()
+
+            self.vertexBuffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+            self.vertexBuffer.create()
+            self.vertexBuffer.bind()
+            self.vertexBuffer.allocate(interleaved, interleaved.nbytes)
+            self.vertexBuffer.release()
+
+            self.indexBuffer = QOpenGLBuffer(QOpenGLBuffer.IndexBuffer)
+            self.indexBuffer.create()
+            self.indexBuffer.bind()
+            self.indexBuffer.allocate(indices, indices.nbytes)
+            self.indexBuffer.release()
+
+            self.count = indices.shape[0]
+
+
+        ################################
+        ##Function: matrices
+        #Model view projection and normal matrices of
+        #the current camera, the object is scaled to
+        #fit the view at zoom 1
+        ##Inputs:
+        #self: GLMeshView
+        ##Returns:
+        #mvp: model view projection (QMatrix4x4)
+        #normalMatrix: eye space normal matrix (QMatrix3x3)
+        ################################
+        def matrices(self):
+            distance = 3.0 * self.radius / self.zoom
+
+            projection = QMatrix4x4()
+            projection.perspective(30.0, max(self.width(), 1) / max(self.height(), 1),
+                                   max(distance - self.radius, distance * 1e-3), distance + self.radius)
+
+            #Z Up, Looking Down the Pitch Angle
+            modelView = QMatrix4x4()
+            modelView.translate(0.0, 0.0, -distance)
+            modelView.rotate(self.pitch - 90.0, 1.0, 0.0, 0.0)
+            modelView.rotate(self.yaw, 0.0, 0.0, 1.0)
+            modelView.translate(*(-float(c) for c in self.center))
+
+            return projection * modelView, modelView.normalMatrix()
+
+
+        def paintGL(self):
+            if self.gl is None:
+                return
+
+            background = self.palette().color(QPalette.Window)
+            self.gl.glClearColor(background.redF(), background.greenF(), background.blueF(), 1.0)
+            self.gl.glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+            if self.pending is not None:
+                self.upload()
+            if not self.count:
+                return
+
+            mvp, normalMatrix = self.matrices()
+
+            self.program.bind()
+            self.program.setUniformValue("mvp", mvp)
+            self.program.setUniformValue("normalMatrix", normalMatrix)
+            self.program.setUniformValue("color", QVector3D(0.12, 0.47, 0.71))
+
+            self.vertexBuffer.bind()
+            position = self.program.attributeLocation("position")
+            normal = self.program.attributeLocation("normal")
+            self.program.enableAttributeArray(position)
+            self.program.enableAttributeArray(normal)
+            self.program.setAttributeBuffer(position, GL_FLOAT, 0, 3, 24)
+            self.program.setAttributeBuffer(normal, GL_FLOAT, 12, 3, 24)
+
+            self.indexBuffer.bind()
+            self.gl.glDrawElements(GL_TRIANGLES, self.count, GL_UNSIGNED_INT, None)
+
+            self.indexBuffer.release()
+            self.program.disableAttributeArray(position)
+            self.program.disableAttributeArray(normal)
+            self.vertexBuffer.release()
+            self.program.release()
+
+
+        def mousePressEvent(self, event):
+            self.lastPos = event.pos()
+
+
+        #Drag Rotates, Half a Degree per Pixel
+        def mouseMoveEvent(self, event):
+            if self.lastPos is None:
+                return
+            delta = event.pos() - self.lastPos
+            self.lastPos = event.pos()
+
+            self.yaw += 0.5 * delta.x()
+            self.pitch = min(90.0, max(-90.0, self.pitch + 0.5 * delta.y()))
+            self.update()
+
+
+        def mouseReleaseEvent(self, event):
+            self.lastPos = None
+
+
+        #Wheel Zooms, One Notch is 10%
+        def wheelEvent(self, event):
+            notches = event.angleDelta().y() / 120.0
+            self.zoom = min(100.0, max(0.1, self.zoom * 1.1 ** notches))
+            self.update()
+
+
+        #Also Called When the Widget Moves to Another Window (New Context)
+        def cleanup(self):
+            self.makeCurrent()
+            for buffer in (self.vertexBuffer, self.indexBuffer):
+                if buffer is not None:
+                    buffer.destroy()
+            self.vertexBuffer = self.indexBuffer = None
+            self.doneCurrent()
+
+            #Upload Again Into the Next Context
+            self.pending = self.arrays
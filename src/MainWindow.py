@@ -9,9 +9,13 @@ except ImportError:
     from PyQt5.QtGui import *
     version = 5
 
+import os
+
 import BladePlot
 import RenderWindow
 from FileOps import *
+from StlUtils import writeStl, decimateMesh, repairMesh, edgeReport
+from MeshUnion import UnionParts
 
 
 class Ui_MainWindow(object):
@@ -60,10 +64,14 @@ class Ui_MainWindow(object):
         }
         
         self.exportObj = None
+        self.renderJob = None
         self.clicked = None
         self.fileOpen = False
         self.failed = []
         self.darkMode = True
+        self.glView = os.environ.get('COMPPY_VIEWER') == 'gl'
+        self.repairExport = False
+        self.unionExport = False
         self.centralwidget = QWidget(MainWindow)
         self.centralwidget.setObjectName("centralwidget")
         
@@ -686,16 +694,47 @@ class Ui_MainWindow(object):
         self.actionSave.setStatusTip("Save File")
         self.actionSave.triggered.connect(self.SaveFile)
         
+        self.actionExportReduced = QAction(MainWindow)
+        self.actionExportReduced.setObjectName("actionExportReduced")
+        self.actionExportReduced.setStatusTip("Export the Rendered Object With Fewer Triangles")
+        self.actionExportReduced.triggered.connect(self.ExportReduced)
+        
+        self.actionToggleRepair = QAction(MainWindow)
+        self.actionToggleRepair.setObjectName("actionToggleRepair")
+        self.actionToggleRepair.setCheckable(True)
+        self.actionToggleRepair.setChecked(self.repairExport)
+        self.actionToggleRepair.setStatusTip("Weld Each Part Into One Shell and Delete Duplicate Faces on Export")
+        self.actionToggleRepair.triggered.connect(self.ToggleRepair)
+        
+        self.actionToggleUnion = QAction(MainWindow)
+        self.actionToggleUnion.setObjectName("actionToggleUnion")
+        self.actionToggleUnion.setCheckable(True)
+        self.actionToggleUnion.setChecked(self.unionExport)
+        self.actionToggleUnion.setStatusTip("Join the Blades to the Hub and Walls Into One Closed Shell on Export")
+        self.actionToggleUnion.triggered.connect(self.ToggleUnion)
+        
         self.actionToggleDarkMode = QAction(MainWindow)
         self.actionToggleDarkMode.setObjectName("actionToggleDarkMode")
         self.actionToggleDarkMode.setCheckable(True)
         self.actionToggleDarkMode.setChecked(True)
         self.actionToggleDarkMode.setStatusTip("Toggle Dark Mode")
         self.actionToggleDarkMode.triggered.connect(self.ToggleDarkMode)
+        
+        self.actionToggleGLView = QAction(MainWindow)
+        self.actionToggleGLView.setObjectName("actionToggleGLView")
+        self.actionToggleGLView.setCheckable(True)
+        self.actionToggleGLView.setChecked(self.glView)
+        self.actionToggleGLView.setEnabled(RenderWindow.GLRender.ContextAvailable())
+        self.actionToggleGLView.setStatusTip("Show Renders Full Resolution With OpenGL")
+        self.actionToggleGLView.triggered.connect(self.ToggleGLView)
 
         self.menuFile.addAction(self.actionOpen)
         self.menuFile.addAction(self.actionSave)
+        self.menuFile.addAction(self.actionExportReduced)
+        self.menuFile.addAction(self.actionToggleRepair)
+        self.menuFile.addAction(self.actionToggleUnion)
         self.menuView.addAction(self.actionToggleDarkMode)
+        self.menuView.addAction(self.actionToggleGLView)
         self.menubar.addAction(self.menuFile.menuAction())
         self.menubar.addAction(self.menuView.menuAction())
 
@@ -782,7 +821,11 @@ class Ui_MainWindow(object):
         self.menuView.setTitle("View")
         self.actionOpen.setText("Open")
         self.actionSave.setText("Save")
+        self.actionExportReduced.setText("Export Reduced STL...")
+        self.actionToggleRepair.setText("Repair Mesh on Export")
+        self.actionToggleUnion.setText("Union Blades on Export")
         self.actionToggleDarkMode.setText("Dark Mode")
+        self.actionToggleGLView.setText("OpenGL View")
         
         # Apply dark mode theme on startup
         self.ApplyTheme()
@@ -1036,7 +1079,42 @@ class Ui_MainWindow(object):
     ##Returns:
     #none
     ################################   
-    def Export(self):       
+    def Export(self):
+        self.ExportStl()
+        
+        
+    ################################
+    ##Function: ExportReduced
+    #Asks for a triangle budget and exports the
+    #rendered object decimated to it
+    ##Inputs: 
+    #self: Ui_MainWindow
+    ##Returns:
+    #none
+    ################################   
+    def ExportReduced(self):
+        if not self.exportObj:
+            self.ExportStl()
+            return
+        
+        total = len(self.exportObj)
+        faces, ok = QInputDialog.getInt(self.MainWindow, "Export Reduced STL", "Triangles (full object has {}):".format(total),
+                                            min(50000, total), 4, total)
+        if ok:
+            self.ExportStl(faces)
+        
+        
+    ################################
+    ##Function: ExportStl
+    #If object rendered, exports it (or a decimated
+    #copy) to .stl file
+    ##Inputs: 
+    #self: Ui_MainWindow
+    #targetFaces: triangle budget, full object when None (int)
+    ##Returns:
+    #none
+    ################################   
+    def ExportStl(self, targetFaces = None):       
         #If object was previously generated
         if self.exportObj:
             name = QFileDialog.getSaveFileName(self.MainWindow, 'Save File', None, 'STL files (*.stl)')
@@ -1056,12 +1134,27 @@ class Ui_MainWindow(object):
                 filename += '.stl'
             
             try:
-                self.exportObj.save(filename)
+                #Streamed Straight From the Indexed Mesh, Part by Part
+                obj = self.exportObj
+                details = ""
+                edges = {}
+                #The Union Is Already Welded, Repair Would Split It Into Parts Again
+                if self.unionExport:
+                    obj = UnionParts(obj)
+                    edges = {'mesh': edgeReport(obj.faces)}
+                elif self.repairExport:
+                    obj, edges = repairMesh(obj)
+                for part, found in edges.items():
+                    if len(found['boundary']) or len(found['nonManifold']):
+                        details += f"\n{part}: {len(found['boundary'])} open, {len(found['nonManifold'])} non-manifold edges"
+                if targetFaces is not None:
+                    obj = decimateMesh(obj, targetFaces)
+                writeStl(filename, [obj])
                 
                 # Show success message
                 box = QMessageBox(self.MainWindow)
                 box.setText("STL Exported Successfully")
-                box.setInformativeText(f"Saved to:\n{filename}")
+                box.setInformativeText(f"Saved to:\n{filename}" + details)
                 box.setWindowTitle("Export Success")
                 box.setIcon(QMessageBox.Information)
                 box.exec_()
@@ -1278,10 +1371,7 @@ class Ui_MainWindow(object):
                 
                 #If there was no failure
                 if not self.failed: 
-                    rend = RenderWindow.RenderWindow(self.MainWindow, self.commonVars[self.clicked], self.rotorVars[self.clicked], "R", self.wallCheck.isChecked())
-                    self.R_FrameLayout.addWidget(rend)
-                    self.R_Frame.setLayout(self.R_FrameLayout)
-                    self.exportObj = rend.returnObject()
+                    self.StartRender(self.commonVars[self.clicked], self.rotorVars[self.clicked], "R", self.wallCheck.isChecked())
                     
                 #If there was a failure, show the failures
                 else: ErrorWindow(self.MainWindow, self.failed).show()
@@ -1292,10 +1382,7 @@ class Ui_MainWindow(object):
                 
                 #If there was no failure
                 if not self.failed: 
-                    rend = RenderWindow.RenderWindow(self.MainWindow, self.commonVars[self.clicked], self.statorVars[self.clicked], "S")
-                    self.R_FrameLayout.addWidget(rend)
-                    self.R_Frame.setLayout(self.R_FrameLayout)
-                    self.exportObj = rend.returnObject()
+                    self.StartRender(self.commonVars[self.clicked], self.statorVars[self.clicked], "S")
                 
                 #If there was a failure, show the failures
                 else: ErrorWindow(self.MainWindow, self.failed).show()
@@ -1306,6 +1393,96 @@ class Ui_MainWindow(object):
         self.failed = []
                                 
     
+    ################################
+    ##Function: StartRender
+    #Starts building the object on the thread pool
+    #and shows its progress, the render is attached
+    #by RenderFinished once the build is done
+    ##Inputs: 
+    #self: Ui_MainWindow
+    #common: common properties (dict)
+    #object: stage properties (dict)
+    #stage: stator ('S') or rotor ('R')
+    #checked: if endwall was checked (bool)
+    ##Returns:
+    #none
+    ################################   
+    def StartRender(self, common, object, stage, checked = False):
+        #Only the Newest Render Gets Attached
+        if self.renderJob:
+            self.renderJob.cancel()
+        
+        job = RenderWindow.BuildWorker(common, object, stage, checked)
+        self.renderJob = job
+        self.exportObj = None
+        
+        #Progress Dialog, Only Shows Up if the Build Takes a While
+        progress = QProgressDialog("Building " + ("Rotor" if stage == "R" else "Stator") + "...", "Cancel", 0, 100, self.MainWindow)
+        progress.setWindowTitle("Render")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setValue(0)
+        
+        progress.canceled.connect(job.cancel)
+        job.signals.progress.connect(progress.setValue)
+        job.signals.finished.connect(lambda obj, preview: self.RenderFinished(job, progress, common, object, stage, obj, preview))
+        job.signals.failed.connect(lambda error: self.RenderFinished(job, progress, common, object, stage, None, error = error))
+        job.signals.cancelled.connect(lambda: self.RenderFinished(job, progress, common, object, stage, None))
+        
+        QThreadPool.globalInstance().start(job)
+        
+        
+    ################################
+    ##Function: RenderFinished
+    #Attaches a finished build to the render frame,
+    #runs on the GUI thread
+    ##Inputs: 
+    #self: Ui_MainWindow
+    #job: build that finished (BuildWorker)
+    #progress: its progress dialog (QProgressDialog)
+    #common: common properties (dict)
+    #object: stage properties (dict)
+    #stage: stator ('S') or rotor ('R')
+    #obj: built object, None if cancelled or failed (indexed mesh)
+    #preview: coarse object shown in the view (indexed mesh)
+    #error: failure message (str)
+    ##Returns:
+    #none
+    ################################   
+    def RenderFinished(self, job, progress, common, object, stage, obj, preview = None, error = None):
+        progress.close()
+        
+        #A Newer Render Was Started Since
+        if job is not self.renderJob:
+            return
+        self.renderJob = None
+        
+        if error:
+            box = QMessageBox(self.MainWindow)
+            box.setText("Render Failed")
+            box.setInformativeText(error)
+            box.setWindowTitle("Render Error")
+            box.exec_()
+            return
+        
+        #Cancelled
+        if obj is None:
+            return
+        
+        #Delete Currently Occupating Widget
+        for i in reversed(range(self.R_FrameLayout.count())): 
+            widget = self.R_FrameLayout.itemAt(i).widget()
+            if widget:
+                widget.setParent(None)
+        
+        #View Shows the Preview (or All of It With OpenGL), Export Keeps the Full Resolution Object
+        rend = RenderWindow.RenderWindow(self.MainWindow, common, object, stage, obj = obj, preview = preview, gl = self.glView)
+        self.R_FrameLayout.addWidget(rend)
+        self.R_Frame.setLayout(self.R_FrameLayout)
+        self.exportObj = obj
+        
+        
     ################################
     ##Function: ToggleDarkMode
     #Toggles between light and dark mode
@@ -1319,6 +1496,44 @@ class Ui_MainWindow(object):
         self.ApplyTheme()
     
     
+    ################################
+    ##Function: ToggleGLView
+    #Toggles between the OpenGL view and the plot,
+    #used from the next render on
+    ##Inputs: 
+    #self: Ui_MainWindow
+    ##Returns:
+    #none
+    ################################   
+    def ToggleGLView(self):
+        self.glView = not self.glView
+    
+    
+    ################################
+    ##Function: ToggleRepair
+    #Toggles welding and cleaning the mesh on export
+    ##Inputs: 
+    #self: Ui_MainWindow
+    ##Returns:
+    #none
+    ################################   
+    def ToggleRepair(self):
+        self.repairExport = not self.repairExport
+    
+    
+    ################################
+    ##Function: ToggleUnion
+    #Toggles joining the blades to the hub and walls on
+    #export
+    ##Inputs: 
+    #self: Ui_MainWindow
+    ##Returns:
+    #none
+    ################################   
+    def ToggleUnion(self):
+        self.unionExport = not self.unionExport
+    
+    
     ################################
     ##Function: ApplyTheme
     #Applies the current theme (light or dark)
@@ -0,0 +1,389 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+from BladeCalc import StageCalc
+from BladeBuild import BuildRotor, BuildStator, NoProgress
+from StlUtils import IndexedMesh
+
+
+################################
+##Function: SourceVersion
+#Geometry version of the disk cache, a hash of the
+#sources of the modules that build and store the
+#meshes, so entries built by older code are never
+#used
+##Inputs:
+#names: names of the modules, already imported (list)
+##Returns:
+#version: version directory name (str)
+################################
+def SourceVersion(names):
+    digest = hashlib.sha1()
+    for name in names:
+        try:
+            with open(sys.modules[name].__file__, 'rb') as f:
+                digest.update(f.read().replace(b'\r\n', b'\n'))
+                
+        #No Source to Read (a Frozen Build), the Name Has to Do
+        except (AttributeError, KeyError, OSError, TypeError):
+            digest.update(name.encode())
+
+    return 'CompPy-' + digest.hexdigest()[:12]
+
+
+version = SourceVersion(['BladeCalc', 'BladeBuild', 'StlUtils', __name__])
+
+
+################################
+##Function: CanonicalKey
+#Content hash of a set of parameters, dict values are
+#converted to float first so '30', '30.0' and 30 all
+#give the same key
+##Inputs:
+#parts: dicts, floats, bools, strings or None (any)
+##Returns:
+#key: hex digest (str)
+################################
+def CanonicalKey(*parts):
+    def canonical(part):
+        if isinstance(part, dict):
+            return '{' + ','.join(repr(str(k)) + ':' + canonical(float(part[k])) for k in sorted(part, key = str)) + '}'
+        if isinstance(part, bool) or part is None:
+            return repr(part)
+        if isinstance(part, (int, float, np.number)):
+            #+ 0.0 Folds -0.0 Into 0.0
+            return repr(float(part) + 0.0)
+        if isinstance(part, (list, tuple)):
+            return '(' + ','.join(canonical(p) for p in part) + ')'
+        return repr(str(part))
+
+    return hashlib.sha1('|'.join(canonical(part) for part in parts).encode()).hexdigest()
+
+
+################################
+##Function: SizeOf
+#Bytes held by a cached value
+##Inputs:
+#value: cached value (any)
+##Returns:
+#size: bytes (int)
+################################
+def SizeOf(value):
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if hasattr(value, 'toArray'):
+        return sys.getsizeof(value) + value.toArray().nbytes
+    return sys.getsizeof(value)
+
+
+################################
+##Function: LRUCache
+#Thread safe least recently used cache, bounded by
+#the bytes of the values it holds
+##Inputs:
+#maxBytes: byte budget (int)
+##Returns:
+#None
+################################
+class LRUCache():
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self):
+        return len(self._items)
+
+
+    def __contains__(self, key):
+        return key in self._items
+
+
+    #Value for Key, or None, Marks It as Most Recently Used
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+
+    #Stores a Value, Evicting the Least Recently Used Until It Fits
+    def put(self, key, value):
+        size = SizeOf(value)
+        with self._lock:
+            if key in self._items:
+                self.bytes -= self._items.pop(key)[1]
+
+            #Too Big to Ever Fit
+            if size > self.maxBytes:
+                return value
+
+            while self._items and self.bytes + size > self.maxBytes:
+                self.bytes -= self._items.popitem(last = False)[1][1]
+
+            self._items[key] = (value, size)
+            self.bytes += size
+
+        return value
+
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+################################
+##Function: DiskCache
+#Built meshes stored on disk, one directory per
+#parameter hash under a directory per version, other
+#versions are dropped when a new one starts out.
+#Entries are raw float32 vertex / int32 face .npy
+#blocks that are memory mapped (read only) on a hit
+##Inputs:
+#directory: cache root (str)
+##Returns:
+#None
+################################
+class DiskCache():
+    def __init__(self, directory):
+        self.directory = directory
+
+
+    def path(self, key):
+        return os.path.join(self.directory, version, key)
+
+
+    #Mesh Stored Under Key, or None
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(os.path.join(path, 'names.json')) as f:
+                names = json.load(f)
+            vertices = np.load(os.path.join(path, 'vertices.npy'), mmap_mode = 'r')
+            faces = np.load(os.path.join(path, 'faces.npy'), mmap_mode = 'r')
+            labels = np.load(os.path.join(path, 'labels.npy'), mmap_mode = 'r') if names else None
+            
+        #Missing or Broken Entry, Rebuild It
+        except (OSError, ValueError):
+            return None
+
+        return IndexedMesh(vertices, faces, labels, names)
+
+
+    #Writes the Entry Next to Its Final Place, Then Moves It in One Step
+    def put(self, key, obj):
+        path = self.path(key)
+        if os.path.isdir(path):
+            return obj
+
+        temp = None
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                self.prune()
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            temp = tempfile.mkdtemp(dir = os.path.dirname(path))
+            np.save(os.path.join(temp, 'vertices.npy'), np.asarray(obj.vertices, dtype = np.float32))
+            np.save(os.path.join(temp, 'faces.npy'), np.asarray(obj.faces, dtype = np.int32))
+            if obj.labels is not None:
+                np.save(os.path.join(temp, 'labels.npy'), np.asarray(obj.labels, dtype = np.int32))
+            with open(os.path.join(temp, 'names.json'), 'w') as f:
+                json.dump(obj.names if obj.labels is not None else [], f)
+            os.rename(temp, path)
+            
+        #Read Only or Full Disk, or Someone Else Stored It First
+        except OSError:
+            if temp:
+                shutil.rmtree(temp, ignore_errors = True)
+
+        return obj
+
+
+    def clear(self):
+        shutil.rmtree(os.path.join(self.directory, version), ignore_errors = True)
+
+
+    #Entries of Other Versions Are Never Read Again
+    def prune(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.startswith('CompPy-') and name != version:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors = True)
+
+
+################################
+##Function: DefaultCacheDir
+#Disk cache directory, $COMPPY_CACHE_DIR or the
+#user cache directory
+##Inputs:
+#None
+##Returns:
+#directory: cache root (str)
+################################
+def DefaultCacheDir():
+    if os.environ.get('COMPPY_CACHE_DIR'):
+        return os.environ['COMPPY_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    
+    return os.path.join(base, 'CompPy')
+
+
+#Process Wide Caches, Stage Solutions are Tiny, Meshes are Not
+stageCache = LRUCache(maxBytes = 16 * 2**20)
+meshCache = LRUCache(maxBytes = 512 * 2**20)
+diskCache = DiskCache(DefaultCacheDir())
+
+
+################################
+##Function: SetCacheDir
+#Moves the disk cache, None turns it off
+##Inputs:
+#directory: cache root (str)
+##Returns:
+#none
+################################
+def SetCacheDir(directory):
+    global diskCache
+    diskCache = DiskCache(directory) if directory else None
+
+
+################################
+##Function: CachedBuild
+#Looks a mesh up in memory, then on disk, and only
+#builds it when both miss
+##Inputs:
+#key: canonical key of the mesh (str)
+#build: builds the mesh (function)
+#progress: progress callback (function)
+##Returns:
+#obj: built mesh, read only (indexed mesh)
+################################
+def CachedBuild(key, build, progress):
+    obj = meshCache.get(key)
+    if obj is not None:
+        progress(1.0)
+        return obj
+
+    disk = diskCache
+    obj = disk.get(key) if disk else None
+    if obj is not None:
+        progress(1.0)
+    else:
+        obj = build()
+        if disk:
+            disk.put(key, obj)
+
+    return meshCache.put(key, Freeze(obj))
+
+
+################################
+##Function: Freeze
+#Makes a cached mesh read only, so no caller can
+#change what the next one gets back
+##Inputs:
+#obj: mesh (indexed mesh)
+##Returns:
+#obj: same mesh, read only (indexed mesh)
+################################
+def Freeze(obj):
+    for array in (obj.vertices, obj.faces, obj.labels):
+        if array is not None:
+            array.flags.writeable = False
+
+    return obj
+
+
+################################
+##Function: CachedStageCalc
+#StageCalc through stageCache, results are immutable
+#so they are shared as is
+##Inputs:
+#r: reaction (float)
+#phi: flow (float)
+#psi: loading (float)
+#rpm: ...rpm (float)
+#rootRadius: hub radius of stage (float)
+#tipRadius: radius of stage (float)
+##Returns:
+#stageProps: stage properties (object)
+################################
+def CachedStageCalc(r, phi, psi, rpm, rootRadius, tipRadius):
+    key = CanonicalKey('stage', r, phi, psi, rpm, rootRadius, tipRadius)
+    stageProps = stageCache.get(key)
+    if stageProps is None:
+        stageProps = stageCache.put(key, StageCalc(r, phi, psi, rpm, rootRadius, tipRadius))
+
+    return stageProps
+
+
+################################
+##Function: RotorKey
+#Cache key of a rotor build
+##Inputs:
+#same as BuildRotor
+##Returns:
+#key: hex digest (str)
+################################
+def RotorKey(common, rotor, endWall = False, nspan = 1, npts = 24, tolerance = None):
+    return CanonicalKey('rotor', common, rotor, bool(endWall), nspan, npts, tolerance)
+    
+    
+################################
+##Function: StatorKey
+#Cache key of a stator build
+##Inputs:
+#same as BuildStator
+##Returns:
+#key: hex digest (str)
+################################
+def StatorKey(common, stator, nspan = 1, npts = 24, tolerance = None):
+    return CanonicalKey('stator', common, stator, nspan, npts, tolerance)
+
+
+################################
+##Function: CachedBuildRotor
+#BuildRotor through meshCache and diskCache, the
+#returned mesh is read only (copy it before
+#transforming it)
+##Inputs:
+#same as BuildRotor
+##Returns:
+#rotorHub: completed rotor (indexed mesh)
+################################
+def CachedBuildRotor(common, rotor, endWall = False, nspan = 1, npts = 24, tolerance = None, progress = NoProgress):
+    key = RotorKey(common, rotor, endWall, nspan, npts, tolerance)
+    
+    return CachedBuild(key, lambda: BuildRotor(common, rotor, endWall, nspan, npts, tolerance, progress), progress)
+
+
+################################
+##Function: CachedBuildStator
+#BuildStator through meshCache and diskCache, the
+#returned mesh is read only (copy it before
+#transforming it)
+##Inputs:
+#same as BuildStator
+##Returns:
+#mountCan: completed stator (indexed mesh)
+################################
+def CachedBuildStator(common, stator, nspan = 1, npts = 24, tolerance = None, progress = NoProgress):
+    key = StatorKey(common, stator, nspan, npts, tolerance)
+    
+    return CachedBuild(key, lambda: BuildStator(common, stator, nspan, npts, tolerance, progress), progress)
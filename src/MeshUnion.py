@@ -0,0 +1,731 @@
+import numpy as np
+
+from StlUtils import IndexedMesh, MeshAssembler, weldVertices, cleanFaces, edgeReport
+
+
+#Parts Known to Be Cylinders About the X Axis, Solid (Hub) and Hollow (Wall)
+hubNames = ('hub', 'mountCan')
+wallNames = ('endWall', 'duct')
+
+#Column Count Is Doubled Until Every Blade Footprint Gets Its Own Patch of Cells
+maxRefine = 6
+
+
+################################
+##Function: Radius
+#Distance from the X axis
+##Inputs:
+#points: (..., 3) points (array)
+##Returns:
+#radius: (...) distances (array)
+################################
+def Radius(points):
+    return np.hypot(points[..., 1], points[..., 2])
+
+
+################################
+##Function: LeaveSolid
+#Where edges starting inside a cylinder (or duct) about
+#the X axis first leave it, through a side or an end
+##Inputs:
+#start: (E, 3) edge starts, inside the solid
+#delta: (E, 3) edge directions, end - start
+#inner: inner radius, 0 for a solid cylinder (float)
+#outer: outer radius (float)
+#x0, x1: ends (float)
+##Returns:
+#t: (E) fraction of each edge (array)
+################################
+def LeaveSolid(start, delta, inner, outer, x0, x1):
+    t = np.ones(start.shape[0])
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        #Through an End
+        end = start[:, 0] + delta[:, 0]
+        t = np.where(end > x1, np.minimum(t, (x1 - start[:, 0]) / delta[:, 0]), t)
+        t = np.where(end < x0, np.minimum(t, (x0 - start[:, 0]) / delta[:, 0]), t)
+
+        #|start + t delta| in the YZ Plane Against Each Radius
+        a = delta[:, 1]**2 + delta[:, 2]**2
+        b = 2 * (start[:, 1] * delta[:, 1] + start[:, 2] * delta[:, 2])
+        c = start[:, 1]**2 + start[:, 2]**2
+        moving = a > 0
+
+        #Out Through the Outer Side, the Larger Root
+        root = np.sqrt(np.maximum(b**2 - 4 * a * (c - outer**2), 0))
+        t = np.where(moving & (a + b + c - outer**2 > 0), np.minimum(t, (-b + root) / (2 * a)), t)
+
+        #In Through the Inner Side (of a Duct), the Smaller Root
+        if inner > 0:
+            discriminant = b**2 - 4 * a * (c - inner**2)
+            crossing = (-b - np.sqrt(np.maximum(discriminant, 0))) / (2 * a)
+            t = np.where(moving & (discriminant > 0) & (crossing >= 0) & (crossing <= 1), np.minimum(t, crossing), t)
+
+    return np.clip(t, 0, 1)
+
+
+################################
+##Function: ClipSolid
+#Cuts a mesh along the surface of a cylinder (or duct)
+#about the X axis, ends included, and keeps what lies
+#outside of it. Crossing edges are cut exactly where
+#they leave the solid, once per edge, so neighbouring
+#faces share the cut vertex
+##Inputs:
+#vertices: (V, 3) vertex array
+#faces: (F, 3) vertex indices
+#inner: inner radius, 0 for a solid cylinder (float)
+#outer: outer radius (float)
+#x0, x1: ends (float)
+##Returns:
+#vertices: (V', 3) vertices, cut vertices appended (float64)
+#faces: (F', 3) kept and split faces
+#loops: cut vertex indices of every closed cut, in
+#       the order the kept faces walk them (list)
+################################
+def ClipSolid(vertices, faces, inner, outer, x0, x1):
+    vertices = np.asarray(vertices, dtype = np.float64)
+    faces = np.asarray(faces)
+    radius = Radius(vertices)
+    kept = (radius < inner) | (radius > outer) | (vertices[:, 0] < x0) | (vertices[:, 0] > x1)
+    count = kept[faces].sum(axis = 1)
+
+    crossing = (count == 1) | (count == 2)
+    whole = faces[count == 3]
+    if not crossing.any():
+        return vertices, whole, []
+
+    #Rotate Each Cut Face so Its Odd Vertex (the Only Kept or the Only Dropped One) Comes First
+    split = faces[crossing]
+    one = count[crossing] == 1
+    odd = np.where(one[:, None], kept[split], ~kept[split]).argmax(axis = 1)
+    split = np.take_along_axis(split, (np.arange(3)[None, :] + odd[:, None]) % 3, axis = 1)
+
+    #One Cut Vertex per Crossing Edge, Walked From Its Inside End
+    edges = np.sort(np.concatenate((split[:, [0, 1]], split[:, [0, 2]])), axis = 1)
+    unique, inverse = np.unique(edges, axis = 0, return_inverse = True)
+    swap = kept[unique[:, 0]]
+    start = vertices[np.where(swap, unique[:, 1], unique[:, 0])]
+    delta = vertices[np.where(swap, unique[:, 0], unique[:, 1])] - start
+    t = LeaveSolid(start, delta, inner, outer, x0, x1)
+
+    cut = vertices.shape[0] + inverse.ravel().reshape(2, -1)
+    p, q, r = split.T
+    faces = np.concatenate((whole,
+                            np.stack((p, cut[0], cut[1]), axis = 1)[one],
+                            np.stack((cut[0], q, r), axis = 1)[~one],
+                            np.stack((cut[0], r, cut[1]), axis = 1)[~one]))
+    vertices = np.vstack((vertices, start + t[:, None] * delta))
+
+    #The Cut Edges, as Walked by the Kept Faces
+    boundary = np.concatenate((np.stack((cut[0], cut[1]), axis = 1)[one], np.stack((cut[1], cut[0]), axis = 1)[~one]))
+
+    return vertices, faces, ChainLoops(boundary)
+
+
+################################
+##Function: ChainLoops
+#Chains directed edges into closed loops
+##Inputs:
+#edges: (E, 2) directed vertex index pairs
+##Returns:
+#loops: vertex indices of every loop (list)
+################################
+def ChainLoops(edges):
+    following = dict(zip(edges[:, 0].tolist(), edges[:, 1].tolist()))
+    if len(following) != edges.shape[0]:
+        raise ValueError("cut edges do not form simple loops, is the mesh closed?")
+
+    loops = []
+    while following:
+        start, vertex = following.popitem()
+        loop = [start]
+        while vertex != start:
+            loop.append(vertex)
+            if vertex not in following:
+                raise ValueError("cut edges do not form closed loops, is the mesh closed?")
+            vertex = following.pop(vertex)
+        loops.append(np.array(loop))
+
+    return loops
+
+
+################################
+##Function: FillHoles
+#Closes every hole of a mesh with a fan, the fan
+#faces wind the same way as the faces around them
+##Inputs:
+#faces: (F, 3) vertex indices
+##Returns:
+#faces: (F', 3) vertex indices, hole faces appended
+################################
+def FillHoles(faces):
+    #A Hole Walks Each Open Edge the Other Way
+    boundary = edgeReport(faces)['boundary']
+    if not boundary.size:
+        return faces
+
+    edges = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2).astype(np.int64)
+    size = int(faces.max()) + 1
+    keys = np.sort(edges, axis = 1)
+    openEdges = edges[np.isin(keys[:, 0] * size + keys[:, 1], boundary[:, 0] * size + boundary[:, 1])]
+
+    fans = [np.stack((np.full(loop.size - 2, loop[0]), loop[1:-1], loop[2:]), axis = 1) for loop in ChainLoops(openEdges[:, ::-1])]
+
+    return np.concatenate([faces] + fans)
+
+
+################################
+##Function: BridgeHoles
+#Joins holes to the polygon around them, each by a
+#cut from its rightmost vertex to the nearest polygon
+#vertex it can see, so the result is one polygon
+#walking every loop
+##Inputs:
+#outer: vertex indices of the polygon, counter clockwise (array)
+#outerPoints: (n, 2) polygon points
+#holes: (indices, (m, 2) points) of every hole, clockwise (list)
+##Returns:
+#indices: vertex indices of the joined polygon (array)
+#points: (n', 2) its points
+################################
+def BridgeHoles(outer, outerPoints, holes):
+    indices, points = np.asarray(outer), np.asarray(outerPoints, dtype = np.float64)
+    holes = sorted(holes, key = lambda hole: -hole[1][:, 0].max())
+
+    def cross(a, b, c):
+        return (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0])
+
+    for n, (hole, holePoints) in enumerate(holes):
+        h = int(holePoints[:, 0].argmax())
+        target = holePoints[h]
+
+        #Every Edge the Cut Must Not Cross: the Polygon So Far and the Holes Still to Come
+        starts = np.concatenate([points] + [other[1] for other in holes[n:]])
+        ends = np.concatenate([np.roll(points, -1, axis = 0)] + [np.roll(other[1], -1, axis = 0) for other in holes[n:]])
+
+        for k in np.argsort(((points - target) ** 2).sum(axis = 1)):
+            corner, before, after = points[k], points[k - 1], points[(k + 1) % len(points)]
+
+            #Leaving the Corner Into the Polygon
+            if cross(before, corner, after) >= 0:
+                inside = cross(corner, target, before) > 0 and cross(target, corner, after) > 0
+            else:
+                inside = not (cross(corner, target, after) >= 0 and cross(target, corner, before) >= 0)
+            if not inside:
+                continue
+
+            crossed = (cross(corner, target, starts) * cross(corner, target, ends) < 0) & \
+                      (cross(starts, ends, corner) * cross(starts, ends, target) < 0)
+            if not crossed.any():
+                break
+        else:
+            raise ValueError("a blade footprint hole can not be joined to its outline")
+
+        loop = np.roll(np.arange(len(hole)), -h)
+        indices = np.concatenate((indices[:k + 1], hole[loop], [hole[h]], indices[k:]))
+        points = np.concatenate((points[:k + 1], holePoints[loop], [target], points[k:]))
+
+    return indices, points
+
+
+################################
+##Function: EarClip
+#Triangulates a polygon, holes already bridged in, by
+#cutting off one convex corner with no other vertex
+#inside it at a time, so no face folds over
+##Inputs:
+#indices: vertex indices of the polygon, counter clockwise (array)
+#points: (n, 2) polygon points
+##Returns:
+#faces: (n - 2, 3) vertex indices, counter clockwise
+################################
+def EarClip(indices, points):
+    n = len(indices)
+    following = np.roll(np.arange(n), -1)
+    preceding = np.roll(np.arange(n), 1)
+    left = np.ones(n, dtype = bool)
+    scale = float(np.ptp(points, axis = 0).max()) ** 2 or 1.0
+
+    def area(a, b, c):
+        return (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0])
+
+    faces = []
+    corner, tried = 0, 0
+    while n > 3:
+        a, c = preceding[corner], following[corner]
+        triangle = points[[a, corner, c]]
+        ear = area(*triangle) > 1e-12 * scale
+
+        #No Other Vertex Inside or On It, Bridge Copies of Its Corners Aside
+        if ear:
+            others = points[left]
+            inside = (area(triangle[0], triangle[1], others) >= 0) & (area(triangle[1], triangle[2], others) >= 0) & \
+                     (area(triangle[2], triangle[0], others) >= 0)
+            inside &= ~(others[:, None] == triangle[None]).all(axis = 2).any(axis = 1)
+            ear = not inside.any()
+
+        #Nothing Clean Left (Touching Loops), the Widest Corner Still Closes It
+        if not ear and tried > n:
+            ring = np.nonzero(left)[0]
+            corner = ring[area(points[preceding[ring]], points[ring], points[following[ring]]).argmax()]
+            a, c = preceding[corner], following[corner]
+            ear = True
+
+        if ear:
+            faces.append((indices[a], indices[corner], indices[c]))
+            following[a], preceding[c] = c, a
+            left[corner] = False
+            n -= 1
+            corner, tried = c, 0
+        else:
+            corner, tried = c, tried + 1
+
+    a = np.nonzero(left)[0][0]
+    faces.append((indices[a], indices[following[a]], indices[following[following[a]]]))
+
+    return np.array(faces)
+
+
+################################
+##Function: PointsInPolygon
+#Even-odd test of points against a closed polygon
+##Inputs:
+#points: (n, 2) points
+#polygon: (m, 2) polygon corners
+##Returns:
+#inside: (n) bool
+################################
+def PointsInPolygon(points, polygon):
+    a, b = polygon, np.roll(polygon, -1, axis = 0)
+    x, y = points[:, 0, None], points[:, 1, None]
+
+    straddles = (a[:, 1] > y) != (b[:, 1] > y)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        crossing = a[:, 0] + (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+
+    return ((straddles & (x < crossing)).sum(axis = 1) % 2).astype(bool)
+
+
+################################
+##Function: FootprintCells
+#Grid cells a blade footprint covers, grown until they
+#form one simply connected patch with no cells
+#touching only at a corner, so its border is a single
+#loop
+##Inputs:
+#footprint: (n, 2) footprint loop (angle, s), angle
+#           unwrapped and relative to the grid
+#columns: grid columns around the axis (int)
+#levels: (rows + 1) row edges along s, ascending (array)
+##Returns:
+#cells: (rows, columns) covered cells (bool)
+################################
+def FootprintCells(footprint, columns, levels):
+    rows = levels.size - 1
+    step = np.array([2 * np.pi / columns, np.diff(levels).min()])
+
+    #Every Cell the Outline Passes Through, Sampled at 1/32 of a Cell
+    following = np.roll(footprint, -1, axis = 0)
+    count = np.ceil(np.abs((following - footprint) / step).max(axis = 1) * 32).astype(int) + 1
+    edge = np.repeat(np.arange(footprint.shape[0]), count)
+    t = (np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)) / np.repeat(count, count)
+    samples = footprint[edge] + t[:, None] * (following - footprint)[edge]
+
+    column = np.floor(samples[:, 0] / step[0]).astype(int)
+    row = np.clip(np.searchsorted(levels, samples[:, 1], side = 'right') - 1, 0, rows - 1)
+
+    #Window One Cell Bigger, Columns Unwrapped
+    left, right = column.min() - 1, column.max() + 1
+    bottom, top = max(row.min() - 1, 0), min(row.max() + 1, rows - 1)
+    if right - left + 1 > columns:
+        raise ValueError("a blade footprint wraps around the whole wall")
+
+    window = np.zeros((top - bottom + 1, right - left + 1), dtype = bool)
+    window[row - bottom, column - left] = True
+
+    centers = np.stack(np.meshgrid((np.arange(left, right + 1) + 0.5) * step[0], (levels[bottom:top + 1] + levels[bottom + 1:top + 2]) / 2), axis = 2)
+    window |= PointsInPolygon(centers.reshape(-1, 2), footprint).reshape(window.shape)
+
+    #A Thin Trailing Edge Can Cover a Grid Corner Without Reaching a Center
+    corners = np.stack(np.meshgrid(np.arange(left, right + 2) * step[0], levels[bottom:top + 2]), axis = 2)
+    inside = PointsInPolygon(corners.reshape(-1, 2), footprint).reshape(corners.shape[:2])
+    window |= inside[:-1, :-1] | inside[:-1, 1:] | inside[1:, :-1] | inside[1:, 1:]
+
+    #Only the Window Sides Not Lying on a Rim Lead Out of a Pocket
+    seeds = np.zeros_like(window)
+    seeds[:, [0, -1]] = True
+    if bottom > 0:
+        seeds[0] = True
+    if top < rows - 1:
+        seeds[-1] = True
+
+    changed = True
+    while changed:
+        before = window.copy()
+
+        #Corner-Only Contacts Get One of the Other Two Cells
+        corner = window[:-1, :-1] & window[1:, 1:] & ~window[:-1, 1:] & ~window[1:, :-1]
+        window[:-1, 1:] |= corner
+        corner = window[:-1, 1:] & window[1:, :-1] & ~window[:-1, :-1] & ~window[1:, 1:]
+        window[:-1, :-1] |= corner
+
+        #Free Cells That Can't Reach the Window Side Are Enclosed
+        reach = seeds & ~window
+        while True:
+            grown = reach.copy()
+            grown[1:] |= reach[:-1]
+            grown[:-1] |= reach[1:]
+            grown[:, 1:] |= reach[:, :-1]
+            grown[:, :-1] |= reach[:, 1:]
+            grown &= ~window
+            if (grown == reach).all():
+                break
+            reach = grown
+        window |= ~reach
+
+        changed = (window != before).any()
+
+    cells = np.zeros((rows, columns), dtype = bool)
+    cells[bottom:top + 1][:, np.arange(left, right + 1) % columns] |= window
+
+    return cells
+
+
+################################
+##Function: CellsBorder
+#Border of a patch of grid cells as one loop of grid
+#vertices, counter clockwise in (angle, s)
+##Inputs:
+#cells: (rows, columns) patch (bool)
+##Returns:
+#loop: grid vertex indices, row * columns + column (array)
+################################
+def CellsBorder(cells):
+    rows, columns = cells.shape
+    i, j = np.nonzero(cells)
+    corners = [i * columns + j % columns, i * columns + (j + 1) % columns,
+               (i + 1) * columns + (j + 1) % columns, (i + 1) * columns + j % columns]
+    edges = np.concatenate([np.stack((corners[k], corners[(k + 1) % 4]), axis = 1) for k in range(4)])
+
+    #Edges Shared by Two Cells Are Walked Both Ways
+    size = (rows + 1) * columns
+    keys = edges[:, 0] * size + edges[:, 1]
+    border = edges[~np.isin(keys, edges[:, 1] * size + edges[:, 0])]
+
+    loops = ChainLoops(border)
+    if len(loops) != 1:
+        raise ValueError("a blade footprint is not a single patch")
+
+    return loops[0]
+
+
+################################
+##Function: Unroll
+#Position of points on the surface of a cylinder (or
+#duct) along a path running in over the start cap,
+#along the side and out over the end cap: minus the
+#distance from the rim on the start cap, x - x0 on the
+#side and length plus the distance from the rim on the
+#end cap
+##Inputs:
+#points: (n, 3) points on the surface
+#radius: radius of the side (float)
+#x0, x1: ends (float)
+##Returns:
+#s: (n) positions (array)
+################################
+def Unroll(points, radius, x0, x1):
+    depth = np.abs(Radius(points) - radius)
+    toStart, toEnd = np.abs(points[:, 0] - x0), np.abs(points[:, 0] - x1)
+
+    s = np.clip(points[:, 0], x0, x1) - x0
+    s = np.where((toStart < depth) & (toStart <= toEnd), -depth, s)
+    s = np.where((toEnd < depth) & (toEnd < toStart), x1 - x0 + depth, s)
+
+    return s
+
+
+################################
+##Function: CylinderSurface
+#Side of a cylinder about the X axis, and as much of
+#its end caps as the footprints need, as one grid in
+#(angle, unrolled position) with a hole for every
+#footprint. The grid is refined until the footprints
+#lie in separate patches of cells, then the ring
+#between each patch border and its footprint is ear
+#clipped. A loop inside a footprint (a blade root
+#curling back over the surface) is an island of the
+#surface and is filled the same way. Normals point
+#away from the axis on the side
+##Inputs:
+#radius: radius of the side (float)
+#x0, x1: ends (float)
+#depth: how far the caps reach from the rim (float)
+#inward: caps run in towards the axis (a hub) rather
+#        than out (the inside of a duct) (bool)
+#columns: grid columns around the axis (int)
+#offset: angle of the first column (float)
+#footprints: footprint loops, indices into points (list)
+#points: vertices the footprints index (array)
+#first: index of the first new vertex (int)
+##Returns:
+#vertices: ((rows + 1) * columns, 3) grid vertices
+#faces: (F, 3) vertex indices, new ones from first on
+#columns: grid columns used (int)
+#rows: grid rows used (int)
+################################
+def CylinderSurface(radius, x0, x1, depth, inward, columns, offset, footprints, points, first):
+    length = x1 - x0
+    outlines = []
+    for footprint in footprints:
+        angle = np.unwrap(np.arctan2(points[footprint, 2], points[footprint, 1]) - offset)
+        s = Unroll(points[footprint], radius, x0, x1)
+        if s.min() <= -depth or s.max() >= length + depth:
+            raise ValueError("a blade runs through the hub or wall")
+
+        #Counter Clockwise in (Angle, s)
+        if np.sum(angle * np.roll(s, -1) - np.roll(angle, -1) * s) < 0:
+            footprint, angle, s = footprint[::-1], angle[::-1], s[::-1]
+        outlines.append((footprint, angle - angle[0] + np.mod(angle[0], 2 * np.pi), s))
+
+    #How Many Loops Each Loop Lies In, Whichever Turn Around the Axis They Were Unwrapped To
+    def within(inner, outer):
+        point = np.array([[inner[1][0] + turn * 2 * np.pi, inner[2][0]] for turn in (-1, 0, 1)])
+        return PointsInPolygon(point, np.stack(outer[1:], axis = 1)).any()
+    nesting = [[m for m, other in enumerate(outlines) if m != n and within(outline, other)] for n, outline in enumerate(outlines)]
+    outermost = [n for n in range(len(outlines)) if not nesting[n]]
+
+    #Deepest Footprint Point on Either Cap
+    reach = [max([0.0] + [float(-s.min()) for footprint, angle, s in outlines]),
+             max([0.0] + [float(s.max() - length) for footprint, angle, s in outlines])]
+
+    for level in range(maxRefine + 1):
+        count = columns * 2**level
+        step = radius * 2 * np.pi / count
+        rows = max(1, int(round(length / step))) if footprints else 1
+
+        #A Hub Cap Is Only Gridded Past the Deepest Footprint, the Rest Is Fanned
+        #From the Axis. A Duct Cap Always Reaches Its Outer Side
+        caps = []
+        for capReach in reach:
+            if inward:
+                extent = min(capReach + 2 * step, (capReach + depth) / 2) if capReach > 0 else 0.0
+                caps.append(np.linspace(0, extent, int(np.ceil(extent / step)) + 1))
+            else:
+                caps.append(np.linspace(0, depth, int(np.ceil(depth / step)) + 1 if capReach > 0 else 2))
+        levels = np.concatenate((-caps[0][:0:-1], np.linspace(0, length, rows + 1), length + caps[1][1:]))
+        rows = levels.size - 1
+
+        #Each Outermost Footprint Gets Its Own Patch, Not Even Touching Another at a Corner
+        owner = np.full((rows, count), -1)
+        patches = []
+        for n in outermost:
+            footprint, angle, s = outlines[n]
+            cells = FootprintCells(np.stack((angle, s), axis = 1), count, levels)
+            grown = cells.copy()
+            grown[1:] |= cells[:-1]
+            grown[:-1] |= cells[1:]
+            grown |= np.roll(grown, 1, axis = 1) | np.roll(grown, -1, axis = 1)
+            if (grown & (owner >= 0)).any():
+                break
+            owner[cells] = n
+            patches.append(cells)
+        else:
+            break
+
+        if level == maxRefine:
+            raise ValueError("blade footprints are too close together to separate")
+
+    def flat(n, center):
+        footprint, angle, s = outlines[n]
+        angle = angle - 2 * np.pi * np.round((angle.mean() - center) / (2 * np.pi))
+        return footprint, np.stack((radius * angle, s), axis = 1)
+
+    #Ring Between Each Patch Border and Its Footprint, Walked Clockwise as a Hole
+    fills = []
+    for n, cells in zip(outermost, patches):
+        border = CellsBorder(cells)
+        center = outlines[n][1].mean()
+
+        #Unwrapped Next to the Footprint
+        borderAngle = (border % count) * 2 * np.pi / count
+        borderAngle = center + np.mod(borderAngle - center + np.pi, 2 * np.pi) - np.pi
+
+        footprint, flatPoints = flat(n, center)
+        fills.append(EarClip(*BridgeHoles(first + border, np.stack((radius * borderAngle, levels[border // count]), axis = 1),
+                                          [(footprint[::-1], flatPoints[::-1])])))
+
+    #Islands Inside a Footprint, With the Footprints Inside Them as Holes
+    for n, outline in enumerate(outlines):
+        if len(nesting[n]) % 2:
+            center = outline[1].mean()
+            holes = [flat(m, center) for m, other in enumerate(nesting) if n in other and len(other) == len(nesting[n]) + 1]
+            fills.append(EarClip(*BridgeHoles(*flat(n, center), [(hole[::-1], holePoints[::-1]) for hole, holePoints in holes])))
+
+    #Rolled Back Onto the Side and Caps
+    capDepth = np.maximum(-levels, 0) + np.maximum(levels - length, 0)
+    ringX = np.clip(x0 + levels, x0, x1)
+    ringRadius = radius - capDepth if inward else radius + capDepth
+    theta = offset + np.arange(count) * 2 * np.pi / count
+    vertices = np.stack((np.repeat(ringX, count), np.outer(ringRadius, np.cos(theta)).ravel(), np.outer(ringRadius, np.sin(theta)).ravel()), axis = 1)
+
+    #Two Counter Clockwise Triangles per Free Cell
+    i, j = np.nonzero(owner < 0)
+    a, b = first + i * count + j, first + i * count + (j + 1) % count
+    c, d = b + count, a + count
+    faces = [np.stack((a, b, c), axis = 1), np.stack((a, c, d), axis = 1)] + fills
+
+    return vertices, np.concatenate(faces), count, rows
+
+
+################################
+##Function: CylinderGeometry
+#Radii, ends, resolution and first vertex angle of a
+#part built as a cylinder (or duct) about the X axis
+##Inputs:
+#part: part mesh (indexed mesh)
+##Returns:
+#inner: smallest vertex radius, 0 for a solid cylinder (float)
+#outer: largest vertex radius (float)
+#x0, x1: ends (float)
+#columns: vertices around one end (int)
+#offset: angle of the first of them (float)
+################################
+def CylinderGeometry(part):
+    vertices = part.vertices.astype(np.float64)
+    radius = Radius(vertices)
+    outer = float(radius.max())
+    x0, x1 = float(vertices[:, 0].min()), float(vertices[:, 0].max())
+    tolerance = 1e-4 * max(outer, x1 - x0)
+
+    rim = vertices[(np.abs(radius - outer) < tolerance) & (np.abs(vertices[:, 0] - x0) < tolerance)]
+    step = 2 * np.pi / rim.shape[0]
+    offset = float(np.mod(np.arctan2(rim[:, 2], rim[:, 1]), step).min())
+    inner = float(radius.min()) if radius.min() > tolerance else 0.0
+
+    return inner, outer, x0, x1, rim.shape[0], offset
+
+
+################################
+##Function: UnionObject
+#Boolean union of the blades of one rotor or stator
+#with its hub (or mount can) and end wall (or duct).
+#Blades are cut exactly where they enter the hub or
+#wall, sides or ends, and the hub and wall are rebuilt
+#as grids with a hole for every blade footprint,
+#stitched to the blade, so blades and the parts they
+#reach form one closed shell. Blade roots hanging
+#past an end are kept. Coincident blade copies are merged
+#first. Parts the blades don't reach stay separate
+#closed shells
+##Inputs:
+#obj: built rotor or stator, parts labelled (indexed mesh)
+##Returns:
+#obj: union, parts still labelled (indexed mesh)
+################################
+def UnionObject(obj):
+    names = obj.names
+    if obj.labels is None or 'blades' not in names:
+        raise ValueError("union needs a rotor or stator with labelled parts")
+    hubName = next((name for name in hubNames if name in names), None)
+    wallName = next((name for name in wallNames if name in names), None)
+
+    #Blades Welded Into Closed, Outward Facing Solids, Copies on Top of Each Other Merged
+    blades = obj.part('blades')
+    vertices = blades.vertices.astype(np.float64)
+    weld, used = weldVertices(vertices, 1e-6 * float(np.ptp(vertices, axis = 0).max()))
+    vertices = vertices[used]
+    faces = weld[blades.faces]
+    faces = FillHoles(faces[cleanFaces(faces)])
+    corners = vertices[faces]
+    if np.einsum('ij,ij->i', corners[:, 0], np.cross(corners[:, 1], corners[:, 2])).sum() < 0:
+        faces = faces[:, ::-1]
+
+    #Blades Cut Where They Enter the Hub or Wall, Overhanging Ends Included
+    if hubName:
+        _, radius, x0, x1, columns, offset = CylinderGeometry(obj.part(hubName))
+        vertices, faces, hubFootprints = ClipSolid(vertices, faces, 0.0, radius, x0, x1)
+        hub = (radius, x0, x1, columns, offset, hubFootprints)
+    if wallName:
+        inner, outer, wx0, wx1, wallColumns, wallOffset = CylinderGeometry(obj.part(wallName))
+        vertices, faces, wallFootprints = ClipSolid(vertices, faces, inner, outer, wx0, wx1)
+
+    allVertices = [vertices]
+    allFaces = [(names.index('blades'), faces)]
+    size = vertices.shape[0]
+
+    def add(label, newVertices, newFaces):
+        nonlocal size
+        allVertices.append(newVertices)
+        allFaces.append((label, newFaces))
+        size += newVertices.shape[0]
+
+    if hubName:
+        radius, x0, x1, columns, offset, footprints = hub
+        side, sideFaces, columns, rows = CylinderSurface(radius, x0, x1, radius, True, columns, offset, footprints, vertices, size)
+
+        #Rest of the Caps Fanned From the Axis, Facing Out of Each End
+        bottom = size + np.arange(columns)
+        top = bottom + rows * columns
+        ends = size + side.shape[0] + np.arange(2)
+        following = np.roll(np.arange(columns), -1)
+        caps = np.concatenate((np.stack((np.full(columns, ends[0]), bottom[following], bottom), axis = 1),
+                               np.stack((np.full(columns, ends[1]), top, top[following]), axis = 1)))
+        add(names.index(hubName), np.vstack((side, [[x0, 0, 0], [x1, 0, 0]])), np.concatenate((sideFaces, caps)))
+
+    if wallName:
+        #Inner Side and Caps Face the Axis, Outer Side Is Two Bands Between the Cap Rims. The
+        #Middle Ring Keeps Its Edges Apart From a Stitch Running Between the Rims on the Inside
+        grid, gridFaces, columns, rows = CylinderSurface(inner, wx0, wx1, outer - inner, False, wallColumns, wallOffset, wallFootprints, vertices, size)
+        middle = grid[:columns].copy()
+        middle[:, 0] = (wx0 + wx1) / 2
+
+        following = np.roll(np.arange(columns), -1)
+        rings = [size + np.arange(columns), size + grid.shape[0] + np.arange(columns), size + rows * columns + np.arange(columns)]
+        band = np.concatenate([np.concatenate((np.stack((start, start[following], end[following]), axis = 1),
+                                               np.stack((start, end[following], end), axis = 1))) for start, end in zip(rings, rings[1:])])
+        add(names.index(wallName), np.vstack((grid, middle)), np.concatenate((gridFaces[:, ::-1], band)))
+
+    #Parts in Their Original Order, Unused Vertices Dropped
+    allFaces.sort(key = lambda item: item[0])
+    labels = np.concatenate([np.full(len(partFaces), label, dtype = np.int32) for label, partFaces in allFaces])
+    used, faces = np.unique(np.concatenate([partFaces for label, partFaces in allFaces]), return_inverse = True)
+
+    return IndexedMesh(np.vstack(allVertices)[used], faces.reshape(-1, 3), labels, names)
+
+
+################################
+##Function: UnionParts
+#UnionObject of a rotor or stator, or of every rotor
+#and stator in a compressor (parts labelled
+#'stage<N>/rotor/hub' etc.), other parts are kept
+##Inputs:
+#obj: rotor, stator or compressor, parts labelled (indexed mesh)
+##Returns:
+#obj: union, parts still labelled (indexed mesh)
+################################
+def UnionParts(obj):
+    names = obj.names
+    prefixes = [name[:-len('blades')] for name in names if name == 'blades' or name.endswith('/blades')]
+    if obj.labels is None or not prefixes:
+        raise ValueError("union needs a rotor or stator with labelled parts")
+    if prefixes == ['']:
+        return UnionObject(obj)
+
+    #One Rotor or Stator per Prefix, Taken Out With Its Own Part Names
+    assembler = MeshAssembler()
+    done = set()
+    for name in names:
+        prefix = next((prefix for prefix in prefixes if prefix and name.startswith(prefix)), None)
+        if prefix is None:
+            assembler.add(obj.part(name), name)
+        elif prefix not in done:
+            done.add(prefix)
+            group = [n for n, other in enumerate(names) if other.startswith(prefix)]
+            selected = np.isin(obj.labels, group)
+            used, faces = np.unique(obj.faces[selected], return_inverse = True)
+            labels = np.searchsorted(group, obj.labels[selected])
+            part = IndexedMesh(obj.vertices[used], faces.reshape(-1, 3), labels, [names[n][len(prefix):] for n in group])
+            assembler.add(UnionObject(part), prefix[:-1])
+
+    return assembler.build()
@@ -7,7 +7,10 @@ except ImportError:
     from PyQt5.QtGui import *
     from PyQt5.QtWidgets import *
     
-from BladeRender import RenderRotor, RenderStator
+from BladeRender import MeshView, RenderRotor, RenderStator
+import GLRender
+from BladeBuild import BuildCancelled, PreviewRotor, PreviewStator
+from MeshCache import CachedBuildRotor, CachedBuildStator
 
 
 ################################
@@ -19,21 +22,38 @@ from BladeRender import RenderRotor, RenderStator
 #object: stage properties (dict)
 #stage: stator ('S') or rotor ('R')
 #checked: if endwall was checked (bool)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+#obj: already built object to show instead of building it (indexed mesh)
+#preview: coarse object displayed in place of obj (indexed mesh)
+#gl: show obj in an OpenGL view, falls back to the plot
+#    when OpenGL isn't available (bool)
 ##Returns:
 #self.window.getObj(): object mesh
 ################################
 class RenderWindow(QWidget):
-    def __init__(self, parent, common, object, stage, checked = False):
+    def __init__(self, parent, common, object, stage, checked = False, nspan = 1, npts = 24, tolerance = None, obj = None, preview = None, gl = False):
         super(RenderWindow, self).__init__(parent)
         
         self.commonVars = common
         self.objectVars = object
         self.verticalLayout = QVBoxLayout()
         
-        if stage == 'R':
-            self.window = RenderRotor(self, self.commonVars, self.objectVars, checked)
+        self.obj = obj
+        self.preview = preview
+        
+        if obj is not None and gl and GLRender.ContextAvailable():
+            self.window = GLRender.GLMeshView(self, obj, preview)
+            
+            #Queued, the GL View Is Still Setting Up When It Fails
+            self.window.unavailable.connect(self.useMeshView, Qt.QueuedConnection)
+        elif obj is not None:
+            self.window = MeshView(self, obj, preview)
+        elif stage == 'R':
+            self.window = RenderRotor(self, self.commonVars, self.objectVars, checked, nspan, npts, tolerance)
         else:
-            self.window = RenderStator(self, self.commonVars, self.objectVars)
+            self.window = RenderStator(self, self.commonVars, self.objectVars, nspan, npts, tolerance)
             
         self.window.show()
         self.window.setMinimumSize(QSize(0, 200))
@@ -47,6 +67,120 @@ class RenderWindow(QWidget):
     def returnObject(self):
         return self.window.getObj()
         
+        
+    ################################
+    ##Function: useMeshView
+    #Replaces an OpenGL view that couldn't get a
+    #context with the plot of the preview
+    ##Inputs: 
+    #self: RenderWindow
+    ##Returns:
+    #none
+    ################################
+    def useMeshView(self):
+        self.verticalLayout.removeWidget(self.window)
+        self.window.setParent(None)
+        
+        self.window = MeshView(self, self.obj, self.preview)
+        self.window.setMinimumSize(QSize(0, 200))
+        self.window.setObjectName("window")
+        self.verticalLayout.addWidget(self.window)
+        
+        
+################################
+##Function: BuildSignals
+#Signals a BuildWorker reports back on, they are
+#delivered to the GUI thread by Qt
+################################
+class BuildSignals(QObject):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    
+    
+################################
+##Function: BuildWorker
+#Builds a rotor or stator mesh, and its coarse
+#preview, on a QThreadPool thread so the window keeps
+#responding, both are handed back through
+#signals.finished
+##Inputs: 
+#common: common properties (dict)
+#object: stage properties (dict)
+#stage: stator ('S') or rotor ('R')
+#checked: if endwall was checked (bool)
+#nspan: blade span divisions (int)
+#npts: blade chordwise points per surface (int)
+#tolerance: adaptive blade span refinement tolerance (float)
+##Returns:
+#none
+################################
+class BuildWorker(QRunnable):
+    def __init__(self, common, object, stage, checked = False, nspan = 1, npts = 24, tolerance = None):
+        super(BuildWorker, self).__init__()
+        
+        #Copy the Properties so Edits in the Window Don't Reach the Running Build
+        self.commonVars = dict(common)
+        self.objectVars = dict(object)
+        self.stage = stage
+        self.checked = checked
+        self.nspan = nspan
+        self.npts = npts
+        self.tolerance = tolerance
+        
+        self.signals = BuildSignals()
+        self.isCancelled = False
+        
+        
+    ################################
+    ##Function: cancel
+    #Asks the build to stop at its next step, safe
+    #to call from the GUI thread
+    ##Inputs: 
+    #self: BuildWorker
+    ##Returns:
+    #none
+    ################################
+    def cancel(self):
+        self.isCancelled = True
+        
+        
+    ################################
+    ##Function: report
+    #Progress callback for the builders, stops the
+    #build once it was cancelled
+    ##Inputs: 
+    #self: BuildWorker
+    #fraction: fraction of the build done (float)
+    ##Returns:
+    #none
+    ################################
+    def report(self, fraction):
+        if self.isCancelled:
+            raise BuildCancelled()
+        self.signals.progress.emit(int(fraction * 100))
+        
+        
+    def run(self):
+        try:
+            if self.stage == 'R':
+                obj = CachedBuildRotor(self.commonVars, self.objectVars, self.checked, self.nspan, self.npts, self.tolerance, self.report)
+                preview = PreviewRotor(self.commonVars, self.objectVars, self.checked)
+            else:
+                obj = CachedBuildStator(self.commonVars, self.objectVars, self.nspan, self.npts, self.tolerance, self.report)
+                preview = PreviewStator(self.commonVars, self.objectVars)
+                
+        except BuildCancelled:
+            self.signals.cancelled.emit()
+            
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            
+        else:
+            self.signals.finished.emit(obj, preview)
+            
+            
 ###USED FOR QUICK TESTING
 if __name__ == "__main__":
     import sys
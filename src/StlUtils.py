@@ -1,70 +1,328 @@
 from stl import mesh
 import numpy as np
+import struct
 from BladeCalc import * 
 
 
 ################################
-##Function: drawCylinder
-#Draws cylinder with specified diamter, height and
-#resolution
+##Function: IndexedMesh
+#Compact shared-vertex mesh, float32 vertices and
+#int32 faces with optional per face part labels.
+#Only converted to a numpy-stl mesh for export
+#or rendering.
+#rotate / translate only compose a pending 4x4 pose
+#(transform), it is applied in one pass when the
+#vertices are next needed, or directly into the
+#output by buildBladeRow, MeshAssembler and writeStl
+##Inputs:
+#vertices: (V, 3) vertex array
+#faces: (F, 3) vertex indices
+#labels: index into names for each face (array)
+#names: part names (list)
+##Returns:
+#None
+################################
+class IndexedMesh():
+    def __init__(self, vertices, faces, labels = None, names = None):
+        self._vertices = np.ascontiguousarray(vertices, dtype = np.float32).reshape(-1, 3)
+        self.transform = None
+        self.faces = np.ascontiguousarray(faces, dtype = np.int32).reshape(-1, 3)
+        self.labels = None if labels is None else np.ascontiguousarray(labels, dtype = np.int32)
+        self.names = list(names) if names else []
+        
+        
+    def __len__(self):
+        return self.faces.shape[0]
+        
+        
+    #Posed Vertices, Applies (and Clears) the Pending Transform
+    @property
+    def vertices(self):
+        if self.transform is not None:
+            self._vertices = applyTransform(self._vertices, self.transform)
+            self.transform = None
+        return self._vertices
+        
+        
+    @vertices.setter
+    def vertices(self, vertices):
+        self._vertices = np.ascontiguousarray(vertices, dtype = np.float32).reshape(-1, 3)
+        self.transform = None
+        
+        
+    #Triangle Soup View, Same Layout as mesh.Mesh.vectors
+    @property
+    def vectors(self):
+        return self.vertices[self.faces]
+        
+        
+    @property
+    def points(self):
+        return self.vectors.reshape(-1, 9)
+        
+        
+    @property
+    def nbytes(self):
+        return self._vertices.nbytes + self.faces.nbytes + (0 if self.labels is None else self.labels.nbytes)
+        
+        
+    def copy(self):
+        obj = IndexedMesh(self._vertices.copy(), self.faces.copy(),
+                                 None if self.labels is None else self.labels.copy(), self.names)
+        obj.transform = self.transform
+        return obj
+        
+        
+    #Composes a 4x4 Transform Onto the Pending Pose
+    def transformBy(self, transform):
+        if not self._vertices.flags.writeable:
+            raise ValueError("mesh is read-only, copy it first")
+        self.transform = transform if self.transform is None else self.transform.dot(transform)
+        
+        
+    #Same Convention as mesh.Mesh.rotate
+    def rotate(self, axis, theta):
+        if not theta:
+            return
+        self.transformBy(rotationTransform(axis, theta))
+        
+        
+    def translate(self, offset):
+        self.transformBy(translationTransform(offset))
+        
+        
+    #(Label, Start Face, Stop Face) for Each Run of Equally Labelled Faces
+    def partRanges(self):
+        if self.labels is None or not self.labels.size:
+            return []
+        
+        edges = np.concatenate(([0], np.flatnonzero(np.diff(self.labels)) + 1, [self.labels.size]))
+        
+        return [(self.names[self.labels[start]], int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:])]
+        
+        
+    #Faces Belonging to One Labelled Part
+    def part(self, name):
+        faces = self.faces if self.labels is None else self.faces[self.labels == self.names.index(name)]
+        used, faces = np.unique(faces, return_inverse = True)
+        
+        return IndexedMesh(self.vertices[used], faces.reshape(-1, 3))
+        
+        
+    #Normals Are Only Computed Here (and by writeStl), Once for the Whole Mesh
+    def toMesh(self, normals = True):
+        obj = facesToMesh(self.vertices, self.faces)
+        if normals:
+            obj.normals[:] = faceNormals(obj.vectors)
+            
+        return obj
+        
+        
+    @classmethod
+    def fromMesh(cls, obj):
+        vertices, faces = np.unique(obj.vectors.reshape(-1, 3), axis = 0, return_inverse = True)
+        
+        return cls(vertices, faces.reshape(-1, 3))
+        
+        
+################################
+##Function: rotationTransform
+#4x4 transform (row vector convention, v' = [v 1] M)
+#of rotationMatrix, or a stack of them
+##Inputs:
+#axis: axis to be rotated about (array)
+#theta: angle to rotate (float or array)
+##Returns:
+#transform: (4, 4) or (N, 4, 4) array
+################################
+def rotationTransform(axis, theta):
+    R = rotationMatrix(axis, theta)
+    transform = np.zeros(R.shape[:-2] + (4, 4))
+    transform[..., :3, :3] = R
+    transform[..., 3, 3] = 1
+    
+    return transform
+    
+    
+################################
+##Function: translationTransform
+#4x4 transform that moves by offset
+##Inputs:
+#offset: x, y, z move (array)
+##Returns:
+#transform: (4, 4) array
+################################
+def translationTransform(offset):
+    transform = np.eye(4)
+    transform[3, :3] = offset
+    
+    return transform
+    
+    
+################################
+##Function: applyTransform
+#Applies a 4x4 transform to vertices in one matmul
+##Inputs:
+#vertices: (V, 3) vertex array
+#transform: (4, 4) transform, None for none
+#out: float32 array to write into (array)
+##Returns:
+#vertices: (V, 3) float32 transformed vertices
+################################
+def applyTransform(vertices, transform, out = None):
+    if transform is None:
+        result = vertices
+    else:
+        result = np.dot(vertices, transform[:3, :3])
+        result += transform[3, :3]
+    
+    if out is None:
+        return np.ascontiguousarray(result, dtype = np.float32)
+    out[...] = result
+    return out
+    
+    
+################################
+##Function: ringVertices
+#Vertices evenly spaced around a circle
+##Inputs:
+#radius: radius of circle
+#z: height of circle
+#res: resoltution of shape (num of sides really)
+##Returns:
+#ring: (res, 3) vertex array
+################################
+def ringVertices(radius, z, res):
+    angles = np.deg2rad((360 / res) * np.arange(1, res + 1))
+    
+    return np.stack((radius * np.cos(angles), radius * np.sin(angles), np.full(res, float(z))), axis = 1)
+    
+    
+################################
+##Function: faceNormals
+#Normals of a triangle soup in one vectorized pass,
+#same (unnormalized) convention as numpy-stl
+##Inputs:
+#vectors: (F, 3, 3) triangles
+##Returns:
+#normals: (F, 3) float32 normals
+################################
+def faceNormals(vectors):
+    return np.cross(vectors[:, 1] - vectors[:, 0], vectors[:, 2] - vectors[:, 0]).astype(np.float32, copy = False)
+    
+    
+################################
+##Function: vertexNormals
+#Area weighted vertex normals, the sum of the
+#(unnormalized) normals of every face a vertex is in
+##Inputs:
+#vertices: (V, 3) vertex array
+#faces: (F, 3) vertex indices
+##Returns:
+#normals: (V, 3) unit normals, zero for unused vertices (float32)
+################################
+def vertexNormals(vertices, faces):
+    vertices = np.asarray(vertices, dtype = np.float32)
+    faces = np.asarray(faces, dtype = np.intp)
+    areaNormals = faceNormals(vertices[faces])
+    
+    normals = np.zeros((vertices.shape[0], 3), dtype = np.float32)
+    for corner in range(3):
+        for axis in range(3):
+            normals[:, axis] += np.bincount(faces[:, corner], areaNormals[:, axis], minlength = vertices.shape[0]).astype(np.float32)
+            
+    length = np.linalg.norm(normals, axis = 1, keepdims = True)
+    np.divide(normals, length, out = normals, where = length > 0)
+    
+    return normals
+    
+    
+################################
+##Function: facesToMesh
+#Expands indexed geometry into a mesh with one
+#gather of the vertex array
+##Inputs:
+#vertices: (V, 3) vertex array
+#faces: (F, 3) vertex indices
+##Returns:
+#obj: mesh object
+################################
+def facesToMesh(vertices, faces):
+    obj = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype), calculate_normals = False)
+    obj.vectors[:] = vertices[faces]
+    
+    return obj
+    
+    
+################################
+##Function: uniqueFaces
+#Deletes duplicate faces, keeping the first of each
+##Inputs:
+#faces: (F, 3) vertex indices
+##Returns:
+#faces: (F', 3) int32 vertex indices
+################################
+def uniqueFaces(faces):
+    faces = np.asarray(faces, dtype = np.int32)
+    index = np.unique(faces, axis = 0, return_index = True)[1]
+    
+    return faces[np.sort(index)]
+    
+    
+################################
+##Function: buildCylinder
+#Builds indexed cylinder with specified diamter,
+#height and resolution
 ##Inputs:
 #dia: diameter of cylinder
 #height: height of cylinder
 #res: resoltution of shape (num of sides really)
 ##Returns:
-#cylinder: cylinder mesh object
+#cylinder: cylinder indexed mesh
 ################################
-def drawCylinder(dia, height, res = 25):
+def buildCylinder(dia, height, res = 25):
     botOrigin = [0, 0, 0]
     topOrigin = [0, 0, height]
-    nspan = 1
-
-    #Draw Lower Verts 
-    vertices = [[botOrigin[0] + dia / 2 * np.cos(np.deg2rad((360 / res) * i)), botOrigin[1] + dia / 2 * np.sin(np.deg2rad((360 / res) * i)), botOrigin[2]] for i in range(1, res + 1)]
-    #Draw Upper Verts
-    vertices += [[topOrigin[0] + dia / 2 * np.cos(np.deg2rad((360 / res) * i)), topOrigin[1] + dia / 2 * np.sin(np.deg2rad((360 / res) * i)), topOrigin[2]] for i in range(1, res + 1)]
-    #Add Origins to Top and Bottom Faces
-    vertices.insert(int(len(vertices) / 2), topOrigin)
-    vertices.insert(0, botOrigin)
 
-    vertices = np.array([np.array(x) for x in vertices])
-
-    faces = []
+    #Bottom Origin, Lower Verts, Top Origin, Upper Verts
+    vertices = np.vstack(([botOrigin], ringVertices(dia / 2, botOrigin[2], res),
+                               [topOrigin], ringVertices(dia / 2, topOrigin[2], res)))
+    
+    vert = np.arange(1, res + 1)
+    nextVert = np.roll(vert, -1)
     
     #Generate Bottom and Bottom-to-Top Faces
-    for vert in range(1, res + 1):
-        nextVert = vert + 1
-        if nextVert == res + 1:
-            nextVert = 1
-        faces.append([vert, nextVert, 0])
-        faces.append([vert, nextVert, vert + res + 1])
+    bottom = np.stack((np.stack((vert, nextVert, np.zeros(res, dtype = int)), axis = 1),
+                            np.stack((vert, nextVert, vert + res + 1), axis = 1)), axis = 1)
 
     #Generate Top and Top-to-Bottom Faces
-    for vert in range(res + 2, len(vertices)):
-        nextVert = vert + 1
-        conVert = vert - res
-        if nextVert == len(vertices):
-            nextVert = res + 2
-            conVert  = 1
-        faces.append([vert, nextVert, res + 1])
-        faces.append([vert, nextVert, conVert])
+    top = np.stack((np.stack((vert + res + 1, nextVert + res + 1, np.full(res, res + 1)), axis = 1),
+                        np.stack((vert + res + 1, nextVert + res + 1, nextVert), axis = 1)), axis = 1)
 
     #Delete Any Duplicates IF Any Were Created
-    faces = np.array([list(x) for x in  set(tuple(x) for x in faces)])
-
-    # Create the mesh
-    cylinder = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
+    faces = uniqueFaces(np.vstack((bottom.reshape(-1, 3), top.reshape(-1, 3))))
 
-    for i, f in enumerate(faces):
-        for j in range(3):
-            cylinder.vectors[i][j] = vertices[f[j],:]
-            
-    return cylinder
+    return IndexedMesh(vertices, faces)
+    
+    
+################################
+##Function: drawCylinder
+#Draws cylinder with specified diamter, height and
+#resolution
+##Inputs:
+#dia: diameter of cylinder
+#height: height of cylinder
+#res: resoltution of shape (num of sides really)
+##Returns:
+#cylinder: cylinder mesh object
+################################
+def drawCylinder(dia, height, res = 25):
+    return buildCylinder(dia, height, res).toMesh()
     
 
 ################################
-##Function: drawDuct
-#Draws hollowed out cylinder with specified
+##Function: buildDuct
+#Builds indexed hollowed out cylinder with specified
 #inner diamter, thickness, height and resolution
 ##Inputs:
 #innerDia: inner diameter
@@ -72,64 +330,57 @@ def drawCylinder(dia, height, res = 25):
 #height: height of cylinder
 #res: resoltution of shape (num of sides really)
 ##Returns:
-#duct: duct mesh object
+#duct: duct indexed mesh
 ################################
-def drawDuct(innerDia, thickness, height, res = 25):
+def buildDuct(innerDia, thickness, height, res = 25):
     botOrigin = [0, 0, 0]
     topOrigin = [0, 0, height]
-    nspan = 1    
 
-    #Draw Lower Outer Verts 
-    outer = [[botOrigin[0] + ((innerDia / 2) + thickness) * np.cos(np.deg2rad((360 / res) * i)), botOrigin[1] + ((innerDia / 2) + thickness) * np.sin(np.deg2rad((360 / res) * i)), botOrigin[2]] for i in range(1, res + 1)]
-    #Draw Upper Outer Verts
-    outer += [[topOrigin[0] + ((innerDia / 2) + thickness) * np.cos(np.deg2rad((360 / res) * i)), topOrigin[1] + ((innerDia / 2) + thickness) * np.sin(np.deg2rad((360 / res) * i)), topOrigin[2]] for i in range(1, res + 1)]
-    
-    #Draw Lower Outer Verts 
-    inner = [[botOrigin[0] + (innerDia / 2) * np.cos(np.deg2rad((360 / res) * i)), botOrigin[1] + (innerDia / 2) * np.sin(np.deg2rad((360 / res) * i)), botOrigin[2]] for i in range(1, res + 1)]
-    #Draw Upper Outer Verts
-    inner += [[topOrigin[0] + (innerDia / 2) * np.cos(np.deg2rad((360 / res) * i)), topOrigin[1] + (innerDia / 2) * np.sin(np.deg2rad((360 / res) * i)), topOrigin[2]] for i in range(1, res + 1)]
-    
-    vertices = np.array([np.array(x) for x in outer + inner])
+    #Lower Outer, Upper Outer, Lower Inner, Upper Inner Verts
+    vertices = np.vstack((ringVertices((innerDia / 2) + thickness, botOrigin[2], res),
+                               ringVertices((innerDia / 2) + thickness, topOrigin[2], res),
+                               ringVertices(innerDia / 2, botOrigin[2], res),
+                               ringVertices(innerDia / 2, topOrigin[2], res)))
     
     faces = []
     
-    #Generate Bottom and Bottom-to-Top Faces
-    for vert in range(0,  res):
-        nextVert = vert + 1
-        if nextVert == res:
-            nextVert = 0
-        faces.append([vert, nextVert, vert + 2 * res])
-        faces.append([vert + 2 * res, nextVert + 2 * res, nextVert])
-        faces.append([vert, nextVert, vert + res])
-        faces.append([vert + 2 * res, nextVert + 2 * res, vert + res + 2 * res])
+    #Generate Bottom and Bottom-to-Top Faces, Then Top and Top-to-Bottom Faces
+    for vert, conVert in ((np.arange(0, res), np.arange(0, res) + res),
+                             (np.arange(res, 2 * res), np.roll(np.arange(0, res), -1))):
+        nextVert = np.roll(vert, -1)
+        faces.append(np.stack((np.stack((vert, nextVert, vert + 2 * res), axis = 1),
+                                    np.stack((vert + 2 * res, nextVert + 2 * res, nextVert), axis = 1),
+                                    np.stack((vert, nextVert, conVert), axis = 1),
+                                    np.stack((vert + 2 * res, nextVert + 2 * res, conVert + 2 * res), axis = 1)), axis = 1).reshape(-1, 3))
         
-    #Generate Top and Top-to-Bottom Faces
-    for vert in range(res,  2 * res):
-        nextVert = vert + 1
-        conVert = vert - res + 1
-        if nextVert == 2 * res:
-            nextVert = res 
-            conVert = 0
-        faces.append([vert, nextVert, vert + 2 * res])
-        faces.append([vert + 2 * res, nextVert + 2 * res, nextVert])
-        faces.append([vert, nextVert, conVert])
-        faces.append([vert + 2 * res, nextVert + 2 * res, conVert + 2 * res])
-        
-    faces = np.array([list(x) for x in  set(tuple(x) for x in faces)])
-
-    # Create the mesh
-    duct = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
-
-    for i, f in enumerate(faces):
-        for j in range(3):
-            duct.vectors[i][j] = vertices[f[j],:]
-            
-    return duct
+    faces = uniqueFaces(np.vstack(faces))
+
+    return IndexedMesh(vertices, faces)
     
     
 ################################
-##Function: drawBlade
-#draws individual blade
+##Function: drawDuct
+#Draws hollowed out cylinder with specified
+#inner diamter, thickness, height and resolution
+##Inputs:
+#innerDia: inner diameter
+#thickness: thickness of duct
+#height: height of cylinder
+#res: resoltution of shape (num of sides really)
+##Returns:
+#duct: duct mesh object
+################################
+def drawDuct(innerDia, thickness, height, res = 25):
+    return buildDuct(innerDia, thickness, height, res).toMesh()
+    
+    
+#Span Stations buildBlade Draws per Pass, Its progress Is Called Between Passes
+sectionPass = 64
+
+
+################################
+##Function: buildBlade
+#builds individual indexed blade
 ##Inputs:
 #camberRoot: camber of root
 #camberTip: camber of tip
@@ -140,58 +391,208 @@ def drawDuct(innerDia, thickness, height, res = 25):
 #rootChord: chord at root
 #tipChord: chord at tip
 #cot: center of twist coordinates
+#nspan: number of span divisions
+#npts: number of chordwise points per surface
+#tolerance: adaptive span refinement tolerance (None for even spacing)
+#progress: called with the fraction of stations drawn after
+#          each pass, may raise to stop (function)
 ##Returns:
-#bladeMesh: blade mesh object
+#blade: blade indexed mesh
 ################################
-def drawBlade(camberRoot, camberTip, camberPos, thickness, bladeHeight, twistAngle, rootChord, tipChord, cot):
-    #Draw Blade Profile
-    bladeProf = NACA4Blade(camberRoot = camberRoot,\
-                            camberTip = camberTip,\
-                            camberPos = camberPos,\
-                            thickness = thickness,\
-                            bladeHeight = bladeHeight,\
-                            twistAngle = twistAngle,\
-                            rootChord = rootChord,\
-                            tipChord = tipChord,\
-                            cot = cot)
+def buildBlade(camberRoot, camberTip, camberPos, thickness, bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                    nspan = 1, npts = 24, tolerance = None, progress = None):
+    #Pick Span Stations (Evenly Spaced Unless Refining Adaptively)
+    span = None
+    if tolerance is not None:
+        span = NACA4Span(camberRoot, camberTip, camberPos, thickness, bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                                nspan = nspan, npts = npts, tolerance = tolerance)
+    
+    #More Stations Than One Pass Draws Need Them Listed
+    stations = nspan + 1 if span is None else span.size
+    if span is None and stations > sectionPass:
+        span = np.linspace(0, 1, stations)
+    
+    #Draw Blade Sections, sectionPass Stations at a Time
+    sections = []
+    for start in range(0, stations, sectionPass):
+        sections.append(NACA4Sections(camberRoot = camberRoot,\
+                                            camberTip = camberTip,\
+                                            camberPos = camberPos,\
+                                            thickness = thickness,\
+                                            bladeHeight = bladeHeight,\
+                                            twistAngle = twistAngle,\
+                                            rootChord = rootChord,\
+                                            tipChord = tipChord,\
+                                            cot = cot,\
+                                            nspan = nspan,\
+                                            npts = npts,\
+                                            span = None if span is None else span[start:start + sectionPass]))
+        if progress:
+            progress(min(start + sectionPass, stations) / stations)
+    upper = np.concatenate([upper for upper, lower in sections])
+    lower = np.concatenate([lower for upper, lower in sections])
                             
     #Blade Vertices
-    bladeVertices = np.array(bladeProf[1])
+    bladeVertices = np.stack((upper, lower), axis = 1).reshape(-1, 3)
     #Blade Faces
-    bladeFaces = np.array(bladeProf[0])
+    bladeFaces = NACA4Faces(upper.shape[0] - 1, upper.shape[1])
+    
+    return IndexedMesh(bladeVertices, bladeFaces)
+    
+    
+################################
+##Function: drawBlade
+#draws individual blade
+##Inputs:
+#camberRoot ... tolerance: see buildBlade
+##Returns:
+#bladeMesh: blade mesh object
+################################
+def drawBlade(camberRoot, camberTip, camberPos, thickness, bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                    nspan = 1, npts = 24, tolerance = None):
+    return buildBlade(camberRoot, camberTip, camberPos, thickness, bladeHeight, twistAngle, rootChord, tipChord, cot,\
+                            nspan = nspan, npts = npts, tolerance = tolerance).toMesh()
+
+    
+################################
+##Function: buildBladeRow
+#Replicates one posed blade about an axis, every
+#copy rotated in a single batched pass
+##Inputs:
+#blade: blade indexed mesh
+#angles: rotation of each copy in radians (array)
+#axis: axis to rotate about (array)
+##Returns:
+#row: indexed mesh holding all copies, one after the other
+################################
+def buildBladeRow(blade, angles, axis = [1, 0, 0]):
+    angles = np.asarray(angles, dtype = float)
+    nverts = blade._vertices.shape[0]
+    
+    #(N, 4, 4) Transform per Copy, the Blade's Own Pending Pose Followed
+    #by Its Row Rotation, Same Convention as mesh.rotate
+    M = rotationTransform(axis, angles)
+    if blade.transform is not None:
+        M = np.matmul(blade.transform, M)
     
-    #Generate Blade Mesh
-    bladeMesh = mesh.Mesh(np.zeros(bladeFaces.shape[0], dtype=mesh.Mesh.dtype))
-	
-    for i, f in enumerate(bladeFaces):
-        for j in range(3):
-            bladeMesh.vectors[i][j] = bladeVertices[f[j],:]
+    #One Allocation and One Pass for the Whole Row
+    vertices = np.empty((angles.size, nverts, 3), dtype = np.float32)
+    np.einsum('vi,nij->nvj', blade._vertices, M[:, :3, :3], out = vertices, casting = 'same_kind')
+    vertices += M[:, None, 3, :3]
+    faces = blade.faces[None, :, :] + (nverts * np.arange(angles.size, dtype = np.int32))[:, None, None]
     
-    return bladeMesh
+    return IndexedMesh(vertices.reshape(-1, 3), faces.reshape(-1, 3))
+    
+    
+################################
+##Function: drawBladeRow
+#Replicates one posed blade mesh about an axis
+##Inputs:
+#blade: blade mesh object
+#angles: rotation of each copy in radians (array)
+#axis: axis to rotate about (array)
+##Returns:
+#row: mesh object holding all copies, one after the other
+################################
+def drawBladeRow(blade, angles, axis = [1, 0, 0]):
+    return buildBladeRow(IndexedMesh.fromMesh(blade), angles, axis).toMesh()
 
     
+################################
+##Function: MeshAssembler
+#Collects parts (hub, blades, duct, end wall) and
+#joins them into one indexed mesh, the vertex and
+#face buffers sized from the totals and filled in place
+##Inputs:
+#None
+##Returns:
+#None
+################################
+class MeshAssembler():
+    def __init__(self):
+        self.parts = []
+        self.ranges = []
+        
+        
+    #A Labelled Part Keeps Its Own Labels, Prefixed With label + '/',
+    #transform is Composed After the Part's Own Pose Without Changing the Part
+    def add(self, part, label = None, transform = None):
+        if label is None:
+            label = 'part{}'.format(len(self.parts))
+        if not isinstance(part, IndexedMesh):
+            part = IndexedMesh.fromMesh(part)
+        if part.transform is not None:
+            transform = part.transform if transform is None else part.transform.dot(transform)
+        self.parts.append((label, part, transform))
+        
+        
+    def faceCount(self):
+        return sum(part.faces.shape[0] for label, part, transform in self.parts)
+        
+        
+    def vertexCount(self):
+        return sum(part._vertices.shape[0] for label, part, transform in self.parts)
+        
+        
+    def build(self):
+        vertices = np.empty((self.vertexCount(), 3), dtype = np.float32)
+        faces = np.empty((self.faceCount(), 3), dtype = np.int32)
+        labels = np.empty(faces.shape[0], dtype = np.int32)
+        names = []
+        
+        #Copy Each Part Into Its Slice, Keeping Track of Where It Went
+        self.ranges = []
+        start = 0
+        vstart = 0
+        for label, part, transform in self.parts:
+            stop = start + part.faces.shape[0]
+            vstop = vstart + part._vertices.shape[0]
+            
+            #Pending Pose Goes Straight Into the Output Slice
+            applyTransform(part._vertices, transform, out = vertices[vstart:vstop])
+            np.add(part.faces, vstart, out = faces[start:stop])
+            
+            if part.labels is not None and part.names:
+                partNames = [label + '/' + name for name in part.names]
+                for name in partNames:
+                    if name not in names:
+                        names.append(name)
+                labels[start:stop] = np.array([names.index(name) for name in partNames], dtype = np.int32)[part.labels]
+            else:
+                if label not in names:
+                    names.append(label)
+                labels[start:stop] = names.index(label)
+            
+            self.ranges.append((label, start, stop))
+            start = stop
+            vstart = vstop
+            
+        return IndexedMesh(vertices, faces, labels, names)
+        
+        
 ################################
 ##Function: rotationMatrix
-#Generates rotational matrix, 
-#NOT USED, but helpful when necessary
+#Generates rotational matrix, or a stack of them
+#when theta is an array
 ##Inputs:
 #axis: axis to be rotated about (array)
-#theta: angle to rotate (float)
+#theta: angle to rotate (float or array)
 ##Returns:
-#rotation matrix (array)
+#rotation matrix (array, (3, 3) or (N, 3, 3))
 ################################
 def rotationMatrix(axis, theta):
     axis = np.asarray(axis)
+    theta = np.asarray(theta)
     # No need to rotate if there is no actual rotation
     if not axis.any():
-        return np.zeros((3, 3))
+        return np.zeros(theta.shape + (3, 3))
 
-    theta = 0.5 * np.asarray(theta)
+    theta = 0.5 * theta
 
     axis = axis / np.linalg.norm(axis)
 
     a = np.cos(theta)
-    b, c, d = - axis * np.sin(theta)
+    b, c, d = - np.multiply.outer(axis, np.sin(theta))
     angles = a, b, c, d
     powers = [x * y for x in angles for y in angles]
     aa, ab, ac, ad = powers[0:4]
@@ -199,10 +600,521 @@ def rotationMatrix(axis, theta):
     ca, cb, cc, cd = powers[8:12]
     da, db, dc, dd = powers[12:16]
 
-    return np.array([[aa + bb - cc - dd, 2 * (bc + ad), 2 * (bd - ac)],
+    matrix = np.array([[aa + bb - cc - dd, 2 * (bc + ad), 2 * (bd - ac)],
                         [2 * (bc - ad), aa + cc - bb - dd, 2 * (cd + ab)],
                         [2 * (bd + ac), 2 * (cd - ab), aa + dd - bb - cc]])
     
+    return np.moveaxis(matrix, (0, 1), (-2, -1))
+    
+################################
+##Function: triangleChunks
+#Triangle soup of a part, a chunk of faces at a
+#time so an indexed mesh is never expanded whole
+##Inputs:
+#part: indexed mesh, mesh object or (label, part)
+#chunk: faces per chunk (int)
+##Returns:
+#vectors: (n, 3, 3) triangles of the next chunk
+################################
+def triangleChunks(part, chunk = 65536):
+    if isinstance(part, tuple):
+        part = part[1]
+        
+    for start in range(0, len(part), chunk):
+        if isinstance(part, IndexedMesh):
+            yield applyTransform(part._vertices[part.faces[start:start + chunk]].reshape(-1, 3), part.transform).reshape(-1, 3, 3)
+        else:
+            yield part.vectors[start:start + chunk]
+            
+            
+################################
+##Function: writeStl
+#Streams parts into one binary STL file, the header
+#and a placeholder count are written first, then the
+#triangles of each part (with normals), and the count
+#is patched in at the end. Only one chunk of one part
+#is ever expanded, never the whole object
+##Inputs:
+#path: file to write (str)
+#parts: indexed meshes, mesh objects or (label, part) pairs (iterable)
+#name: name stored in the header (str)
+#chunk: faces written per pass (int)
+#normals: compute normals, left zero otherwise, which
+#         STL readers recompute themselves (bool)
+##Returns:
+#count: triangles written (int)
+################################
+def writeStl(path, parts, name = 'CompPy', chunk = 65536, normals = True):
+    count = 0
+    with open(path, 'wb') as f:
+        #Header Must Not Start With 'solid', Readers Would Take It for ASCII
+        f.write(('CompPy binary STL ' + name).encode('ascii', 'replace')[:80].ljust(80, b' '))
+        f.write(struct.pack('<I', 0))
+        
+        for part in parts:
+            for vectors in triangleChunks(part, chunk):
+                data = np.zeros(vectors.shape[0], dtype = mesh.Mesh.dtype)
+                data['vectors'] = vectors
+                if normals:
+                    data['normals'] = faceNormals(vectors)
+                data.tofile(f)
+                count += vectors.shape[0]
+                
+        #Now the Count is Known
+        f.seek(80)
+        f.write(struct.pack('<I', count))
+        
+    return count
+    
+    
+################################
+##Function: faceQuadrics
+#Area weighted plane quadric of every face, the
+#upper triangle of the 4x4 matrix p p^T of the face
+#plane p = (a, b, c, d)
+##Inputs:
+#vertices: (V, 3) vertex array
+#faces: (F, 3) vertex indices
+##Returns:
+#quadrics: (F, 10) float64
+################################
+def faceQuadrics(vertices, faces):
+    vectors = np.asarray(vertices, dtype = np.float64)[faces]
+    normals = np.cross(vectors[:, 1] - vectors[:, 0], vectors[:, 2] - vectors[:, 0])
+    doubleArea = np.linalg.norm(normals, axis = 1)
+    
+    planes = np.empty((faces.shape[0], 4))
+    planes[:, :3] = normals / np.where(doubleArea > 0, doubleArea, 1)[:, None]
+    planes[:, 3] = -np.einsum('ij,ij->i', planes[:, :3], vectors[:, 0])
+    
+    i, j = np.triu_indices(4)
+    
+    return planes[:, i] * planes[:, j] * (doubleArea / 2)[:, None]
+    
+    
+################################
+##Function: quadricPoints
+#Point minimising each quadric, searched around a
+#start point. The solve is damped by a thousandth of
+#the quadric's trace and refined twice, so directions
+#it hardly constrains (flat, or along a crease) keep
+#the start while corners and creases come out exact
+##Inputs:
+#quadrics: (n, 10) quadrics, as faceQuadrics
+#start: (n, 3) start points
+##Returns:
+#points: (n, 3) points
+#error: (n) quadric error at each point
+################################
+def quadricPoints(quadrics, start):
+    xx, xy, xz, xw, yy, yz, yw, zz, zw, ww = quadrics.T
+    damping = 1e-3 * (xx + yy + zz)
+    
+    #Inverse of the Damped Symmetric 3x3 From Its Cofactors
+    dx, dy, dz = xx + damping, yy + damping, zz + damping
+    ixx, ixy, ixz = dy * dz - yz * yz, xz * yz - xy * dz, xy * yz - xz * dy
+    iyy, iyz, izz = dx * dz - xz * xz, xy * xz - dx * yz, dx * dy - xy * xy
+    scale = 1 / np.where(dx * ixx + xy * ixy + xz * ixz > 0, dx * ixx + xy * ixy + xz * ixz, np.inf)
+    
+    x, y, z = start[:, 0].copy(), start[:, 1].copy(), start[:, 2].copy()
+    for step in range(3):
+        rx = -xw - (xx * x + xy * y + xz * z)
+        ry = -yw - (xy * x + yy * y + yz * z)
+        rz = -zw - (xz * x + yz * y + zz * z)
+        x += scale * (ixx * rx + ixy * ry + ixz * rz)
+        y += scale * (ixy * rx + iyy * ry + iyz * rz)
+        z += scale * (ixz * rx + iyz * ry + izz * rz)
+    
+    #v^T Q v With v = (x, y, z, 1)
+    error = (x * (xx * x + 2 * (xy * y + xz * z + xw)) + y * (yy * y + 2 * (yz * z + yw)) +
+             z * (zz * z + 2 * zw) + ww)
+    
+    return np.stack((x, y, z), axis = 1), np.maximum(error, 0)
+    
+    
+################################
+##Function: collapseEdges
+#Edge collapse with quadric error metrics: each edge
+#collapses into the point that best fits the planes
+#of all faces merged into it, which keeps creases
+#such as the blade leading and trailing edges.
+#Collapses run in passes, cheapest first, each pass
+#taking edges far enough apart not to interact. An
+#edge only collapses when its two faces are the only
+#ones its ends share (the link condition) and no face
+#around it flips over, so a closed shell stays closed
+#and manifold. Vertices on open or non-manifold edges
+#never move
+##Inputs:
+#vertices: (V, 3) vertex array
+#faces: (F, 3) vertex indices
+#targetFaces: triangle budget, None for no budget (int)
+#maxError: largest distance any vertex may move, None
+#          for no bound (float)
+##Returns:
+#points: (V, 3) vertex positions after collapsing (float64)
+#keep: indices of the faces left (array)
+#faces: (F', 3) faces left, indices into points
+#weld: vertex every vertex was collapsed into (array)
+################################
+def collapseEdges(vertices, faces, targetFaces = None, maxError = None):
+    points = np.asarray(vertices, dtype = np.float64).copy()
+    faces = np.asarray(faces, dtype = np.int64)
+    n = points.shape[0]
+    weld = np.arange(n)
+    
+    #Plane Quadrics Summed per Vertex, and the Box of Original Vertices Each One Stands For
+    quadrics = np.zeros((n, 10))
+    faceQuadric = faceQuadrics(points, faces)
+    for corner in range(3):
+        for k in range(10):
+            quadrics[:, k] += np.bincount(faces[:, corner], faceQuadric[:, k], minlength = n)
+    low, high = points.copy(), points.copy()
+    
+    keep = np.arange(faces.shape[0])
+    changed = np.zeros(n, dtype = bool)
+    cachedKeys, cachedPoints, cachedError = np.full(1, -1), np.zeros((1, 3)), np.zeros(1)
+    frozen = np.zeros(0, dtype = np.int64)
+    flat = 1e-12 * float(np.ptp(points, axis = 0).max())**4
+    shuffle = np.random.default_rng(0)
+    target = targetFaces or 0
+    while faces.shape[0] > target:
+        #Every Edge, the Faces on It and the Vertex Opposite It in Each
+        directed = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        edgeKeys = directed.min(axis = 1) * n + directed.max(axis = 1)
+        order = np.argsort(edgeKeys, kind = 'stable')
+        start = np.flatnonzero(np.diff(edgeKeys[order], prepend = -1))
+        faceCount = np.diff(start, append = order.size)
+        keys = edgeKeys[order[start]]
+        a, b = keys // n, keys % n
+        
+        opposite = faces[:, [2, 0, 1]].ravel()
+        c, d = opposite[order[start]], opposite[order[start + faceCount - 1]]
+        
+        def findEdge(p, q):
+            key = np.minimum(p, q) * n + np.maximum(p, q)
+            index = np.minimum(np.searchsorted(keys, key), keys.size - 1)
+            return index, keys[index] == key
+        
+        #Vertices on Open or Non-Manifold Edges Stay Put
+        locked = np.zeros(n, dtype = bool)
+        locked[a[faceCount != 2]] = True
+        locked[b[faceCount != 2]] = True
+        
+        #A Tetrahedron Would Flatten Into Two Faces on Top of Each Other
+        across, joined = findEdge(c, d)
+        tetrahedron = joined & (np.minimum(c[across], d[across]) == a) & (np.maximum(c[across], d[across]) == b)
+        candidate = np.flatnonzero((faceCount == 2) & ~locked[a] & ~locked[b] & (c != d) & ~tetrahedron & ~np.isin(keys, frozen))
+        
+        #Cost and Point of Each Collapse, Kept From the Last Pass Unless an End Changed
+        merged, error = np.empty((candidate.size, 3)), np.empty(candidate.size)
+        index = np.minimum(np.searchsorted(cachedKeys, keys[candidate]), cachedKeys.size - 1)
+        known = (cachedKeys[index] == keys[candidate]) & ~changed[a[candidate]] & ~changed[b[candidate]]
+        merged[known], error[known] = cachedPoints[index[known]], cachedError[index[known]]
+        fresh = candidate[~known]
+        merged[~known], error[~known] = quadricPoints(quadrics[a[fresh]] + quadrics[b[fresh]], (points[a[fresh]] + points[b[fresh]]) / 2)
+        if candidate.size:
+            cachedKeys, cachedPoints, cachedError = keys[candidate], merged, error
+        
+        #Within maxError of Every Original Vertex Merged Into It
+        if maxError is not None:
+            boxLow = np.minimum(low[a[candidate]], low[b[candidate]])
+            boxHigh = np.maximum(high[a[candidate]], high[b[candidate]])
+            inside = np.linalg.norm(np.maximum(np.abs(merged - boxLow), np.abs(merged - boxHigh)), axis = 1) <= maxError
+            candidate, merged, error = candidate[inside], merged[inside], error[inside]
+        if not candidate.size:
+            break
+        
+        #Cheapest First by Powers of Two, Shuffled Within so Picks Spread Out
+        bucket = np.floor(np.log2(np.maximum(error, flat) / flat))
+        rank = np.full(keys.size, keys.size)
+        rank[candidate[np.argsort(bucket + shuffle.random(candidate.size))]] = np.arange(candidate.size)
+        
+        #Combined Over Each Vertex and Its Neighbours
+        ends, others = np.concatenate((a, b)), np.concatenate((b, a))
+        byEnd = np.argsort(ends, kind = 'stable')
+        degree = np.bincount(ends, minlength = n)
+        first = np.cumsum(degree) - degree
+        touched = degree > 0
+        def spread(values, combine):
+            grouped = values.copy()
+            grouped[touched] = combine.reduceat(values[others[byEnd]], first[touched])
+            return combine(values, grouped)
+        
+        #Link Condition, the Two Opposite Vertices Are the Only Neighbours Both Ends Share
+        def linked(edges):
+            count = degree[a[edges]]
+            which = np.repeat(np.arange(edges.size), count)
+            neighbour = others[byEnd[np.repeat(first[a[edges]], count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)]]
+            other = b[edges][which]
+            return np.bincount(which, (neighbour != other) & findEdge(neighbour, other)[1], minlength = edges.size) == 2
+        
+        #A Few Rounds of Edges Cheapest Next to Both Ends, Each Round Clear of the
+        #Ones Before. Collapses Two Edges Apart Share No Face, Nor Any Neighbour's Link
+        available = np.zeros(keys.size, dtype = bool)
+        available[candidate] = True
+        chosen = np.zeros(keys.size, dtype = bool)
+        for round in range(4):
+            ranked = np.where(available, rank, keys.size)
+            lowest = np.full(n, keys.size)
+            lowest[touched] = np.minimum.reduceat(np.concatenate((ranked, ranked))[byEnd], first[touched])
+            lowest = spread(lowest, np.minimum)
+            picked = np.flatnonzero(available & (ranked == lowest[a]) & (ranked == lowest[b]))
+            
+            #Edges Failing the Link Condition Drop Out Without Blocking Their Neighbours
+            good = linked(picked)
+            available[picked[~good]] = False
+            picked = picked[good]
+            chosen[picked] = True
+            
+            near = np.zeros(n, dtype = bool)
+            near[a[picked]] = True
+            near[b[picked]] = True
+            near = spread(near, np.logical_or)
+            available &= ~near[a] & ~near[b]
+        chosen = chosen[candidate]
+        candidate, merged = candidate[chosen], merged[chosen]
+        
+        #Last Pass Only Takes What the Budget Needs, Two Faces per Collapse
+        if targetFaces is not None:
+            order = np.argsort(rank[candidate])
+            needed = -(-(faces.shape[0] - target) // 2)
+            candidate, merged = candidate[order[:needed]], merged[order[:needed]]
+        
+        #No Face Around a Collapse May Flip Over
+        owner = np.full(n, -1)
+        owner[a[candidate]] = np.arange(candidate.size)
+        owner[b[candidate]] = np.arange(candidate.size)
+        faceOwner = owner[faces].max(axis = 1)
+        moving = faces[faceOwner >= 0]
+        edge = faceOwner[faceOwner >= 0]
+        isEnd = (moving == a[candidate][edge][:, None]) | (moving == b[candidate][edge][:, None])
+        before = points[moving]
+        after = np.where(isEnd[:, :, None], merged[edge][:, None], before)
+        oldNormals = np.cross(before[:, 1] - before[:, 0], before[:, 2] - before[:, 0])
+        newNormals = np.cross(after[:, 1] - after[:, 0], after[:, 2] - after[:, 0])
+        flipped = (isEnd.sum(axis = 1) == 1) & (np.einsum('ij,ij->i', oldNormals, newNormals) <= 0)
+        rejected = np.bincount(edge[flipped], minlength = candidate.size) > 0
+        
+        #Rejected Edges Sit Out the Next Pass, Longer if Nothing Collapsed
+        frozen = keys[candidate[rejected]] if not rejected.all() else np.concatenate((frozen, keys[candidate[rejected]]))
+        
+        #Collapse b Into a
+        done = candidate[~rejected]
+        ka, kb = a[done], b[done]
+        points[ka] = merged[~rejected]
+        quadrics[ka] += quadrics[kb]
+        low[ka] = np.minimum(low[ka], low[kb])
+        high[ka] = np.maximum(high[ka], high[kb])
+        changed[:] = False
+        changed[ka] = True
+        remap = np.arange(n)
+        remap[kb] = ka
+        weld = remap[weld]
+        faces = remap[faces]
+        live = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+        faces, keep = faces[live], keep[live]
+        
+    return points, keep, faces, weld
+    
+    
+################################
+##Function: decimateMesh
+#Reduces a mesh to a triangle budget or an error
+#bound by collapseEdges, closed shells stay closed
+##Inputs:
+#obj: mesh to reduce (indexed mesh)
+#targetFaces: triangle budget (int)
+#maxError: largest distance any vertex may move (float)
+##Returns:
+#obj: reduced mesh, labels kept (indexed mesh)
+################################
+def decimateMesh(obj, targetFaces = None, maxError = None):
+    if targetFaces is None and maxError is None:
+        raise ValueError("targetFaces or maxError is needed")
+    
+    if not len(obj) or (targetFaces is not None and targetFaces >= len(obj) and maxError is None):
+        return obj.copy()
+    
+    points, keep, faces, weld = collapseEdges(obj.vertices, obj.faces, targetFaces, maxError)
+    used, faces = np.unique(faces, return_inverse = True)
+    
+    return IndexedMesh(points[used], faces.reshape(-1, 3),
+                       None if obj.labels is None else obj.labels[keep], obj.names)
+    
+    
+################################
+##Function: weldVertices
+#Merges vertices closer than a tolerance on a hash
+#grid: vertices are binned into cells of the
+#tolerance on 8 grids shifted by half a cell, and
+#every bin keeps its lowest vertex until nothing
+#changes. Vertices within half the tolerance (per
+#axis) of each other are always merged
+##Inputs:
+#vertices: (V, 3) vertex array
+#tolerance: cell size, 0 merges only equal vertices (float)
+##Returns:
+#weld: new index of every vertex (array)
+#used: old index of every new vertex (array)
+################################
+def weldVertices(vertices, tolerance):
+    vertices = np.asarray(vertices, dtype = np.float64)
+    if not tolerance:
+        unique, used, weld = np.unique(vertices, axis = 0, return_index = True, return_inverse = True)
+        return weld.ravel(), used
+    
+    lower = vertices.min(axis = 0) if vertices.size else np.zeros(3)
+    cells = np.floor((vertices - lower) / tolerance).astype(np.int64)
+    halves = np.floor((vertices - lower) / tolerance + 0.5).astype(np.int64)
+    dims = (halves.max(axis = 0) + 1) if vertices.size else np.ones(3, dtype = np.int64)
+    
+    #One int64 Key per Bin Where It Fits, Rows Otherwise
+    def bins(key):
+        if np.prod(dims.astype(np.float64)) < 2.0**62:
+            return np.unique((key[:, 0] * dims[1] + key[:, 1]) * dims[2] + key[:, 2], return_inverse = True)[1].ravel()
+        return np.unique(key, axis = 0, return_inverse = True)[1].ravel()
+    
+    #Lowest Vertex Index of Every Connected Group of Bins
+    label = np.arange(vertices.shape[0])
+    changed = vertices.shape[0] > 1
+    while changed:
+        changed = False
+        for shift in range(8):
+            inverse = bins(np.where([(shift >> axis) & 1 for axis in range(3)], halves, cells))
+            lowest = np.full(inverse.max() + 1, vertices.shape[0])
+            np.minimum.at(lowest, inverse, label)
+            merged = lowest[inverse]
+            if np.any(merged != label):
+                label = merged[merged]
+                changed = True
+                
+    used, weld = np.unique(label, return_inverse = True)
+    
+    return weld.ravel(), used
+    
+    
+################################
+##Function: cleanFaces
+#Deletes collapsed and duplicate faces. Faces on the
+#same three vertices cancel when they face opposite
+#ways (a zero thickness wall between two shells),
+#unless only one of them winds like the faces around
+#it (one face written twice), otherwise one of them
+#is kept
+##Inputs:
+#faces: (F, 3) vertex indices
+##Returns:
+#keep: indices of the faces kept, in order (array)
+################################
+def cleanFaces(faces):
+    faces = np.asarray(faces)
+    valid = np.flatnonzero((faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0]))
+    
+    #Sorting Three Indices Takes an Odd Number of Swaps When the Face Winds the Other Way
+    order = np.argsort(faces[valid], axis = 1)
+    winding = np.where((order[:, 1] - order[:, 0]) % 3 == 1, 1, -1)
+    ordered = np.take_along_axis(faces[valid], order, axis = 1).astype(np.int64)
+    n = int(faces.max()) + 1 if faces.size else 0
+    if n < 2**21:
+        inverse = np.unique((ordered[:, 0] * n + ordered[:, 1]) * n + ordered[:, 2], return_inverse = True)[1].ravel()
+    else:
+        inverse = np.unique(ordered, axis = 0, return_inverse = True)[1].ravel()
+    net = np.bincount(inverse, winding, minlength = 1)
+    
+    #First Face of the Winning Winding per Group
+    candidates = np.flatnonzero(np.sign(net[inverse]) == winding)
+    first = candidates[np.unique(inverse[candidates], return_index = True)[1]]
+    
+    #A Cancelled Pair With Neighbours on One Side Only Is One Face Written Twice,
+    #the Copy Walking Its Edges Against the Neighbours Stays
+    cancelled = np.flatnonzero(net[inverse] == 0)
+    if cancelled.size:
+        kept = faces[valid[first]].astype(np.int64)
+        keys = (kept[:, [0, 1, 2]] * n + kept[:, [1, 2, 0]]).ravel()
+        copies = faces[valid[cancelled]].astype(np.int64)
+        score = (np.isin(copies[:, [1, 2, 0]] * n + copies[:, [0, 1, 2]], keys).sum(axis = 1) -
+                 np.isin(copies[:, [0, 1, 2]] * n + copies[:, [1, 2, 0]], keys).sum(axis = 1))
+        matched = cancelled[score > 0]
+        first = np.concatenate((first, matched[np.unique(inverse[matched], return_index = True)[1]]))
+    
+    return valid[np.sort(first)]
+    
+    
+################################
+##Function: edgeReport
+#Edges not shared by exactly two faces, a closed
+#manifold mesh has none
+##Inputs:
+#faces: (F, 3) vertex indices
+##Returns:
+#report: 'boundary' edges of one face and 'nonManifold'
+#        edges of three or more, (E, 2) vertex indices (dict)
+################################
+def edgeReport(faces):
+    faces = np.asarray(faces)
+    edges = np.sort(np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]])), axis = 1).astype(np.int64)
+    n = int(faces.max()) + 1 if faces.size else 0
+    keys, count = np.unique(edges[:, 0] * n + edges[:, 1], return_counts = True)
+    edges = np.stack((keys // max(n, 1), keys % max(n, 1)), axis = 1)
+    
+    return {'boundary': edges[count == 1], 'nonManifold': edges[count > 2]}
+    
+    
+################################
+##Function: repairMesh
+#Welds every part of a mesh on its own and deletes
+#collapsed and duplicate faces, so each part becomes
+#one shared-vertex shell, then reports the edges
+#that still aren't manifold
+##Inputs:
+#obj: mesh to repair (indexed mesh)
+#tolerance: weld distance, a millionth of the mesh
+#           size when None (float)
+##Returns:
+#obj: repaired mesh, labels kept (indexed mesh)
+#report: edgeReport of every part, by part name (dict)
+################################
+def repairMesh(obj, tolerance = None):
+    vertices = obj.vertices
+    faces = obj.faces
+    if tolerance is None:
+        tolerance = 1e-6 * (float((vertices.max(axis = 0) - vertices.min(axis = 0)).max()) if vertices.size else 0)
+    
+    #Parts in the Order They First Appear
+    if obj.labels is None:
+        groups = [('', None, np.arange(len(obj)))]
+    else:
+        labels = obj.labels[np.sort(np.unique(obj.labels, return_index = True)[1])]
+        groups = [(obj.names[label], label, np.flatnonzero(obj.labels == label)) for label in labels]
+        
+    newVertices, newFaces, newLabels, report = [], [], [], {}
+    offset = 0
+    for name, label, index in groups:
+        #Only This Part's Vertices, Parts Are Never Welded Together
+        used, partFaces = np.unique(faces[index], return_inverse = True)
+        weld, kept = weldVertices(vertices[used], tolerance)
+        partFaces = weld[partFaces.reshape(-1, 3)]
+        partFaces = partFaces[cleanFaces(partFaces)]
+        
+        #Vertices Only Used by Deleted Faces Go Too
+        live, partFaces = np.unique(partFaces, return_inverse = True)
+        partFaces = partFaces.reshape(-1, 3) + offset
+        
+        newVertices.append(vertices[used[kept[live]]])
+        newFaces.append(partFaces)
+        if label is not None:
+            newLabels.append(np.full(partFaces.shape[0], label, dtype = np.int32))
+        report[name] = edgeReport(partFaces)
+        offset += live.size
+        
+    repaired = IndexedMesh(np.concatenate(newVertices) if newVertices else np.zeros((0, 3)),
+                           np.concatenate(newFaces) if newFaces else np.zeros((0, 3)),
+                           np.concatenate(newLabels) if newLabels else None, obj.names)
+    
+    return repaired, report
+    
+    
 ###USED FOR QUICK TESTING
     
 if __name__ == '__main__':
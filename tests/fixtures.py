@@ -0,0 +1,39 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import MeshCache
+
+
+#Design Point Shared by the Build Tests, Stage and Rotor Given as the GUI Fields Hold Them
+COMMON = {'Reaction (R)': '0.4', 'Mean Line Radius': '47.455', 'Flow (Phi)': '0.691',
+          'RPM': '30000', 'Loading (Psi)': '0.482'}
+ROTOR = {'Hub Diameter': '30.000', 'X Twist (Rotor)': '50.000', 'Blade Thickness (Rotor)': '16',
+         'Rotor Diameter': '60', 'Hub Length': '17', 'Blade Clearance': '0',
+         'Y Twist (Rotor)': '0.000', 'Root Chord (Rotor)': '20',
+         'Num of Blade (Rotor)': '24', 'Tip Chord (Rotor)': '10.88'}
+STATOR = {'Duct ID': 60, 'Duct Length': 14.3, 'Duct Thickness': 2, 'Num of Blade (Stator)': 13,
+          'Mount Can Length': 14.3, 'Mount Can Dia': 30, 'Mount Can Loc': 0,
+          'Blade Thickness (Stator)': 16, 'Root Chord (Stator)': 15, 'Tip Chord (Stator)': 9.405,
+          'X Twist (Stator)': 50, 'Y Twist (Stator)': 0}
+
+
+class CacheTestCase(unittest.TestCase):
+    """Test case keeping the disk cache in a temporary directory of its own"""
+    
+    def setUp(self):
+        """Point the disk cache at a temporary directory and empty the memory cache"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.previous_cache = MeshCache.diskCache
+        MeshCache.SetCacheDir(self.cache_dir)
+        MeshCache.meshCache.clear()
+    
+    def tearDown(self):
+        """Put the previous disk cache back and delete the temporary one"""
+        MeshCache.diskCache = self.previous_cache
+        MeshCache.meshCache.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
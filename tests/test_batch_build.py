@@ -0,0 +1,135 @@
+import unittest
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import mock
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from FileOps import StageSave
+from BatchBuild import BuildFile
+import MeshCache
+from fixtures import CacheTestCase, COMMON, ROTOR, STATOR
+from stl import mesh
+
+
+class TestBatchBuild(CacheTestCase):
+    """Test headless building and exporting of saved compressors"""
+    
+    def setUp(self):
+        """Save a two stage compressor to a temporary directory"""
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.design = os.path.join(self.temp_dir, 'design.json')
+        StageSave(self.design, [COMMON, COMMON], [ROTOR, ROTOR], [STATOR, STATOR])
+    
+    def tearDown(self):
+        """Clean up temporary directory"""
+        shutil.rmtree(self.temp_dir)
+        super().tearDown()
+    
+    def test_build_file(self):
+        """Test every stage is exported as rotor and stator STLs"""
+        out = os.path.join(self.temp_dir, 'out')
+        written = BuildFile(self.design, out, endWall=True)
+        
+        self.assertEqual([os.path.basename(path) for path in written],
+                         ['design_stage1_rotor.stl', 'design_stage1_stator.stl',
+                          'design_stage2_rotor.stl', 'design_stage2_stator.stl'])
+        
+        rotor = mesh.Mesh.from_file(written[0])
+        self.assertGreater(len(rotor.vectors), 0)
+    
+    def test_build_file_reuses_cache(self):
+        """Test a second build reads the meshes back from the disk cache"""
+        first = BuildFile(self.design, os.path.join(self.temp_dir, 'first'))
+        
+        # Both stages are identical, so one rotor and one stator entry
+        entries = os.listdir(os.path.join(self.cache_dir, MeshCache.version))
+        self.assertEqual(len(entries), 2)
+        
+        MeshCache.meshCache.clear()
+        with mock.patch('MeshCache.BuildRotor', side_effect=AssertionError('rebuilt')):
+            second = BuildFile(self.design, os.path.join(self.temp_dir, 'second'))
+        
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(mesh.Mesh.from_file(a).vectors, mesh.Mesh.from_file(b).vectors)
+    
+    def test_build_compressor_file(self):
+        """Test all stages are also exported stacked as one compressor"""
+        written = BuildFile(self.design, os.path.join(self.temp_dir, 'out'), compressor=True)
+        
+        self.assertEqual(os.path.basename(written[-1]), 'design_compressor.stl')
+        compressor = mesh.Mesh.from_file(written[-1])
+        parts = [mesh.Mesh.from_file(path) for path in written[:-1]]
+        self.assertEqual(len(compressor.vectors), sum(len(part.vectors) for part in parts))
+    
+    def test_build_file_jobs(self):
+        """Test building on worker processes writes the same files"""
+        serial = BuildFile(self.design, os.path.join(self.temp_dir, 'serial'), endWall=True)
+        MeshCache.meshCache.clear()
+        MeshCache.SetCacheDir(None)
+        pooled = BuildFile(self.design, os.path.join(self.temp_dir, 'pooled'), endWall=True, jobs=2)
+        
+        self.assertEqual([os.path.basename(path) for path in pooled], [os.path.basename(path) for path in serial])
+        for a, b in zip(serial, pooled):
+            np.testing.assert_array_equal(mesh.Mesh.from_file(a).vectors, mesh.Mesh.from_file(b).vectors)
+    
+    def test_build_file_previews(self):
+        """Test a reduced preview is written next to every full resolution file"""
+        MeshCache.SetCacheDir(None)
+        written = BuildFile(self.design, os.path.join(self.temp_dir, 'out'), objects='R', previewFaces=500)
+        
+        self.assertEqual([os.path.basename(path) for path in written],
+                         ['design_stage1_rotor.stl', 'design_stage1_rotor_preview.stl',
+                          'design_stage2_rotor.stl', 'design_stage2_rotor_preview.stl'])
+        full, preview = mesh.Mesh.from_file(written[0]), mesh.Mesh.from_file(written[1])
+        self.assertLessEqual(len(preview.vectors), 500)
+        self.assertLess(len(preview.vectors), len(full.vectors))
+    
+    def test_build_file_repair(self):
+        """Test repaired files are welded, smaller and have their open edges reported"""
+        full = BuildFile(self.design, os.path.join(self.temp_dir, 'full'), objects='R')
+        reports = []
+        repaired = BuildFile(self.design, os.path.join(self.temp_dir, 'repaired'), objects='R', repair=True,
+                             report=lambda path, edges: reports.append((path, edges)))
+        
+        self.assertEqual([path for path, edges in reports], repaired)
+        self.assertEqual(sorted(reports[0][1]), ['blades', 'hub'])
+        self.assertEqual(len(reports[0][1]['hub']['boundary']), 0)
+        self.assertLess(len(mesh.Mesh.from_file(repaired[0]).vectors), len(mesh.Mesh.from_file(full[0]).vectors))
+    
+    def test_build_file_union(self):
+        """Test union exports report a closed mesh for every rotor and stator"""
+        reports = []
+        written = BuildFile(self.design, os.path.join(self.temp_dir, 'union'), endWall=True, union=True,
+                            report=lambda path, edges: reports.append((path, edges)))
+        
+        self.assertEqual([path for path, edges in reports], written)
+        for path, edges in reports:
+            self.assertEqual(list(edges), [''])
+            self.assertEqual(len(edges['']['boundary']), 0)
+            self.assertEqual(len(edges['']['nonManifold']), 0)
+    
+    def test_command_line_is_headless(self):
+        """Test comppy.py build runs without importing PyQt or matplotlib"""
+        root = os.path.join(os.path.dirname(__file__), '..')
+        out = os.path.join(self.temp_dir, 'out')
+        script = ("import runpy, sys; sys.argv = ['comppy.py', 'build', {!r}, '--out', {!r}, '--only', 'rotor', '--no-cache', '-q'];\n"
+                  "try: runpy.run_path({!r}, run_name='__main__')\n"
+                  "except SystemExit as e: assert not e.code, e.code\n"
+                  "assert not [m for m in sys.modules if m.startswith(('PyQt', 'matplotlib'))]\n"
+                  ).format(self.design, out, os.path.join(root, 'comppy.py'))
+        
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(sorted(os.listdir(out)), ['design_stage1_rotor.stl', 'design_stage2_rotor.stl'])
+
+
+if __name__ == '__main__':
+    unittest.main()
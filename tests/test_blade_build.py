@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from BladeBuild import BuildRotor, BuildStator, BuildCancelled, RotorParts, AssembleParts, PreviewRotor, PreviewStator
+from BladeCalc import FindBounds
+from StlUtils import IndexedMesh, repairMesh
+from fixtures import COMMON, ROTOR, STATOR
+
+
+class TestBladeBuild(unittest.TestCase):
+    """Test GUI-free rotor and stator builders"""
+    
+    def test_build_rotor(self):
+        """Test rotor assembly parts and size"""
+        rotor = BuildRotor(COMMON, ROTOR)
+        
+        self.assertIsInstance(rotor, IndexedMesh)
+        self.assertEqual(rotor.names, ['hub', 'blades'])
+        
+        # Hub is centered on the X axis, Hub Length long
+        minx, maxx, miny, maxy, minz, maxz = FindBounds(rotor.part('hub'))
+        self.assertAlmostEqual(minx, -8.5, places=4)
+        self.assertAlmostEqual(maxx, 8.5, places=4)
+        
+        walled = BuildRotor(COMMON, ROTOR, endWall=True)
+        self.assertEqual(walled.names, ['hub', 'blades', 'endWall'])
+        self.assertEqual(walled.partRanges()[:2], rotor.partRanges())
+    
+    def test_build_stator(self):
+        """Test stator assembly parts"""
+        stator = BuildStator(COMMON, STATOR, nspan=2, npts=16)
+        
+        self.assertEqual(stator.names, ['mountCan', 'blades', 'duct'])
+        
+        # Duct outer diameter is Duct ID plus twice the thickness
+        minx, maxx, miny, maxy, minz, maxz = FindBounds(stator.part('duct'))
+        self.assertAlmostEqual(maxy - miny, 64.0, places=0)
+    
+    def test_rotor_parts(self):
+        """Test rotor parts can be generated a blade at a time"""
+        parts = list(RotorParts(COMMON, ROTOR, endWall=True, rowSize=1))
+        
+        self.assertEqual([label for label, part in parts],
+                         ['hub'] + ['blades'] * 24 + ['endWall'])
+        
+        rotor = BuildRotor(COMMON, ROTOR, endWall=True)
+        joined = AssembleParts(parts)
+        np.testing.assert_array_equal(joined.vectors, rotor.vectors)
+        self.assertEqual(joined.partRanges(), rotor.partRanges())
+    
+    def test_preview_detail(self):
+        """Test the preview stays coarse whatever the export resolution"""
+        full = BuildRotor(COMMON, ROTOR, endWall=True, nspan=8, npts=100)
+        preview = PreviewRotor(COMMON, ROTOR, endWall=True)
+        
+        self.assertEqual(preview.names, full.names)
+        self.assertLess(len(preview), len(full) / 10)
+        np.testing.assert_allclose(FindBounds(preview.part('hub')), FindBounds(full.part('hub')), atol=0.5)
+        
+        # One representative blade instead of the whole row
+        single = PreviewRotor(COMMON, ROTOR, representative=True)
+        self.assertEqual(len(single.part('blades')) * 24, len(preview.part('blades')))
+        self.assertEqual(PreviewStator(COMMON, STATOR).names, ['mountCan', 'blades', 'duct'])
+    
+    def test_repair_closes_blades(self):
+        """Test a repaired rotor and stator have no open or non-manifold edges"""
+        for obj in (BuildRotor(COMMON, ROTOR, endWall=True), BuildStator(COMMON, STATOR)):
+            repaired, report = repairMesh(obj)
+            for name in obj.names:
+                self.assertEqual(len(report[name]['boundary']), 0)
+                self.assertEqual(len(report[name]['nonManifold']), 0)
+    
+    def test_build_progress(self):
+        """Test builders report progress and can be cancelled"""
+        fractions = []
+        BuildStator(COMMON, STATOR, progress=fractions.append)
+        
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertEqual(fractions[-1], 1.0)
+        
+        def cancel(fraction):
+            if fraction > 0.3:
+                raise BuildCancelled()
+        
+        with self.assertRaises(BuildCancelled):
+            BuildRotor(COMMON, ROTOR, progress=cancel)
+    
+    def test_cancel_mid_step(self):
+        """Test cancel is checked between blade span passes and blade rows"""
+        fractions = []
+        BuildRotor(COMMON, ROTOR, nspan=200, progress=fractions.append)
+        
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertTrue([f for f in fractions if 0.1 < f < 0.4])
+        self.assertTrue([f for f in fractions if 0.4 < f < 0.8])
+        
+        for low, high in ((0.1, 0.4), (0.4, 0.8)):
+            seen = []
+            
+            def cancel(fraction):
+                seen.append(fraction)
+                if low < fraction < high:
+                    raise BuildCancelled()
+            
+            with self.assertRaises(BuildCancelled):
+                BuildStator(COMMON, STATOR, nspan=200, progress=cancel)
+            self.assertLess(seen[-1], high)
+    
+    def test_builders_do_not_import_gui(self):
+        """Test building geometry never imports PyQt or matplotlib"""
+        src = os.path.join(os.path.dirname(__file__), '..', 'src')
+        script = ("import sys; sys.path.insert(0, {!r})\n"
+                  "import BladeBuild\n"
+                  "assert not [m for m in sys.modules if m.startswith(('PyQt', 'matplotlib'))]\n").format(src)
+        
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
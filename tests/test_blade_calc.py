@@ -2,10 +2,11 @@ import unittest
 import sys
 import os
 import numpy as np
+import pickle
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from BladeCalc import StageCalc, CalcStageBladeAngles, NACA4Blade, FindBounds
+from BladeCalc import StageProps, LinearStageProp, StageCalc, StageCalcBatch, CalcStageBladeAngles, NACA4Blade, NACA4Sections, NACA4Faces, NACA4Span, FindBounds, FindBoundsMany, FindRangeBounds
 from stl import mesh
 
 
@@ -59,6 +60,68 @@ class TestBladeCalc(unittest.TestCase):
             places=2
         )
     
+    def test_stage_calc_flow_solution(self):
+        """Test root and tip flow hold the mean axial velocity exactly"""
+        # Hub radius 10 and tip radius 50 need a root flow above 2
+        stageProps = StageCalc(r=0.4, phi=0.691, psi=0.482, rpm=30000,
+                               rootRadius=10.0, tipRadius=50.0)
+        
+        self.assertAlmostEqual(stageProps.rootProps.phi, 0.691 * 3)
+        self.assertAlmostEqual(stageProps.meanProps.phi, 0.691)
+        self.assertAlmostEqual(stageProps.rootProps.cx / stageProps.meanProps.cx, 1.0, places=12)
+        self.assertAlmostEqual(stageProps.tipProps.cx / stageProps.meanProps.cx, 1.0, places=12)
+        
+        # Very low RPM, the axial velocities are far below any absolute tolerance
+        slow = StageCalc(r=0.4, phi=0.691, psi=0.482, rpm=1,
+                         rootRadius=0.5, tipRadius=1.5)
+        self.assertAlmostEqual(slow.rootProps.cx / slow.meanProps.cx, 1.0, places=12)
+        
+        with self.assertRaises(ValueError):
+            StageCalc(r=0.4, phi=0.691, psi=0.482, rpm=30000, rootRadius=0, tipRadius=30.0)
+    
+    def test_stage_calc_batch(self):
+        """Test vectorized stage calculation matches StageCalc point by point"""
+        points = [(0.4, 0.691, 15.0, 30.0), (0.5, 0.6, 10.0, 50.0), (0.3, 0.8, 20.0, 25.0)]
+        r, phi, rootRadius, tipRadius = [np.array(column) for column in zip(*points)]
+        
+        batch = StageCalcBatch(r, phi, 0.482, 30000, rootRadius, tipRadius)
+        
+        for i, point in enumerate(points):
+            stageProps = StageCalc(point[0], point[1], 0.482, 30000, point[2], point[3])
+            for name, props in [('root', stageProps.rootProps), ('mean', stageProps.meanProps), ('tip', stageProps.tipProps)]:
+                for key in ['beta1', 'beta2', 'alpha1', 'alpha2', 'cx', 'phi']:
+                    self.assertAlmostEqual(batch[name][key][i], getattr(props, key), places=12)
+        
+        # Same result from a structured table of design points
+        table = np.zeros(3, dtype=[(k, 'f8') for k in ('r', 'phi', 'psi', 'rpm', 'rootRadius', 'tipRadius')])
+        table['r'], table['phi'], table['psi'], table['rpm'] = r, phi, 0.482, 30000
+        table['rootRadius'], table['tipRadius'] = rootRadius, tipRadius
+        np.testing.assert_array_equal(StageCalcBatch(table)['tip']['beta1'], batch['tip']['beta1'])
+    
+    def test_stage_props_records(self):
+        """Test stage property records are immutable, unshared and convert to arrays"""
+        stageProps = StageCalc(r=0.4, phi=0.691, psi=0.482, rpm=30000,
+                               rootRadius=15.0, tipRadius=30.0)
+        
+        with self.assertRaises(AttributeError):
+            stageProps.meanProps.phi = 0.5
+        with self.assertRaises(AttributeError):
+            stageProps.rootProps = StageProps()
+        
+        # Defaults are per instance, not shared class attributes
+        self.assertIsNot(LinearStageProp().rootProps, LinearStageProp().rootProps)
+        
+        changed = stageProps.meanProps.replace(phi=0.5)
+        self.assertEqual(changed.phi, 0.5)
+        self.assertEqual(stageProps.meanProps.phi, 0.691)
+        self.assertEqual(changed.beta1, stageProps.meanProps.beta1)
+        
+        array = stageProps.toArray()
+        self.assertEqual(array.shape, (3, len(StageProps.__slots__)))
+        self.assertEqual(array[2, StageProps.__slots__.index('cx')], stageProps.tipProps.cx)
+        
+        self.assertEqual(pickle.loads(pickle.dumps(stageProps)), stageProps)
+    
     def test_naca4_blade(self):
         """Test NACA4 blade generation"""
         faces, verts = NACA4Blade(
@@ -84,6 +147,59 @@ class TestBladeCalc(unittest.TestCase):
             for idx in face:
                 self.assertLess(idx, len(verts))
     
+    def test_naca4_sections(self):
+        """Test vectorized NACA4 kernel shapes and agreement with NACA4Blade"""
+        args = dict(camberRoot=0.04, camberTip=0.02, camberPos=0.35,
+                    thickness=0.12, bladeHeight=15.0, twistAngle=10.0,
+                    rootChord=20.0, tipChord=10.0, cot=[50.0, 0.0])
+        
+        upper, lower = NACA4Sections(nspan=4, npts=16, **args)
+        
+        self.assertEqual(upper.shape, (5, 16, 3))
+        self.assertEqual(lower.shape, (5, 16, 3))
+        self.assertTrue(np.allclose(upper[:, 0, 2], np.linspace(0, 15.0, 5)))
+        
+        # Faces must only reference the stacked upper/lower vertices
+        faces = NACA4Faces(4, 16)
+        self.assertEqual(faces.min(), 0)
+        self.assertEqual(faces.max(), 5 * 16 * 2 - 1)
+        
+        # Default resolution reproduces NACA4Blade
+        faces, verts = NACA4Blade(**args)
+        upper, lower = NACA4Sections(**args)
+        stacked = np.stack((upper, lower), axis=1).reshape(-1, 3)
+        self.assertTrue(np.allclose(stacked, np.array(verts)))
+        self.assertEqual(NACA4Faces(1, 24).tolist(), faces)
+    
+    def test_naca4_span_adaptive(self):
+        """Test adaptive span stations follow twist and tolerance"""
+        args = dict(camberRoot=0.04, camberTip=0.02, camberPos=0.35,
+                    thickness=0.12, bladeHeight=15.0, rootChord=20.0,
+                    tipChord=10.0, cot=[50.0, 0.0])
+        
+        # No tolerance gives evenly spaced stations
+        span = NACA4Span(twistAngle=10.0, nspan=4, **args)
+        self.assertTrue(np.allclose(span, np.linspace(0, 1, 5)))
+        
+        low = NACA4Span(twistAngle=5.0, tolerance=0.01, **args)
+        high = NACA4Span(twistAngle=60.0, tolerance=0.01, **args)
+        self.assertEqual(low[0], 0.0)
+        self.assertEqual(low[-1], 1.0)
+        self.assertGreater(len(high), len(low))
+        
+        # Straight panels between stations stay within tolerance
+        upper, lower = NACA4Sections(twistAngle=60.0, span=high, **args)
+        mid = (high[:-1] + high[1:]) / 2
+        upperMid, lowerMid = NACA4Sections(twistAngle=60.0, span=mid, **args)
+        deviation = np.linalg.norm(upperMid - (upper[:-1] + upper[1:]) / 2, axis=-1)
+        self.assertLessEqual(deviation.max(), 0.01)
+        
+        # A tolerance out of reach uses up the whole budget on the worst intervals
+        capped = NACA4Span(twistAngle=60.0, tolerance=1e-6, maxSpan=11, **args)
+        self.assertEqual(len(capped) - 1, 11)
+        coarse = NACA4Span(twistAngle=60.0, tolerance=1e-6, maxSpan=8, **args)
+        self.assertTrue(np.allclose(capped[np.isin(capped, coarse)], coarse))
+    
     def test_find_bounds(self):
         """Test bounding box calculation with a real cylinder"""
         from StlUtils import drawCylinder
@@ -99,6 +215,30 @@ class TestBladeCalc(unittest.TestCase):
         self.assertAlmostEqual(float(maxy - miny), 10.0, places=0)
         self.assertAlmostEqual(float(maxz - minz), 20.0, places=1)
 
+    
+    def test_find_bounds_many(self):
+        """Test bounding boxes for several meshes and labelled ranges"""
+        from StlUtils import drawCylinder, drawDuct, MeshAssembler
+        
+        cylinder = drawCylinder(dia=10.0, height=20.0, res=25)
+        duct = drawDuct(innerDia=10.0, thickness=2.0, height=5.0, res=25)
+        duct.x += 100.0
+        
+        bounds = FindBoundsMany([cylinder, duct])
+        self.assertEqual(bounds.shape, (2, 6))
+        self.assertTrue(np.allclose(bounds[0], FindBounds(cylinder)))
+        self.assertTrue(np.allclose(bounds[1], FindBounds(duct)))
+        
+        assembler = MeshAssembler()
+        assembler.add(cylinder, 'hub')
+        assembler.add(duct, 'duct')
+        combined = assembler.build()
+        
+        ranges = FindRangeBounds(combined, assembler.ranges)
+        self.assertEqual(list(ranges), ['hub', 'duct'])
+        self.assertTrue(np.allclose(ranges['hub'], bounds[0]))
+        self.assertTrue(np.allclose(ranges['duct'], bounds[1]))
+
 
 if __name__ == '__main__':
     unittest.main()
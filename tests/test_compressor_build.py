@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import MeshCache
+from fixtures import CacheTestCase, COMMON, ROTOR, STATOR
+from CompressorBuild import StageOffsets, BuildCompressor, ShareMesh, UnshareMesh
+from BladeBuild import BuildRotor, BuildStator, BuildCancelled
+from BladeCalc import FindBounds
+
+
+class TestCompressorBuild(CacheTestCase):
+    """Test stacking every stage into one compressor mesh"""
+    
+    def test_stage_offsets(self):
+        """Test rotors and stators are placed one after the other along the axis"""
+        offsets = StageOffsets([(COMMON, ROTOR, STATOR)] * 2)
+        
+        self.assertEqual(len(offsets), 2)
+        self.assertAlmostEqual(offsets[0][0], 8.5)
+        self.assertAlmostEqual(offsets[0][1], 17 + 7.15)
+        self.assertAlmostEqual(offsets[1][0], 31.3 + 8.5)
+    
+    def test_build_compressor(self):
+        """Test the stacked compressor holds every labelled part in place"""
+        compressor = BuildCompressor([(COMMON, ROTOR, STATOR)] * 2, jobs=2)
+        
+        self.assertEqual(compressor.names[:3], ['stage1/rotor/hub', 'stage1/rotor/blades', 'stage1/stator/mountCan'])
+        self.assertIn('stage2/stator/duct', compressor.names)
+        self.assertEqual(len(compressor), 2 * (len(BuildRotor(COMMON, ROTOR)) + len(BuildStator(COMMON, STATOR))))
+        
+        minx, maxx = FindBounds(compressor.part('stage2/stator/duct'))[:2]
+        self.assertAlmostEqual(minx, 31.3 + 17, places=3)
+        self.assertAlmostEqual(maxx, 2 * 31.3, places=3)
+    
+    def test_stage_offsets_long_can(self):
+        """Test a mount can longer than its duct, and moved along it, overlaps neither rotor"""
+        stator = dict(STATOR, **{'Mount Can Length': 30, 'Mount Can Loc': 2})
+        compressor = BuildCompressor([(COMMON, ROTOR, stator), (COMMON, ROTOR, STATOR)], endWall=True)
+        
+        # Hub, can and duct one after the other, can and duct together right after the rotor
+        bounds = {name: FindBounds(compressor.part(name))[:2] for name in compressor.names if not name.endswith('blades')}
+        self.assertAlmostEqual(bounds['stage1/rotor/hub'][1], 17, places=3)
+        self.assertAlmostEqual(min(bounds['stage1/stator/mountCan'][0], bounds['stage1/stator/duct'][0]), 17, places=3)
+        end = max(bounds['stage1/stator/mountCan'][1], bounds['stage1/stator/duct'][1])
+        self.assertAlmostEqual(bounds['stage2/rotor/hub'][0], end, places=3)
+        self.assertAlmostEqual(end, 17 + 30, places=3)
+    
+    def test_shared_memory_round_trip(self):
+        """Test meshes pass through shared memory unchanged"""
+        rotor = BuildRotor(COMMON, ROTOR, endWall=True)
+        
+        shared = ShareMesh(rotor)
+        self.assertIsInstance(shared[0], str)
+        back = UnshareMesh(shared)
+        
+        np.testing.assert_array_equal(back.vertices, rotor.vertices)
+        np.testing.assert_array_equal(back.faces, rotor.faces)
+        self.assertEqual(back.partRanges(), rotor.partRanges())
+    
+    def test_process_pool_build(self):
+        """Test building on worker processes gives the same compressor"""
+        stages = [(COMMON, ROTOR, STATOR), (COMMON, dict(ROTOR, **{'Hub Length': '20'}), STATOR)]
+        threaded = BuildCompressor(stages)
+        
+        MeshCache.meshCache.clear()
+        MeshCache.diskCache.clear()
+        pooled = BuildCompressor(stages, jobs=2, processes=True)
+        
+        self.assertEqual(pooled.names, threaded.names)
+        np.testing.assert_array_equal(pooled.vertices, threaded.vertices)
+        np.testing.assert_array_equal(pooled.labels, threaded.labels)
+    
+    @unittest.skipUnless(os.path.isdir('/dev/shm'), 'needs POSIX shared memory')
+    def test_process_pool_cancel_frees_memory(self):
+        """Test a cancelled process pool build leaves no shared memory behind"""
+        stages = [(COMMON, dict(ROTOR, **{'Hub Length': str(17 + i)}), STATOR) for i in range(3)]
+        before = set(os.listdir('/dev/shm'))
+        
+        def cancel(fraction):
+            raise BuildCancelled()
+        
+        with self.assertRaises(BuildCancelled):
+            BuildCompressor(stages, jobs=2, processes=True, progress=cancel)
+        
+        self.assertEqual(set(os.listdir('/dev/shm')) - before, set())
+    
+    def test_changed_stage_only_rebuilt(self):
+        """Test only the stage that changed is built again"""
+        BuildCompressor([(COMMON, ROTOR, STATOR)] * 3)
+        
+        changed = dict(ROTOR, **{'Root Chord (Rotor)': '22'})
+        with mock.patch('MeshCache.BuildRotor', wraps=BuildRotor) as rotorBuild, \
+             mock.patch('MeshCache.BuildStator', wraps=BuildStator) as statorBuild:
+            BuildCompressor([(COMMON, ROTOR, STATOR), (COMMON, changed, STATOR), (COMMON, ROTOR, STATOR)])
+        
+        self.assertEqual(rotorBuild.call_count, 1)
+        self.assertEqual(statorBuild.call_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
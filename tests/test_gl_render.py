@@ -0,0 +1,34 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from GLRender import GLArrays
+from StlUtils import buildCylinder
+
+
+class TestGLRender(unittest.TestCase):
+    """Test the vertex and index data uploaded by the OpenGL view"""
+    
+    def test_gl_arrays(self):
+        """Test interleaved positions follow the mesh transform and indices are flat uint32"""
+        obj = buildCylinder(10, 5, 20)
+        obj.translate([100, 0, 0])
+        interleaved, indices, center, radius = GLArrays(obj)
+        
+        self.assertEqual(interleaved.dtype, np.float32)
+        self.assertEqual(interleaved.shape, (obj.vertices.shape[0], 6))
+        np.testing.assert_array_equal(interleaved[:, :3], obj.vertices)
+        np.testing.assert_allclose(np.linalg.norm(interleaved[:, 3:], axis=1), 1, atol=1e-5)
+        
+        self.assertEqual(indices.dtype, np.uint32)
+        np.testing.assert_array_equal(indices, obj.faces.ravel())
+        
+        self.assertAlmostEqual(center[0], 100, places=4)
+        self.assertTrue(np.all(np.linalg.norm(obj.vertices - center, axis=1) <= radius + 1e-4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import MeshCache
+from MeshCache import CanonicalKey, LRUCache, DiskCache, CachedStageCalc, CachedBuildRotor, meshCache
+from BladeBuild import BuildRotor
+from fixtures import CacheTestCase, COMMON, ROTOR
+
+
+class TestMeshCache(CacheTestCase):
+    """Test the in-process and on-disk stage solution and mesh caches"""
+    
+    def test_canonical_key(self):
+        """Test keys only depend on the float values of the parameters"""
+        self.assertEqual(CanonicalKey({'a': '30', 'b': 1}), CanonicalKey({'b': '1.000', 'a': 30.0}))
+        self.assertNotEqual(CanonicalKey({'a': '30'}), CanonicalKey({'a': '30.001'}))
+        self.assertNotEqual(CanonicalKey(COMMON, ROTOR, True), CanonicalKey(COMMON, ROTOR, False))
+    
+    def test_lru_byte_bound(self):
+        """Test least recently used values are evicted to stay in the byte budget"""
+        cache = LRUCache(maxBytes=3000)
+        for key in 'abc':
+            cache.put(key, np.zeros(100))
+        
+        # 'a' was used last, so 'b' goes first
+        cache.get('a')
+        cache.put('d', np.zeros(100))
+        
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertLessEqual(cache.bytes, 3000)
+        
+        # Values bigger than the budget are not kept
+        cache.put('e', np.zeros(1000))
+        self.assertNotIn('e', cache)
+    
+    def test_cached_builds(self):
+        """Test repeated builds come back from the cache, read only"""
+        first = CachedBuildRotor(COMMON, ROTOR)
+        
+        # Same values given as floats hit the same entry
+        second = CachedBuildRotor({k: float(v) for k, v in COMMON.items()}, ROTOR)
+        self.assertIs(first, second)
+        self.assertIsNot(CachedBuildRotor(COMMON, ROTOR, endWall=True), first)
+        
+        np.testing.assert_array_equal(first.vertices, BuildRotor(COMMON, ROTOR).vertices)
+        with self.assertRaises(ValueError):
+            first.translate([1, 0, 0])
+        
+        stage = CachedStageCalc(0.4, 0.691, 0.482, 30000, 15.0, 30.0)
+        self.assertIs(CachedStageCalc(0.4, 0.691, 0.482, 30000, 15, 30), stage)
+    
+    def test_disk_cache(self):
+        """Test meshes come back from disk memory mapped and read only"""
+        obj = CachedBuildRotor(COMMON, ROTOR, endWall=True)
+        disk = DiskCache(self.cache_dir)
+        key = CanonicalKey('rotor', COMMON, ROTOR, True, 1, 24, None)
+        
+        cached = disk.get(key)
+        self.assertFalse(cached.vertices.flags.owndata)
+        self.assertFalse(cached.vertices.flags.writeable)
+        self.assertEqual(cached.partRanges(), obj.partRanges())
+        np.testing.assert_array_equal(cached.vertices, obj.vertices)
+        np.testing.assert_array_equal(cached.faces, obj.faces)
+        
+        # Other versions never see the entry
+        with mock.patch('MeshCache.version', 'other'):
+            self.assertIsNone(disk.get(key))
+        
+        # Versions follow the builder sources, and a new one drops the old entries
+        self.assertNotEqual(MeshCache.SourceVersion(['BladeBuild']), MeshCache.SourceVersion(['StlUtils']))
+        with mock.patch('MeshCache.version', 'CompPy-other'):
+            disk.put(key, obj)
+        self.assertEqual(os.listdir(self.cache_dir), ['CompPy-other'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from BladeBuild import BuildRotor, BuildStator
+from CompressorBuild import BuildCompressor
+from MeshUnion import ClipSolid, UnionParts
+from StlUtils import buildCylinder, edgeReport, decimateMesh
+from fixtures import CacheTestCase, COMMON, ROTOR, STATOR
+
+
+def shells(faces):
+    """Number of edge connected pieces of a mesh"""
+    label = np.arange(faces.max() + 1)
+    while True:
+        joined = label.copy()
+        np.minimum.at(joined, faces.ravel(), np.repeat(label[faces].min(axis=1), 3))
+        joined = joined[joined]
+        if np.array_equal(joined, label):
+            return len(np.unique(label[faces]))
+        label = joined
+
+
+def signedVolume(obj):
+    corners = obj.vertices[obj.faces].astype(np.float64)
+    return np.einsum('ij,ij->i', corners[:, 0], np.cross(corners[:, 1], corners[:, 2])).sum() / 6
+
+
+class TestMeshUnion(CacheTestCase):
+    """Test the blade, hub and wall union"""
+
+    def assertClosed(self, obj):
+        report = edgeReport(obj.faces)
+        self.assertEqual(len(report['boundary']), 0)
+        self.assertEqual(len(report['nonManifold']), 0)
+
+        #Consistently Wound, Every Edge Walked Once Each Way
+        edges = obj.faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2).astype(np.int64)
+        self.assertEqual(len(np.unique(edges[:, 0] * len(obj.vertices) + edges[:, 1])), len(edges))
+
+    def test_clip_solid(self):
+        """Test cuts lie on the cylinder, are shared by both sides and form one loop per crossing"""
+        #Closed Box Through a Radius 10 Cylinder
+        corners = np.array([[x, y, z] for x in (-1, 1) for y in (5, 15) for z in (-1, 1)], dtype=float)
+        faces = np.array([[0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+                          [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]])
+
+        vertices, kept, loops = ClipSolid(corners, faces, 0.0, 10.0, -np.inf, np.inf)
+        self.assertEqual(len(loops), 1)
+        np.testing.assert_allclose(np.hypot(vertices[loops[0], 1], vertices[loops[0], 2]), 10)
+        self.assertTrue(np.all(np.hypot(vertices[kept, 1], vertices[kept, 2]) >= 10 - 1e-9))
+
+        #Open Only Along the Cut, Which the Kept Faces Walk in Loop Order
+        boundary = edgeReport(kept)['boundary']
+        self.assertEqual(len(boundary), len(loops[0]))
+        self.assertTrue(set(boundary.ravel()) == set(loops[0]))
+
+    def test_union_rotor(self):
+        """Test the rotor union is one closed, outward facing shell with its parts still labelled"""
+        obj = BuildRotor(COMMON, ROTOR, True)
+        union = UnionParts(obj)
+
+        self.assertClosed(union)
+        self.assertEqual(shells(union.faces), 1)
+        self.assertEqual([name for name, start, stop in union.partRanges()], ['hub', 'blades', 'endWall'])
+
+        #More Than the Hub and End Wall Alone
+        walls = np.pi * 15**2 * 17 + np.pi * (32**2 - 30**2) * 17
+        self.assertGreater(signedVolume(union), walls)
+        
+        #Reduced for Export, Still Closed
+        reduced = decimateMesh(union, len(union) // 4)
+        self.assertLessEqual(len(reduced), len(union) // 4)
+        self.assertClosed(reduced)
+
+    def test_union_stator(self):
+        """Test the stator union and every rotor and stator of a compressor are closed"""
+        obj = BuildStator(COMMON, STATOR)
+        union = UnionParts(obj)
+        self.assertClosed(union)
+        
+        # Blade roots hang past the mount can ends, which must not refine the whole can
+        self.assertLess(len(union), 3 * len(obj))
+
+        stages = [(COMMON, ROTOR, STATOR)] * 2
+        union = UnionParts(BuildCompressor(stages, endWall=True))
+        self.assertClosed(union)
+        self.assertEqual(shells(union.faces), 4)
+        self.assertEqual(union.names[:3], ['stage1/rotor/hub', 'stage1/rotor/blades', 'stage1/rotor/endWall'])
+
+    def test_union_clip_ends(self):
+        """Test a box through the end of a cylinder is cut on the end cap as well as the side"""
+        corners = np.array([[x, y, z] for x in (-1, 3) for y in (5, 15) for z in (-1, 1)], dtype=float)
+        faces = np.array([[0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+                          [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]])
+
+        vertices, kept, loops = ClipSolid(corners, faces, 0.0, 10.0, -10.0, 1.0)
+        self.assertEqual(len(loops), 1)
+        cut = vertices[loops[0]]
+        onSide = np.isclose(np.hypot(cut[:, 1], cut[:, 2]), 10)
+        onEnd = np.isclose(cut[:, 0], 1)
+        self.assertTrue(np.all(onSide | onEnd))
+        self.assertTrue(onSide.any() and onEnd.any())
+
+    def test_union_long_chord(self):
+        """Test blades with a root chord longer than the hub and wall are kept past their ends"""
+        rotor = dict(ROTOR, **{"Hub Length": "8", "Root Chord (Rotor)": "9.43"})
+        obj = BuildRotor(COMMON, rotor, True)
+        union = UnionParts(obj)
+
+        self.assertClosed(union)
+        self.assertEqual(shells(union.faces), 1)
+        self.assertLess(len(union), 3 * len(obj))
+        blades = obj.part('blades').vertices[:, 0]
+        np.testing.assert_allclose([union.vertices[:, 0].min(), union.vertices[:, 0].max()],
+                                   [blades.min(), blades.max()], atol=1e-5)
+
+        stator = dict(STATOR, **{"Duct Length": "6", "Mount Can Length": "6", "Root Chord (Stator)": "7.64"})
+        obj = BuildStator(COMMON, stator)
+        union = UnionParts(obj)
+        self.assertClosed(union)
+        self.assertEqual(shells(union.faces), 1)
+        self.assertLess(len(union), 3 * len(obj))
+
+    def test_union_fine_span(self):
+        """Test finer span meshes, whose roots curl back over the hub end, still join into one closed shell"""
+        for nspan, npts in ((4, 10), (4, 24), (8, 60)):
+            for obj in (BuildRotor(COMMON, ROTOR, True, nspan=nspan, npts=npts), BuildStator(COMMON, STATOR, nspan=nspan, npts=npts)):
+                union = UnionParts(obj)
+                self.assertClosed(union)
+                self.assertEqual(shells(union.faces), 1)
+                self.assertLess(len(union), 3 * len(obj))
+
+    def test_union_needs_blades(self):
+        """Test a mesh without labelled blades is refused"""
+        with self.assertRaises(ValueError):
+            UnionParts(buildCylinder(10, 5, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
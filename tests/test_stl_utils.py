@@ -2,11 +2,14 @@ import unittest
 import sys
 import os
 import numpy as np
+import shutil
+import tempfile
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from StlUtils import drawCylinder, drawDuct, drawBlade, rotationMatrix
+from StlUtils import drawCylinder, drawDuct, drawBlade, drawBladeRow, rotationMatrix, MeshAssembler, facesToMesh, IndexedMesh, buildCylinder, buildBlade, writeStl, faceNormals, buildBladeRow, vertexNormals, decimateMesh, collapseEdges, weldVertices, cleanFaces, edgeReport, repairMesh
 from BladeCalc import FindBounds
+from stl import mesh
 
 
 class TestStlUtils(unittest.TestCase):
@@ -43,6 +46,21 @@ class TestStlUtils(unittest.TestCase):
         self.assertAlmostEqual(maxy - miny, outer_dia, places=0)
         self.assertAlmostEqual(maxz - minz, 20.0, places=1)
     
+    def test_faces_to_mesh(self):
+        """Test indexed geometry expansion and primitive face counts"""
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=float)
+        faces = np.array([[0, 1, 2], [0, 1, 3], [1, 2, 3]], dtype=np.int32)
+        
+        obj = facesToMesh(vertices, faces)
+        
+        for i, f in enumerate(faces):
+            for j in range(3):
+                self.assertTrue(np.array_equal(obj.vectors[i][j], vertices[f[j]]))
+        
+        # Caps and sides of the closed primitives
+        self.assertEqual(len(drawCylinder(dia=10.0, height=20.0, res=40).vectors), 4 * 40)
+        self.assertEqual(len(drawDuct(innerDia=10.0, thickness=2.0, height=20.0, res=40).vectors), 8 * 40)
+    
     def test_draw_blade(self):
         """Test blade generation"""
         blade = drawBlade(
@@ -66,6 +84,275 @@ class TestStlUtils(unittest.TestCase):
         # Height should be approximately 15
         self.assertAlmostEqual(maxz - minz, 15.0, places=0)
     
+    def test_draw_blade_resolution(self):
+        """Test blade span and chordwise resolution"""
+        args = dict(camberRoot=0.04, camberTip=0.02, camberPos=0.35,
+                    thickness=0.12, bladeHeight=15.0, twistAngle=40.0,
+                    rootChord=20.0, tipChord=10.0, cot=[50.0, 0.0])
+        
+        blade = drawBlade(nspan=5, npts=30, **args)
+        # Two caps plus nspan side bands, each (4 * npts - 2) triangles
+        self.assertEqual(len(blade.vectors), (4 * 30 - 2) * 6)
+        
+        # Adaptive refinement adds stations as the tolerance tightens
+        coarse = drawBlade(tolerance=1.0, **args)
+        fine = drawBlade(tolerance=0.01, **args)
+        self.assertGreater(len(fine.vectors), len(coarse.vectors))
+        
+        minx, maxx, miny, maxy, minz, maxz = FindBounds(fine)
+        self.assertAlmostEqual(maxz - minz, 15.0, places=3)
+    
+    def test_draw_blade_row(self):
+        """Test batched blade replication matches rotating each copy"""
+        blade = drawBlade(
+            camberRoot=0.04,
+            camberTip=0.02,
+            camberPos=0.35,
+            thickness=0.12,
+            bladeHeight=15.0,
+            twistAngle=10.0,
+            rootChord=20.0,
+            tipChord=10.0,
+            cot=[50.0, 0.0]
+        )
+        blade.z += 10.0
+        angles = np.deg2rad([5.0, 41.0, 77.0])
+        
+        row = drawBladeRow(blade, angles, [1, 0, 0])
+        
+        nfaces = len(blade.vectors)
+        self.assertEqual(len(row.vectors), 3 * nfaces)
+        for i, theta in enumerate(angles):
+            copy = mesh.Mesh(blade.data.copy())
+            copy.rotate([1, 0, 0], theta)
+            block = row.vectors[i * nfaces:(i + 1) * nfaces]
+            self.assertTrue(np.allclose(block, copy.vectors, atol=1e-4))
+    
+    def test_mesh_assembler(self):
+        """Test joining parts into one preallocated mesh"""
+        cylinder = drawCylinder(dia=10.0, height=20.0, res=25)
+        duct = drawDuct(innerDia=10.0, thickness=2.0, height=20.0, res=25)
+        
+        assembler = MeshAssembler()
+        assembler.add(cylinder, 'hub')
+        assembler.add(duct, 'duct')
+        self.assertEqual(assembler.faceCount(), len(cylinder.data) + len(duct.data))
+        
+        combined = assembler.build()
+        expected = np.concatenate([cylinder.vectors, duct.vectors])
+        self.assertTrue(np.array_equal(combined.vectors, expected))
+        self.assertEqual(assembler.ranges, [('hub', 0, len(cylinder.data)),
+                                            ('duct', len(cylinder.data), len(expected))])
+    
+    def test_indexed_mesh(self):
+        """Test shared-vertex mesh conversion, labels and memory"""
+        cylinder = buildCylinder(dia=10.0, height=20.0, res=25)
+        
+        self.assertEqual(cylinder.vertices.dtype, np.float32)
+        self.assertEqual(cylinder.faces.dtype, np.int32)
+        self.assertEqual(len(cylinder.vertices), 2 * 25 + 2)
+        
+        soup = cylinder.toMesh()
+        self.assertTrue(np.array_equal(soup.vectors, cylinder.vectors))
+        self.assertLess(cylinder.nbytes, soup.data.nbytes / 2)
+        
+        # Round trip through the numpy-stl triangle soup welds the vertices again
+        welded = IndexedMesh.fromMesh(soup)
+        self.assertEqual(len(welded.vertices), len(cylinder.vertices))
+        self.assertTrue(np.array_equal(welded.vectors, soup.vectors))
+        
+        blade = buildBlade(camberRoot=0.04, camberTip=0.02, camberPos=0.35,
+                           thickness=0.12, bladeHeight=15.0, twistAngle=10.0,
+                           rootChord=20.0, tipChord=10.0, cot=[50.0, 0.0])
+        assembler = MeshAssembler()
+        assembler.add(cylinder, 'hub')
+        assembler.add(blade, 'blades')
+        combined = assembler.build()
+        
+        self.assertEqual(combined.names, ['hub', 'blades'])
+        self.assertEqual(len(combined), len(cylinder) + len(blade))
+        self.assertTrue(np.array_equal(combined.part('blades').vectors, blade.vectors))
+    
+    def test_write_stl(self):
+        """Test streamed STL export matches a whole-mesh save"""
+        cylinder = buildCylinder(dia=10, height=20)
+        blade = buildBlade(camberRoot=0.04, camberTip=0.02, camberPos=0.35, thickness=0.12,
+                           bladeHeight=15.0, twistAngle=10.0, rootChord=10.0, tipChord=7.0, cot=[0, 0])
+        assembler = MeshAssembler()
+        assembler.add(cylinder, 'hub')
+        assembler.add(blade, 'blade')
+        whole = assembler.build().toMesh()
+        
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'parts.stl')
+            # Indexed parts, a numpy-stl mesh and a labelled pair, in small chunks
+            count = writeStl(path, [cylinder, ('blade', blade.toMesh())], chunk=7)
+            streamed = mesh.Mesh.from_file(path)
+            
+            self.assertEqual(count, len(whole.vectors))
+            np.testing.assert_array_equal(streamed.vectors, whole.vectors)
+            np.testing.assert_allclose(streamed.normals, whole.normals, atol=1e-5)
+            
+            with open(path, 'rb') as f:
+                self.assertFalse(f.read(80).startswith(b'solid'))
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_face_normals(self):
+        """Test normals are only computed when asked for, matching numpy-stl"""
+        cylinder = buildCylinder(dia=10, height=20)
+        
+        reference = facesToMesh(cylinder.vertices, cylinder.faces)
+        reference.update_normals()
+        np.testing.assert_allclose(faceNormals(cylinder.vectors), reference.normals, atol=1e-5)
+        np.testing.assert_allclose(cylinder.toMesh().normals, reference.normals, atol=1e-5)
+        self.assertFalse(cylinder.toMesh(normals=False).normals.any())
+        
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'bare.stl')
+            writeStl(path, [cylinder], normals=False)
+            self.assertFalse(mesh.Mesh.from_file(path, calculate_normals=False).normals.any())
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_transform_pipeline(self):
+        """Test rotate and translate compose one pose applied in a single pass"""
+        blade = buildBlade(camberRoot=0.04, camberTip=0.02, camberPos=0.35, thickness=0.12,
+                           bladeHeight=15.0, twistAngle=10.0, rootChord=10.0, tipChord=7.0, cot=[0, 0])
+        reference = blade.toMesh()
+        raw = blade.vertices.copy()
+        
+        blade.rotate([0, 0, 1], np.deg2rad(-30))
+        blade.translate([0, 5, 5])
+        blade.translate([2, 0, 0])
+        
+        # Nothing applied yet, only composed
+        self.assertEqual(blade.transform.shape, (4, 4))
+        np.testing.assert_array_equal(blade._vertices, raw)
+        
+        # Same result as the sequential numpy-stl steps
+        reference.rotate([0, 0, 1], np.deg2rad(-30))
+        reference.translate([0, 5, 5])
+        reference.translate([2, 0, 0])
+        posed = blade.copy()
+        np.testing.assert_allclose(posed.vectors, reference.vectors, atol=1e-4)
+        self.assertIsNone(posed.transform)
+        
+        # Rows and assembly apply the pending pose themselves
+        angles = np.deg2rad([0, 36, 72])
+        np.testing.assert_allclose(buildBladeRow(blade, angles).vertices,
+                                   buildBladeRow(posed, angles).vertices, atol=1e-4)
+        assembler = MeshAssembler()
+        assembler.add(blade, 'blade')
+        np.testing.assert_allclose(assembler.build().vertices, posed.vertices, atol=1e-5)
+        self.assertIsNotNone(blade.transform)
+    
+    def test_vertex_normals(self):
+        """Test vertex normals are area weighted, unit length and zero for unused vertices"""
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [5, 5, 5]], dtype=np.float32)
+        faces = np.array([[0, 1, 2], [0, 3, 1]])
+        normals = vertexNormals(vertices, faces)
+        
+        np.testing.assert_allclose(normals[2], [0, 0, 1], atol=1e-6)
+        np.testing.assert_allclose(normals[3], [0, 1, 0], atol=1e-6)
+        np.testing.assert_allclose(normals[0], [0, np.sqrt(0.5), np.sqrt(0.5)], atol=1e-6)
+        np.testing.assert_array_equal(normals[4], 0)
+    
+    def test_decimate_mesh(self):
+        """Test decimation meets the triangle budget and keeps sharp corners and part labels"""
+        #Finely Tessellated Closed Box, Each Side a 20 x 20 Grid
+        n = 20
+        u, v = np.meshgrid(np.linspace(0, 1, n + 1), np.linspace(0, 1, n + 1), indexing='ij')
+        quads = np.arange((n + 1) ** 2).reshape(n + 1, n + 1)
+        a, b, c, d = quads[:-1, :-1].ravel(), quads[1:, :-1].ravel(), quads[1:, 1:].ravel(), quads[:-1, 1:].ravel()
+        grid = np.concatenate([np.stack([a, b, c], 1), np.stack([a, c, d], 1)])
+        
+        vertices, faces = [], []
+        for axis in range(3):
+            for side in (0, 1):
+                points = np.zeros((u.size, 3))
+                points[:, axis] = side
+                points[:, (axis + 1) % 3] = u.ravel()
+                points[:, (axis + 2) % 3] = v.ravel()
+                faces.append(grid + sum(len(p) for p in vertices))
+                vertices.append(points)
+        vertices, welded = np.unique(np.concatenate(vertices), axis=0, return_inverse=True)
+        box = IndexedMesh(vertices, welded.ravel()[np.concatenate(faces)],
+                          np.repeat([0, 1], len(grid) * 3), ['low', 'high'])
+        
+        reduced = decimateMesh(box, 300)
+        self.assertLessEqual(len(reduced), 300)
+        self.assertGreater(len(reduced), 12)
+        self.assertEqual([name for name, start, stop in reduced.partRanges()], ['low', 'high'])
+        
+        #Still One Closed Shell
+        report = edgeReport(reduced.faces)
+        self.assertEqual(len(report['boundary']), 0)
+        self.assertEqual(len(report['nonManifold']), 0)
+        
+        #Every Corner Survives Exactly, Nothing Leaves the Box
+        corners = np.array(np.meshgrid([0, 1], [0, 1], [0, 1])).reshape(3, -1).T
+        distance = np.linalg.norm(reduced.vertices[None] - corners[:, None], axis=2).min(axis=1)
+        self.assertTrue(np.all(distance < 1e-5))
+        self.assertTrue(np.all(reduced.vertices >= -1e-6) and np.all(reduced.vertices <= 1 + 1e-6))
+        
+        #No Vertex Moves Further Than the Error Bound From Where It Started
+        bounded = decimateMesh(box, maxError=0.2)
+        self.assertLess(len(bounded), len(box))
+        points, keep, faces, weld = collapseEdges(box.vertices, box.faces, maxError=0.2)
+        self.assertEqual(len(keep), len(bounded))
+        self.assertTrue(np.all(np.linalg.norm(points[weld] - box.vertices, axis=1) <= 0.2 + 1e-6))
+        self.assertLess(len(np.unique(weld)), len(box.vertices) / 4)
+        
+        with self.assertRaises(ValueError):
+            decimateMesh(box)
+    
+    def test_weld_and_clean(self):
+        """Test hash grid welding, duplicate face removal and the edge report"""
+        #Two Triangles Sharing an Edge, as a Soup With Rounding Noise
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0],
+                             [1, 0, 1e-7], [1, 1, 0], [0, 1 - 1e-7, 0]])
+        weld, used = weldVertices(vertices, 1e-5)
+        self.assertEqual(len(used), 4)
+        self.assertEqual(weld[1], weld[3])
+        self.assertEqual(weld[2], weld[5])
+        
+        #Collapsed, Repeated and Cancelling (Opposite Winding) Faces
+        faces = np.array([[0, 1, 2], [1, 2, 0], [1, 4, 2], [2, 4, 1], [0, 0, 1], [2, 1, 4]])
+        np.testing.assert_array_equal(cleanFaces(faces), [0, 2])
+        self.assertEqual(cleanFaces(np.array([[1, 4, 2], [2, 4, 1]])).size, 0)
+        
+        #One Tetrahedron Face Written Twice Both Ways, the Copy Closing the Shell Stays
+        tetra = np.array([[0, 2, 1], [0, 1, 3], [1, 2, 3], [0, 3, 2]])
+        doubled = np.vstack((tetra, tetra[3, ::-1], tetra[3]))
+        kept = cleanFaces(doubled)
+        self.assertEqual(len(kept), 4)
+        self.assertEqual(len(edgeReport(doubled[kept])['boundary']), 0)
+        
+        report = edgeReport(np.array([[0, 1, 2], [1, 3, 2], [1, 2, 4]]))
+        np.testing.assert_array_equal(report['nonManifold'], [[1, 2]])
+        self.assertEqual(len(report['boundary']), 6)
+    
+    def test_repair_mesh(self):
+        """Test every part is welded on its own into a closed shell"""
+        #Unwelded Cylinder Soup Next to a Second Copy Under Another Label
+        soup = IndexedMesh.fromMesh(drawCylinder(10, 5, 20))
+        vectors = soup.vectors.reshape(-1, 3)
+        faces = np.arange(vectors.shape[0]).reshape(-1, 3)
+        obj = IndexedMesh(np.vstack((vectors, vectors)), np.vstack((faces, faces + vectors.shape[0])),
+                          np.repeat([0, 1], len(faces)), ['a', 'b'])
+        
+        repaired, report = repairMesh(obj)
+        self.assertEqual(repaired.vertices.shape[0], 2 * soup.vertices.shape[0])
+        self.assertEqual(len(repaired), len(obj))
+        self.assertEqual([name for name, start, stop in repaired.partRanges()], ['a', 'b'])
+        for name in ('a', 'b'):
+            self.assertEqual(len(report[name]['boundary']), 0)
+            self.assertEqual(len(report[name]['nonManifold']), 0)
+        np.testing.assert_allclose(repaired.vectors, obj.vectors, atol=1e-6)
+    
     def test_rotation_matrix(self):
         """Test rotation matrix generation"""
         # Test rotation around z-axis by 90 degrees
@@ -81,6 +368,15 @@ class TestStlUtils(unittest.TestCase):
         self.assertAlmostEqual(rotated[1], 1.0, places=5)
         self.assertAlmostEqual(rotated[2], 0.0, places=5)
     
+    def test_rotation_matrix_stack(self):
+        """Test rotation matrices for an array of angles"""
+        angles = np.array([0.1, 0.5, 2.0])
+        R = rotationMatrix([1, 0, 0], angles)
+        
+        self.assertEqual(R.shape, (3, 3, 3))
+        for i, theta in enumerate(angles):
+            self.assertTrue(np.allclose(R[i], rotationMatrix([1, 0, 0], theta)))
+    
     def test_rotation_matrix_no_rotation(self):
         """Test rotation matrix with zero axis"""
         R = rotationMatrix([0, 0, 0], 0)